@@ -0,0 +1,59 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Cada benchmark trabaja sobre una base temporal propia: temporary_database()
+apunta STOCK_DB_PATH a un archivo nuevo antes de importar db.database, así
+la instancia global `db` (y todo lo que la usa) nunca toca db/stock.db.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@contextmanager
+def temporary_database():
+    """Directorio temporal con la base global `db` creada adentro; devuelve (db, directorio)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['STOCK_DB_PATH'] = os.path.join(tmp, 'stock.db')
+        from db.database import db
+        try:
+            yield db, tmp
+        finally:
+            db.close()
+
+
+def product_rows(count, start=0):
+    """Catálogo sintético: (id, name, brand, price, price2, quantity)"""
+    for i in range(start, start + count):
+        price = float(i % 1000 + 100)
+        yield (f"{i:06d}", f"PRODUCTO {i}", f"MARCA {i % 50}", price, price * 1.5, i % 200)
+
+
+def fill_stock(db, count):
+    """Cargar `count` productos sintéticos en stock"""
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO stock (id, name, brand, price, price2, quantity) VALUES (?, ?, ?, ?, ?, ?)",
+            product_rows(count)
+        )
+
+
+def percentile(values, fraction):
+    """Percentil de una lista ya ordenada"""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def report_latencies(name, latencies, unit='µs', scale=1e6):
+    """Imprimir p50/p99 de una lista de latencias en segundos"""
+    if not latencies:
+        print(f"{name:<26} sin mediciones")
+        return
+    latencies = sorted(latencies)
+    print(f"{name:<26} p50 {statistics.median(latencies) * scale:9.1f} {unit}   "
+          f"p99 {percentile(latencies, 0.99) * scale:9.1f} {unit}   n={len(latencies)}")
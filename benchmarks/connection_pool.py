@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Latencia por consulta: conexión del pool vs. abrir una conexión por llamada.
+
+Genera una base temporal con un catálogo de --productos filas y busca
+productos al azar por código, primero abriendo y cerrando una conexión en
+cada consulta (como hacía Database antes del pool) y después con la
+conexión del pool que conserva el hilo:
+
+    python benchmarks/connection_pool.py
+    python benchmarks/connection_pool.py --productos 100000 --consultas 20000
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+
+from common import fill_stock, report_latencies, temporary_database
+
+QUERY = "SELECT id, name, brand, price, price2, quantity FROM stock WHERE id = ?"
+
+
+def measure(fn, ids):
+    """Latencias (segundos) de fn(id) para cada id"""
+    latencies = []
+    for product_id in ids:
+        start = time.perf_counter()
+        fn(product_id)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de consultas con y sin pool de conexiones")
+    parser.add_argument('--productos', type=int, default=100000)
+    parser.add_argument('--consultas', type=int, default=20000)
+    args = parser.parse_args()
+
+    with temporary_database() as (db, _):
+        fill_stock(db, args.productos)
+        ids = [f"{random.randrange(args.productos):06d}" for _ in range(args.consultas)]
+
+        def per_call(product_id):
+            conn = sqlite3.connect(db.db_path)
+            try:
+                return conn.execute(QUERY, (product_id,)).fetchone()
+            finally:
+                conn.close()
+
+        def pooled(product_id):
+            return db.fetch_one(QUERY, (product_id,))
+
+        print(f"{args.productos} productos, {args.consultas} consultas por código\n")
+        for name, fn in (("conexión por llamada", per_call), ("pool (por hilo)", pooled)):
+            latencies = measure(fn, ids)
+            report_latencies(name, latencies)
+            print(f"{'':<26} {len(latencies) / sum(latencies):9.0f} consultas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de productos: LIKE '%término%' vs. índice FTS5.
+
+Genera un catálogo de --productos artículos de ferretería/electricidad con
+nombres acentuados y mide cada búsqueda con las dos implementaciones de
+StockModel (la de LIKE es la que se usa si SQLite no tiene FTS5):
+
+    python benchmarks/product_search.py
+    python benchmarks/product_search.py --productos 200000 --repeticiones 50
+"""
+
+import argparse
+import random
+import time
+
+from common import report_latencies, temporary_database
+
+KINDS = ['LÁMPARA LED', 'TUBO LED', 'LLAVE TERMOMAGNÉTICA', 'DISYUNTOR DIFERENCIAL', 'TOMACORRIENTE',
+         'INTERRUPTOR', 'CABLE UNIPOLAR', 'CAJA OCTOGONAL', 'PORTALÁMPARAS', 'FOCO DICROICA',
+         'ARTEFACTO PLAFÓN', 'CINTA AISLADORA', 'CAÑO CORRUGADO', 'TERMINAL DE COBRE', 'FICHA MACHO']
+VARIANTS = ['9W', '12W', '18W', '16A', '25A', '32A', '2.5MM', '4MM', '3/4', 'E27', 'GU10', 'DOBLE',
+            'SIMPLE', 'BLANCO', 'NEGRO', 'EXTERIOR', 'ESTANCO', 'MÓDULO']
+BRANDS = ['PHILIPS', 'OSRAM', 'SICA', 'JELUZ', 'CAMBRE', 'INDELPLAS', 'GENÉRICO', '3M', 'SCHNEIDER', 'ABB']
+
+TERMS = ['lampara', 'termomagnetica 25', 'sica', 'cable 2.5', 'portalamp e27', 'caño', 'plafon 18w',
+         'schneider diferencial', '12345', 'xyz inexistente']
+
+
+def catalog(count):
+    rng = random.Random(7)
+    for i in range(count):
+        name = f"{rng.choice(KINDS)} {rng.choice(VARIANTS)} {rng.choice(VARIANTS)} MOD {i % 997}"
+        price = float(rng.randrange(100, 50000))
+        yield (f"{i:06d}", name, rng.choice(BRANDS), price, round(price * 1.6, 2), rng.randrange(300))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de productos con LIKE y con FTS5")
+    parser.add_argument('--productos', type=int, default=200000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--limite', type=int, default=500, help="resultados como máximo (como la búsqueda en vivo)")
+    args = parser.parse_args()
+
+    with temporary_database() as (db, _):
+        from models.stock import StockModel
+
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO stock (id, name, brand, price, price2, quantity) VALUES (?, ?, ?, ?, ?, ?)",
+                catalog(args.productos)
+            )
+        stock = StockModel()
+        if not stock.has_search_index():
+            print("Este SQLite no tiene FTS5: solo se puede medir LIKE")
+
+        print(f"{args.productos} productos, {args.repeticiones} repeticiones por término, límite {args.limite}\n")
+        methods = [("LIKE", stock._search_products_like)]
+        if stock.has_search_index():
+            methods.append(("FTS5", stock.search_products))
+
+        totals = {name: [] for name, _ in methods}
+        for term in TERMS:
+            print(f"'{term}'")
+            for name, search in methods:
+                latencies = []
+                for _ in range(args.repeticiones):
+                    start = time.perf_counter()
+                    results = search(term, limit=args.limite)
+                    latencies.append(time.perf_counter() - start)
+                totals[name].extend(latencies)
+                report_latencies(f"  {name} ({len(results)} resultados)", latencies, 'ms', 1e3)
+
+        print("\nTodos los términos")
+        for name, latencies in totals.items():
+            report_latencies(f"  {name}", latencies, 'ms', 1e3)
+
+
+if __name__ == "__main__":
+    main()
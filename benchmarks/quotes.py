@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Presupuestos por segundo, con y sin las plantillas compartidas.
+
+Genera --presupuestos presupuestos seguidos de --items productos cada uno,
+primero como antes de PdfTemplates (estilos, encabezado de la empresa y
+TableStyle armados de nuevo para cada documento, con un BudgetService por
+presupuesto) y después reutilizando las plantillas del proceso. Necesita
+config/settings.py con COMPANY_CONFIG, igual que la aplicación:
+
+    python benchmarks/quotes.py
+    python benchmarks/quotes.py --presupuestos 200 --items 40
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import common  # noqa: F401  (agrega el directorio raíz al path)
+from services.budget_service import BudgetService
+from services.pdf_templates import pdf_templates
+
+
+def budget(number, item_count):
+    return {
+        'budget_number': f"P-{number:05d}",
+        'budget_name': f"PRESUPUESTO {number}",
+        'client_name': 'CLIENTE DE PRUEBA',
+        'client_doc': '20123456789',
+        'client_address': 'AV. SIEMPRE VIVA 742',
+        'items': [
+            {'quantity': i % 5 + 1, 'description': f"LÁMPARA LED {i}W E27", 'brand': 'PHILIPS',
+             'unit_price': 400.0 + i, 'subtotal': (i % 5 + 1) * (400.0 + i)}
+            for i in range(item_count)
+        ],
+        'total': sum((i % 5 + 1) * (400.0 + i) for i in range(item_count)),
+        'validity_days': 15,
+        'notes': 'Precios sujetos a modificación sin previo aviso.',
+    }
+
+
+def run(count, item_count, output_dir, cached):
+    """Generar `count` presupuestos; devuelve los segundos que tardó"""
+    service = BudgetService(output_dir)
+    start = time.perf_counter()
+    for number in range(count):
+        if not cached:
+            pdf_templates.reset()
+            service = BudgetService(output_dir)
+        service.generate_budget(budget(number, item_count),
+                                save_path=os.path.join(output_dir, f"{number}.pdf"))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuestos por segundo con y sin plantillas compartidas")
+    parser.add_argument('--presupuestos', type=int, default=100)
+    parser.add_argument('--items', type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        run(3, args.items, output_dir, cached=True)  # calentar imports y fuentes
+        print(f"{args.presupuestos} presupuestos de {args.items} items\n")
+        for name, cached in (("plantillas por documento", False), ("plantillas compartidas", True)):
+            seconds = run(args.presupuestos, args.items, output_dir, cached)
+            print(f"{name:<26} {args.presupuestos / seconds:7.1f} presupuestos/s "
+                  f"({seconds * 1e3 / args.presupuestos:.1f} ms cada uno)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Registros de los modelos: tuplas del cursor vs. Product vs. diccionarios.
+
+Lee --productos filas de stock de una base temporal de cuatro formas y
+mide el tiempo de armar la lista y la memoria que ocupa:
+  - tuplas tal como las devuelve sqlite3 (lo que devolvían los modelos);
+  - Product armado por la row_factory de models.records (lo actual);
+  - Product._make sobre cada tupla (conversión después de leer);
+  - diccionarios por fila (como convertían algunas vistas).
+
+    python benchmarks/records.py
+    python benchmarks/records.py --productos 200000 --repeticiones 10
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from common import fill_stock, temporary_database
+
+QUERY = "SELECT id, name, brand, price, price2, quantity FROM stock"
+COLUMNS = ('id', 'name', 'brand', 'price', 'price2', 'quantity')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo y memoria de los registros de productos")
+    parser.add_argument('--productos', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with temporary_database() as (db, _):
+        from models.records import Product, row_factory
+
+        fill_stock(db, args.productos)
+        product_row = row_factory(Product)
+
+        loaders = {
+            'tuplas': lambda: db.fetch_all(QUERY),
+            'Product (row_factory)': lambda: db.fetch_all(QUERY, row_factory=product_row),
+            'Product._make': lambda: [Product._make(row) for row in db.fetch_all(QUERY)],
+            'dict por fila': lambda: [dict(zip(COLUMNS, row)) for row in db.fetch_all(QUERY)],
+        }
+
+        print(f"{args.productos} productos, mediana de {args.repeticiones} lecturas\n")
+        print(f"{'':<24} {'lectura':>10} {'memoria':>10} {'por fila':>10}")
+        for name, load in loaders.items():
+            times = []
+            for _ in range(args.repeticiones):
+                start = time.perf_counter()
+                rows = load()
+                times.append(time.perf_counter() - start)
+                del rows
+
+            # Memoria de la lista armada (los textos de cada fila incluidos)
+            tracemalloc.start()
+            rows = load()
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del rows
+
+            print(f"{name:<24} {statistics.median(times) * 1e3:>7.1f} ms {size / 2**20:>7.1f} MB "
+                  f"{size / args.productos:>7.0f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Análisis de ventas por producto: carga del historial y rankings, con y sin NumPy.
+
+Arma --facturas facturas autorizadas de unos --items renglones cada una
+sobre un catálogo de --productos productos, repartidas en un año, y mide:
+  - SalesAnalytics.load() de todo el historial y de un mes;
+  - rankings, clases ABC, marcas y sell-through en Python puro y, si está
+    instalado, con NumPy, comprobando que den lo mismo;
+  - que las unidades y la facturación coincidan con un SUM directo.
+
+    python benchmarks/sales_analytics.py
+    python benchmarks/sales_analytics.py --facturas 500000 --items 5 --productos 20000
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from common import fill_stock, temporary_database
+
+RAW_TOTALS = """
+    SELECT SUM(i.cantidad), SUM(i.subtotal)
+    FROM factura_items i JOIN facturas f ON f.id = i.factura_id
+    WHERE f.estado = 'autorizada' AND f.fecha_emision BETWEEN ? AND ?
+"""
+
+
+def fill_sales(db, invoices, items, products):
+    """Facturas autorizadas con renglones al azar (semilla fija) sobre el catálogo sintético"""
+    rng = random.Random(1)
+    # Pocos productos venden mucho, como en un catálogo real
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(products)))
+    with db.transaction() as conn:
+        for n in range(1, invoices + 1):
+            date = f"2026-{n * 12 // (invoices + 1) + 1:02d}-{n % 28 + 1:02d}"
+            cursor = conn.execute(
+                "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total, estado) "
+                "VALUES (?, ?, 'CLIENTE', 0, 0, 0, 'autorizada')",
+                (f"0001-{n:08d}", date)
+            )
+            codes = rng.choices(range(products), cum_weights=cum_weights, k=rng.randint(1, 2 * items - 1))
+            conn.executemany(
+                "INSERT INTO factura_items (factura_id, producto_id, producto_nombre, producto_marca, "
+                "cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, f"{code:06d}", f"PRODUCTO {code}", f"MARCA {code % 50}",
+                  quantity, float(code % 1000 + 100), quantity * float(code % 1000 + 100))
+                 for code, quantity in ((code, rng.randint(1, 5)) for code in codes)]
+            )
+
+
+def analyze(snapshot):
+    """Todos los resultados del snapshot, como listas comparables (importes a centavos)"""
+    def rows(products):
+        return [(p.product_id, p.units, round(p.revenue, 2), p.abc) for p in products]
+
+    return {
+        'top_sellers': rows(snapshot.top_sellers(100)),
+        'top_units': rows(snapshot.top_sellers(100, by='units')),
+        'slow_movers': rows(snapshot.slow_movers(100)),
+        'abc': [str(c) for c in snapshot.abc_classes()],
+        'by_brand': [(b.brand, b.products, b.units, round(b.revenue, 2)) for b in snapshot.by_brand()],
+        'sell_through': [round(float(x), 9) for x in snapshot.sell_through()],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análisis de ventas por producto, con y sin NumPy")
+    parser.add_argument('--facturas', type=int, default=200000)
+    parser.add_argument('--items', type=int, default=5, help="renglones por factura (promedio)")
+    parser.add_argument('--productos', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    with temporary_database() as (db, _):
+        from services import sales_analytics
+        from services.sales_analytics import SalesAnalytics
+
+        numpy = sales_analytics.np
+        fill_stock(db, args.productos)
+        start = time.perf_counter()
+        fill_sales(db, args.facturas, args.items, args.productos)
+        item_count = db.fetch_one("SELECT COUNT(*) FROM factura_items")[0]
+        print(f"{args.facturas} facturas, {item_count} renglones, {args.productos} productos "
+              f"(generados en {time.perf_counter() - start:.1f}s)\n")
+
+        analytics = SalesAnalytics()
+        for label, dates in (("todo el historial", ()), ("un mes", ('2026-06-01', '2026-06-30'))):
+            sales_analytics.np = None
+            start = time.perf_counter()
+            snapshot = analytics.load(*dates)
+            elapsed = time.perf_counter() - start
+
+            units, revenue = db.fetch_one(RAW_TOTALS, dates or ('0000-00-00', '9999-99-99'))
+            matches = snapshot.total_units == (units or 0) and round(snapshot.total_revenue, 2) == round(revenue or 0, 2)
+            print(f"load() {label:<18} {elapsed:7.2f} s   {snapshot.total_units} unidades "
+                  f"({'coincide' if matches else 'NO coincide'} con SUM directo)")
+
+        print()
+        backends = [("Python puro", None)] + ([("NumPy", numpy)] if numpy is not None else [])
+        results = {}
+        for name, module in backends:
+            sales_analytics.np = module
+            snapshot = analytics.load()
+            times = []
+            for _ in range(args.repeticiones):
+                snapshot._abc = None
+                start = time.perf_counter()
+                results[name] = analyze(snapshot)
+                times.append(time.perf_counter() - start)
+            print(f"rankings {name:<14} {min(times) * 1e3:8.1f} ms")
+        sales_analytics.np = numpy
+
+        if numpy is None:
+            print("\nNumPy no está instalado: solo se midió Python puro (pip install numpy)")
+        elif results["Python puro"] == results["NumPy"]:
+            print("\nPython puro y NumPy dan los mismos resultados")
+        else:
+            different = [key for key in results["NumPy"] if results["NumPy"][key] != results["Python puro"][key]]
+            print(f"\nPython puro y NumPy difieren en: {', '.join(different)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Costo de refrescar la tabla de stock: por diferencias vs. reconstruirla.
+
+Para cada tamaño de catálogo muestra la lista completa en el Treeview de
+StockView y la vuelve a aplicar con 0, 10, 100 y 1000 productos
+modificados, comparando StockView.apply_rows (toca solo lo que cambió)
+con borrar e insertar todas las filas, como se hacía antes. Necesita una
+pantalla (o Xvfb), porque usa Tk de verdad:
+
+    python benchmarks/stock_refresh.py
+    python benchmarks/stock_refresh.py --tamanos 1000 10000 50000
+"""
+
+import argparse
+import statistics
+import time
+import tkinter as tk
+
+from common import product_rows, temporary_database
+
+CHANGES = (0, 10, 100, 1000)
+
+
+def rebuild(view, products):
+    """Refresco anterior: vaciar el tree e insertar todo de nuevo"""
+    tree = view.stock_tree
+    tree.delete(*tree.get_children())
+    view._rows.clear()
+    for product in products:
+        iid = str(product.id)
+        tree.insert(parent='', index='end', iid=iid, text="", values=product, tag="orow")
+        view._rows[iid] = product
+
+
+def with_changes(products, count):
+    """Copia de la lista con `count` precios modificados, repartidos en el catálogo"""
+    changed = list(products)
+    step = max(1, len(changed) // count) if count else 0
+    for index in range(0, min(count * step, len(changed)), step or 1):
+        changed[index] = changed[index]._replace(price2=changed[index].price2 + 1)
+    return changed
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresco de la tabla de stock por diferencias")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with temporary_database() as (db, _):
+        from models.stock import StockModel
+        from views.stock_view import StockView
+
+        root = tk.Tk()
+        root.withdraw()
+        print(f"{'productos':>10} {'cambios':>8} {'por diferencias':>17} {'reconstruir':>13}")
+        loaded = 0
+        for size in sorted(args.tamanos):
+            if size > loaded:
+                with db.transaction() as conn:
+                    conn.executemany(
+                        "INSERT INTO stock (id, name, brand, price, price2, quantity) VALUES (?, ?, ?, ?, ?, ?)",
+                        product_rows(size - loaded, start=loaded)
+                    )
+                loaded = size
+
+            view = StockView(root)
+            products = list(StockModel().get_all_products())
+            view.apply_rows(products)
+            for count in CHANGES:
+                if count > size:
+                    continue
+                changed = with_changes(products, count)
+
+                def diff():
+                    view.apply_rows(changed)
+                    view.apply_rows(products)
+
+                def full():
+                    rebuild(view, changed)
+                    rebuild(view, products)
+
+                # Cada medición aplica la lista cambiada y la original: se divide por dos
+                print(f"{size:>10} {count:>8} {timed(diff, args.repeticiones) / 2:>14.1f} ms "
+                      f"{timed(full, args.repeticiones) / 2:>10.1f} ms")
+            view.frame.destroy()
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Lectores y escritores concurrentes con cada perfil de almacenamiento.
+
+Para cada perfil (y para el journal de rollback que se usaba antes, como
+referencia) crea una base temporal con --productos filas y durante
+--segundos corre a la vez un hilo que confirma ventas (factura, items y
+descuento de stock en una transacción) y --lectores hilos que leen páginas
+del catálogo como la pestaña de stock. Informa p50/p99 de cada operación:
+
+    python benchmarks/storage_profiles.py
+    python benchmarks/storage_profiles.py --segundos 10 --lectores 3
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+
+from common import product_rows, report_latencies, temporary_database
+
+PROFILES = {
+    'rollback (anterior)': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'cache_size': -2000,
+                            'mmap_size': 0, 'temp_store': 'DEFAULT', 'busy_timeout': 10000},
+    'throughput': 'throughput',
+    'durable': 'durable',
+}
+
+PAGE_QUERY = """
+    SELECT id, name, brand, price, price2, quantity FROM stock
+    WHERE name >= ? ORDER BY name, id LIMIT 100
+"""
+
+
+def sell(conn, product_count, number):
+    """Una venta de tres productos: factura, items y descuento de stock"""
+    cursor = conn.execute(
+        "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total) "
+        "VALUES (?, datetime('now'), 'CONSUMIDOR FINAL', 100, 21, 121)",
+        (f"0001-{number:08d}",)
+    )
+    for _ in range(3):
+        product_id = f"{random.randrange(product_count):06d}"
+        conn.execute(
+            "INSERT INTO factura_items (factura_id, producto_id, cantidad, precio_unitario, subtotal) "
+            "VALUES (?, ?, 1, 100, 100)",
+            (cursor.lastrowid, product_id)
+        )
+        conn.execute("UPDATE stock SET quantity = quantity - 1 WHERE id = ?", (product_id,))
+
+
+def run_profile(database, product_count, seconds, readers):
+    """Correr la carga mixta; devuelve las latencias de escritura y de lectura"""
+    stop = threading.Event()
+    writes, reads = [], []
+
+    def writer():
+        number = 0
+        try:
+            while not stop.is_set():
+                number += 1
+                start = time.perf_counter()
+                with database.transaction() as conn:
+                    sell(conn, product_count, number)
+                writes.append(time.perf_counter() - start)
+        finally:
+            database.release_connection()
+
+    def reader():
+        latencies = []
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                database.fetch_all(PAGE_QUERY, (f"PRODUCTO {random.randrange(product_count)}",))
+                latencies.append(time.perf_counter() - start)
+        finally:
+            reads.extend(latencies)
+            database.release_connection()
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return writes, reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencias de lectura y escritura por perfil de almacenamiento")
+    parser.add_argument('--productos', type=int, default=50000)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--lectores', type=int, default=2)
+    args = parser.parse_args()
+
+    with temporary_database() as (_, tmp):
+        from db.database import Database
+
+        print(f"{args.productos} productos, 1 escritor y {args.lectores} lectores durante {args.segundos:g}s")
+        for index, (name, profile) in enumerate(PROFILES.items()):
+            database = Database(os.path.join(tmp, f"perfil{index}.db"), profile=profile)
+            with database.transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO stock (id, name, brand, price, price2, quantity) VALUES (?, ?, ?, ?, ?, ?)",
+                    product_rows(args.productos)
+                )
+            writes, reads = run_profile(database, args.productos, args.segundos, args.lectores)
+            print(f"\n{name}")
+            report_latencies("  venta (commit)", writes, 'ms', 1e3)
+            report_latencies("  página de stock", reads, 'ms', 1e3)
+            database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from services.invoice_service import InvoiceService
 from services.budget_service import BudgetService
+from services.background_worker import BackgroundWorker
+from views.scan_buffer import ScanBuffer
+from models.stock import StockModel, normalize_product_id
 from tkinter import messagebox, simpledialog
 import random
 
@@ -9,6 +12,13 @@ class SalesController:
         self.stock_view = stock_view  # Referencia a la vista de stock
         self.invoice_service = InvoiceService()
         self.budget_service = BudgetService()
+        # Los presupuestos se generan en segundo plano para no frenar la caja, de a
+        # uno: todos usan self.budget_service y las plantillas compartidas, y
+        # ReportLab no es seguro entre hilos (ni se acelera con dos: no suelta el GIL)
+        self.budget_worker = BackgroundWorker(self.view.frame, max_workers=1)
+        # Lecturas del lector de códigos, aplicadas de a un cuadro
+        self.stock_model = StockModel()
+        self.scan_buffer = ScanBuffer(self.view.frame, self._apply_scans)
     
     def set_stock_view(self, stock_view):
         """Establecer referencia a la vista de stock"""
@@ -61,9 +71,8 @@ class SalesController:
             if result['success']:
                 # Éxito
                 success_msg = f"Factura {result['numero_factura']} generada correctamente\n"
-                success_msg += f"CAE: {result['cae']}\n"
-                success_msg += f"Total: ${result['total']:.2f}\n"
-                success_msg += f"PDF: {result['pdf_filename']}"
+                success_msg += "CAE: pendiente, se solicita a AFIP en segundo plano\n"
+                success_msg += f"Total: ${result['total']:.2f}"
                 
                 self.view.show_success(success_msg)
                 
@@ -90,14 +99,10 @@ class SalesController:
                 self.view.show_warning(f"El producto {product_data['name']} no tiene stock disponible.")
                 return False
             
-            # Verificar si el producto ya está en la lista
-            current_products = self.view.get_selected_products()
-            for product in current_products:
-                if product['code'] == product_data['id']:
-                    current_quantity = product['quantity']
-                    if current_quantity + 1 > product_data['quantity']:
-                        self.view.show_warning(f"Stock insuficiente. Solo hay {product_data['quantity']} unidades disponibles.")
-                        return False
+            # Verificar lo que ya está en la venta
+            if self.view.cart.quantity_of(product_data['id']) + 1 > product_data['quantity']:
+                self.view.show_warning(f"Stock insuficiente. Solo hay {product_data['quantity']} unidades disponibles.")
+                return False
             
             # Agregar producto a la vista
             self.view.add_product_to_tree(product_data)
@@ -107,12 +112,60 @@ class SalesController:
             self.view.show_error(f"Error al agregar producto: {str(e)}")
             return False
     
+    def scan_code(self, code):
+        """Código leído por el lector de barras (se aplica en el próximo cuadro)"""
+        self.scan_buffer.push(code)
+
+    def _apply_scans(self, scans):
+        """
+        Agregar a la venta los escaneos acumulados: cada código se busca en la
+        caché del catálogo, cada renglón tocado se dibuja una vez y el total
+        se actualiza una sola vez. Los problemas se informan en la línea de
+        estado, sin cuadros de diálogo, para no cortar la ráfaga del lector.
+        """
+        cart = self.view.cart
+        touched = {}
+        problems = []
+        for code, quantity in scans:
+            # Mismo formato que el formulario de stock: 1 y 0001 son el mismo código
+            try:
+                product_id = normalize_product_id(code)
+            except ValueError:
+                problems.append(f"{code}: código inválido")
+                continue
+            product = self.stock_model.get_product_by_id(product_id)
+            if product is None:
+                problems.append(f"{code}: no existe")
+                continue
+            available = product.quantity - cart.quantity_of(product.id)
+            if available <= 0:
+                problems.append(f"{code}: sin stock")
+                continue
+            if quantity > available:
+                problems.append(f"{code}: solo se agregaron {available}")
+                quantity = available
+            line = cart.add(product._asdict(), quantity)
+            touched[line.product_id] = line
+
+        for line in touched.values():
+            self.view.render_line(line)
+        if touched:
+            self.view.update_total()
+            self.view.sales_tree.see(next(reversed(touched)))
+
+        if problems:
+            self.view.frame.bell()
+            self.view.set_scan_status("; ".join(problems))
+        elif touched:
+            last = next(reversed(touched.values()))
+            self.view.set_scan_status(f"{last.name} x{last.quantity}")
+
     def generate_budget(self):
         """Generar presupuesto con los productos en el tree"""
         try:
-            # Verificar que hay productos en el tree
-            items = self.view.sales_tree.get_children()
-            if not items:
+            # Verificar que hay productos en la venta
+            cart = self.view.cart
+            if not cart:
                 messagebox.showwarning("Advertencia", "No hay productos para generar el presupuesto")
                 return
             
@@ -129,21 +182,15 @@ class SalesController:
             
             extra_data = self._get_client_data_for_budget()
 
-            # Recopilar productos del tree
-            products = []
-            total = 0
-            
-            for item_id in items:
-                values = self.view.sales_tree.item(item_id)['values']
-                product = {
-                    'quantity': int(values[4]),
-                    'description': values[1],  # nombre del producto
-                    'brand': values[2],  # obtener marca por ID
-                    'unit_price': float(values[3]),
-                    'subtotal': float(values[5])
-                }
-                products.append(product)
-                total += product['subtotal']
+            # Productos del carrito (los importes ya están calculados)
+            products = [{
+                'quantity': line.quantity,
+                'description': line.name,
+                'brand': line.brand,
+                'unit_price': float(line.unit_price),
+                'subtotal': float(line.subtotal)
+            } for line in cart]
+            total = float(cart.subtotal)
             
             budget_number = self._generate_budget_number()
 
@@ -160,16 +207,42 @@ class SalesController:
                 'notes': extra_data.get('notes', '')
             }
             
-            # Generar presupuesto
-            pdf_path = self.budget_service.generate_budget(budget_data)
-            
-            messagebox.showinfo("Éxito", f"Presupuesto generado correctamente:\n{pdf_path}")
-            
-            self._open_pdf(pdf_path)
+            # Generar presupuesto en segundo plano; la venta puede seguir mientras tanto
+            self.budget_worker.submit(
+                self.budget_service.generate_budget, budget_data,
+                on_done=self._on_budget_done,
+                on_error=self._on_budget_error,
+                on_progress=self._on_budget_progress,
+            )
+            self._update_budget_status()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al generar presupuesto: {str(e)}")
 
+    def _update_budget_status(self, text=None):
+        """Mostrar cuántos presupuestos se están generando"""
+        pending = self.budget_worker.pending()
+        if text is None:
+            text = f"Generando {pending} presupuesto(s)..." if pending else ""
+        self.view.set_budget_status(text)
+
+    def _on_budget_progress(self, job_id, done, total):
+        """Avance de un presupuesto en generación"""
+        self._update_budget_status(f"Generando presupuesto... {done * 100 // total}%")
+
+    def _on_budget_done(self, job_id, pdf_path):
+        """Presupuesto terminado: avisar sin interrumpir la venta y abrirlo"""
+        if self.budget_worker.pending():
+            self._update_budget_status()
+        else:
+            self._update_budget_status(f"Presupuesto generado: {pdf_path}")
+        self._open_pdf(pdf_path)
+
+    def _on_budget_error(self, job_id, error):
+        """Error al generar un presupuesto en segundo plano"""
+        self._update_budget_status()
+        messagebox.showerror("Error", f"Error al generar presupuesto: {str(error)}")
+
     def _get_client_data_for_budget(self):
         """Solicitar datos del cliente para el presupuesto"""
         try:
@@ -216,7 +289,7 @@ class SalesController:
             if self.stock_view and hasattr(self.stock_view, 'stock_model'):
                 product = self.stock_view.stock_model.get_product_by_id(product_id)
                 if product:
-                    return product.get('brand', 'N/A')
+                    return product.brand
             
             # Si no tienes acceso, retornar valor por defecto
             return 'N/A'
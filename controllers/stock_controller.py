@@ -1,4 +1,8 @@
-from models.stock import StockModel
+import os
+
+from models.stock import StockModel, normalize_product_id
+from services.catalog_import import CatalogImporter
+from services.background_worker import BackgroundWorker
 from tkinter import messagebox
 
 class StockController:
@@ -7,6 +11,8 @@ class StockController:
         self.sales_view = sales_view  # Referencia a la vista de ventas
         self.stock_model = StockModel()
         self.stock_view = stock_view
+        # Las importaciones de listas corren en segundo plano, igual que los presupuestos
+        self.import_worker = BackgroundWorker(self.view.frame, max_workers=1, max_queued=1, poll_ms=100)
     
     def set_sales_view(self, sales_view):
         """Establecer referencia a la vista de ventas"""
@@ -22,13 +28,16 @@ class StockController:
             if not self._validate_form_data(form_data):
                 return
             
-            if not self._validate_product_id(form_data['id']):
+            # Mismo formato que la importación de listas: 1 y 0001 son el mismo código
+            try:
+                product_id = normalize_product_id(form_data['id'])
+            except ValueError:
                 self.view.show_warning("Código del producto inválido. Debe tener 4 dígitos.")
                 return
             
             # Convertir tipos
             product_data = {
-                'id': form_data['id'],
+                'id': product_id,
                 'name': form_data['name'],
                 'brand': form_data['brand'],
                 'price': float(form_data['price']),
@@ -47,10 +56,8 @@ class StockController:
 
             self.stock_model.add_product(product_data)
             
-            # Refrescar tabla
-            self.refresh_stock_table()
-            
-            # Limpiar formulario
+            # Limpiar formulario: vuelve al catálogo releyendo solo la ventana visible,
+            # que ya incluye el producto nuevo
             self.view.clear_form()
             
             self.view.show_success("Producto registrado correctamente")
@@ -91,12 +98,10 @@ class StockController:
             }
             
             # Actualizar en base de datos
-            self.stock_model.update_product(form_data['id'], product_data)
-            
-            # Refrescar tabla
-            self.refresh_stock_table()
+            self.stock_model.update_product(selected_product['id'], product_data)
             
-            # Limpiar formulario
+            # Limpiar formulario: vuelve al catálogo releyendo solo la ventana visible,
+            # que ya refleja el cambio
             self.view.clear_form()
             
             self.view.show_success("Producto actualizado correctamente")
@@ -143,8 +148,8 @@ class StockController:
             # Eliminar de base de datos
             self.stock_model.delete_product(selected_product['id'])
             
-            # Refrescar tabla
-            self.refresh_stock_table()
+            # Refrescar solo lo que cambió
+            self.view.refresh_products([selected_product['id']])
             
             self.view.show_success("Producto eliminado correctamente")
             
@@ -200,9 +205,8 @@ class StockController:
 
                 messagebox.showinfo("", f"Se han agregado {quantity_to_add} unidades del articulo {product_data['name']}")
                 
+                # Agregar a la venta no modifica el stock: no hace falta refrescar la tabla
                 self.view.qnt_to_add.set("1")
-                products = self.stock_model.get_all_products()
-                self.view.refresh_stock_table(products)
             else:
                 # Manejar caso donde no hay producto seleccionado
                 messagebox.showwarning("Advertencia", "Por favor seleccione un producto")
@@ -212,11 +216,73 @@ class StockController:
         except Exception as e:
             messagebox.showerror("Error", f"Error al agregar producto: {str(e)}")
     
+    def import_catalog(self):
+        """Importar una lista de productos (CSV o XLSX) sin bloquear la pantalla"""
+        if self.import_worker.pending():
+            self.view.show_warning("Ya hay una importación en curso")
+            return
+
+        path = self.view.ask_import_file()
+        if not path:
+            return
+
+        # El precio de costo de la lista se toma sin IVA, como en el formulario
+        iva = {"21%": 21, "10.5%": 10.5}.get(self.view.iva_var.get())
+        detail = f" Se sumará IVA {iva}% al precio." if iva else ""
+        if not self.view.ask_confirmation(
+            f"¿Importar {os.path.basename(path)}? Los productos existentes se actualizarán.{detail}"
+        ):
+            return
+
+        try:
+            self.import_worker.submit(
+                self._run_import, path, iva,
+                on_done=self._on_import_done,
+                on_error=self._on_import_error,
+                on_progress=self._on_import_progress,
+            )
+            self.view.set_import_status("Importando...", running=True)
+        except Exception as e:
+            self.view.show_error(f"Error al importar: {str(e)}")
+
+    def _run_import(self, path, iva, progress):
+        """Importación en el hilo de trabajo (BackgroundWorker devuelve su conexión al terminar)"""
+        return CatalogImporter(iva=iva).import_file(path, progress=lambda read: progress(read, None))
+
+    def _on_import_progress(self, job_id, read, total):
+        self.view.set_import_status(f"Importando... {read} filas leídas", running=True)
+
+    def _on_import_done(self, job_id, summary):
+        """Importación terminada: recargar la tabla e informar el resultado"""
+        self.view.set_import_status(
+            f"Última importación: {summary['inserted']} nuevos, {summary['updated']} actualizados, "
+            f"{summary['rejected']} rechazados ({summary['elapsed']:.1f}s)"
+        )
+        self.view.show_catalog()
+
+        message = (
+            f"{summary['inserted']} productos nuevos, {summary['updated']} actualizados, "
+            f"{summary['unchanged']} sin cambios y {summary['rejected']} filas rechazadas."
+        )
+        if summary['repeated']:
+            message += f"\n{summary['repeated']} filas tenían un código repetido más abajo (vale la última)."
+        if summary['errors']:
+            shown = summary['errors'][:10]
+            message += "\n\n" + "\n".join(f"Fila {line}: {reason}" for line, reason in shown)
+            if summary['rejected'] > len(shown):
+                message += f"\n... y {summary['rejected'] - len(shown)} más"
+            self.view.show_warning(message)
+        else:
+            self.view.show_success(message)
+
+    def _on_import_error(self, job_id, error):
+        self.view.set_import_status("")
+        self.view.show_error(f"Error al importar: {str(error)}")
+
     def refresh_stock_table(self):
         """Refrescar tabla de stock"""
         try:
-            products = self.stock_model.get_all_products()
-            self.view.refresh_stock_table(products)
+            self.view.show_catalog()
         except Exception as e:
             self.view.show_error(f"Error al refrescar tabla: {str(e)}")
     
@@ -238,12 +304,4 @@ class StockController:
             self.view.show_warning("Los precios y cantidad deben ser números válidos")
             return False
         
-        return True
-    
-    def _validate_product_id(self, product_id):
-        """Validar formato del ID del producto"""
-        if len(product_id) != 4:
-            return False
-        
-        # Verificar que todos sean dígitos
-        return product_id.isdigit()
\ No newline at end of file
+        return True
\ No newline at end of file
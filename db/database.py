@@ -1,15 +1,61 @@
 import sqlite3
+import atexit
 import os
 import sys
+import threading
+from contextlib import contextmanager
+
+from db.pool import ConnectionPool
+from db.migrations import apply_migrations
+
+# Perfiles de almacenamiento que se aplican a cada conexión nueva.
+# WAL permite que la pestaña de stock lea mientras se confirma una factura.
+STORAGE_PROFILES = {
+    # Más rápido: ante un corte de luz se puede perder la última transacción
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,       # KiB (negativo) => ~64 MB
+        'mmap_size': 268435456,     # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,       # ms
+    },
+    # Cada commit llega a disco antes de devolver el control
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 10000,
+    },
+}
+
+DEFAULT_STORAGE_PROFILE = os.environ.get('STOCK_DB_PROFILE', 'durable')
+
+# Otra base en lugar de db/stock.db (pruebas y benchmarks)
+DEFAULT_DB_PATH = os.environ.get('STOCK_DB_PATH')
+
+# Hilos que usan la base a la vez: Tk, cola de CAE, búsqueda en vivo,
+# generación de PDFs e importación de catálogo. Los hilos de trabajo
+# devuelven su conexión al terminar cada tarea; el margen cubre picos.
+MAX_CONNECTIONS = 8
 
 class Database:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, max_connections=MAX_CONNECTIONS, timeout=10.0, profile=None):
+        if db_path is None:
+            db_path = DEFAULT_DB_PATH
         if db_path is None:
             base_dir = self.get_writable_data_dir()
             db_path = os.path.join(base_dir, 'stock.db')
 
         self.db_path = db_path
+        self.storage_profile = self.resolve_storage_profile(profile)
         self.ensure_db_exists()
+        self.pool = ConnectionPool(db_path, max_connections=max_connections, timeout=timeout,
+                                   on_connect=self.configure_connection)
+        self._local = threading.local()
+        atexit.register(self.close)
         self.create_tables()
 
     def get_writable_data_dir(self):
@@ -26,9 +72,44 @@ class Database:
         """Asegurar que el directorio de la base de datos existe"""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
     
+    def resolve_storage_profile(self, profile):
+        """
+        Obtener los pragmas a aplicar a partir de un nombre de perfil
+        ('throughput', 'durable') o de un dict con valores propios,
+        que se combinan sobre el perfil por defecto.
+        """
+        if profile is None:
+            profile = DEFAULT_STORAGE_PROFILE
+        if isinstance(profile, str):
+            if profile not in STORAGE_PROFILES:
+                raise ValueError(f"Perfil de almacenamiento desconocido: {profile}")
+            return dict(STORAGE_PROFILES[profile])
+        settings = dict(STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE])
+        settings.update(profile)
+        return settings
+
+    def configure_connection(self, conn):
+        """Aplicar el perfil de almacenamiento a una conexión recién abierta"""
+        settings = self.storage_profile
+        # busy_timeout primero: cambiar a WAL necesita un lock exclusivo breve
+        conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+        conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+
     def get_connection(self):
-        """Obtener conexión a la base de datos"""
-        return sqlite3.connect(self.db_path)
+        """Obtener la conexión del pool asignada al hilo actual"""
+        return self.pool.get_connection()
+
+    def release_connection(self):
+        """Devolver al pool la conexión del hilo actual"""
+        self.pool.release()
+
+    def close(self):
+        """Cerrar todas las conexiones abiertas"""
+        self.pool.close_all()
     
     def create_tables(self):
         """Crear todas las tablas necesarias"""
@@ -84,9 +165,64 @@ class Database:
             ''')
             
             conn.commit()
+
+            # Índices y cambios posteriores del esquema
+            apply_migrations(conn)
     
+    @contextmanager
+    def transaction(self):
+        """
+        Unidad de trabajo: todas las consultas del hilo dentro del bloque se
+        confirman juntas al salir o se deshacen si ocurre una excepción.
+        Los bloques anidados se suman a la transacción exterior.
+        """
+        conn = self.get_connection()
+        if self.in_transaction():
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        # IMMEDIATE toma el lock de escritura al inicio y evita deadlocks entre cajas
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        self._local.on_commit = []
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.depth = 0
+            callbacks, self._local.on_commit = self._local.on_commit, []
+
+        # Solo si se confirmó: ante un rollback la excepción ya salió arriba
+        for callback in callbacks:
+            callback()
+
+    def in_transaction(self):
+        """Indica si el hilo actual está dentro de db.transaction()"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    def after_commit(self, callback):
+        """
+        Ejecutar callback() cuando se confirme la transacción en curso del
+        hilo (se descarta si se deshace), o enseguida si no hay ninguna.
+        """
+        if self.in_transaction():
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+
     def execute_query(self, query, params=None):
         """Ejecutar una consulta que no devuelve resultados"""
+        if self.in_transaction():
+            cursor = self.get_connection().execute(query, params or ())
+            return cursor.lastrowid
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
             if params:
@@ -95,26 +231,36 @@ class Database:
                 cursor.execute(query)
             conn.commit()
             return cursor.lastrowid
+
+    def execute_many(self, query, params_seq):
+        """Ejecutar una consulta para cada juego de parámetros en un solo lote"""
+        if self.in_transaction():
+            return self.get_connection().executemany(query, params_seq).rowcount
+
+        with self.get_connection() as conn:
+            cursor = conn.executemany(query, params_seq)
+            conn.commit()
+            return cursor.rowcount
     
-    def fetch_all(self, query, params=None):
+    def fetch_all(self, query, params=None, row_factory=None):
         """Ejecutar una consulta que devuelve múltiples resultados"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchall()
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = row_factory
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        return cursor.fetchall()
     
-    def fetch_one(self, query, params=None):
+    def fetch_one(self, query, params=None, row_factory=None):
         """Ejecutar una consulta que devuelve un resultado"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchone()
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = row_factory
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        return cursor.fetchone()
 
 # Instancia global de la base de datos
 db = Database()
\ No newline at end of file
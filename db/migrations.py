@@ -0,0 +1,310 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración es (versión, descripción, pasos). Un paso puede ser una sentencia
+SQL o una función que recibe la conexión. Las bases existentes aplican solo las
+versiones que les faltan, en orden y cada una en su propia transacción, y la
+versión aplicada queda registrada en la tabla schema_version.
+"""
+
+import sqlite3
+
+
+def _create_stock_search_index(conn):
+    """Índice FTS5 sobre código, nombre y marca, sin distinguir acentos ni mayúsculas"""
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS stock_fts USING fts5(
+                id, name, brand,
+                content='stock', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='1 2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite compilado sin FTS5: StockModel.search_products sigue usando LIKE
+        return
+
+    # Los triggers mantienen el índice sincronizado; los cambios de precio o
+    # cantidad no tocan columnas indexadas y no disparan nada
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS stock_fts_ai AFTER INSERT ON stock BEGIN
+            INSERT INTO stock_fts (rowid, id, name, brand)
+            VALUES (new.rowid, new.id, new.name, new.brand);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS stock_fts_ad AFTER DELETE ON stock BEGIN
+            INSERT INTO stock_fts (stock_fts, rowid, id, name, brand)
+            VALUES ('delete', old.rowid, old.id, old.name, old.brand);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS stock_fts_au AFTER UPDATE OF id, name, brand ON stock BEGIN
+            INSERT INTO stock_fts (stock_fts, rowid, id, name, brand)
+            VALUES ('delete', old.rowid, old.id, old.name, old.brand);
+            INSERT INTO stock_fts (rowid, id, name, brand)
+            VALUES (new.rowid, new.id, new.name, new.brand);
+        END
+    """)
+    conn.execute("INSERT INTO stock_fts (stock_fts) VALUES ('rebuild')")
+
+
+# Resumen de facturas por día, punto de venta y estado, tal como lo guarda
+# ventas_diarias. Los importes se acumulan en centavos enteros para que sumar y
+# restar no arrastre error de redondeo. Las facturas viejas sin estado (la
+# columna lo admite) no cuentan en ningún resumen, así que no se guardan.
+SALES_ROLLUP_SELECT = """
+    SELECT fecha_emision, CAST(SUBSTR(numero_factura, 1, 4) AS INTEGER), estado,
+           COUNT(*), SUM(CAST(ROUND(total * 100) AS INTEGER))
+    FROM facturas
+    WHERE estado IS NOT NULL
+    GROUP BY fecha_emision, CAST(SUBSTR(numero_factura, 1, 4) AS INTEGER), estado
+"""
+SALES_ROLLUP_TRIGGERS = ('ventas_diarias_ai', 'ventas_diarias_ad', 'ventas_diarias_au')
+
+
+def _create_sales_rollups(conn):
+    """Tabla ventas_diarias, cargada con las facturas existentes y mantenida por triggers"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            estado TEXT NOT NULL,
+            fecha TEXT NOT NULL,
+            punto_venta INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            total_centavos INTEGER NOT NULL,
+            PRIMARY KEY (estado, fecha, punto_venta)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM ventas_diarias")
+    conn.execute(f"""
+        INSERT INTO ventas_diarias (fecha, punto_venta, estado, cantidad, total_centavos)
+        {SALES_ROLLUP_SELECT}
+    """)
+
+    # Sumar una factura a su día y restarla (si cambia de estado, fecha o
+    # importe, se resta la versión vieja y se suma la nueva). Una factura sin
+    # estado no se suma, y al restarla no coincide con ninguna fila
+    add = """
+        INSERT INTO ventas_diarias (estado, fecha, punto_venta, cantidad, total_centavos)
+        SELECT new.estado, new.fecha_emision, CAST(SUBSTR(new.numero_factura, 1, 4) AS INTEGER),
+               1, CAST(ROUND(new.total * 100) AS INTEGER)
+        WHERE new.estado IS NOT NULL
+        ON CONFLICT (estado, fecha, punto_venta) DO UPDATE SET
+            cantidad = cantidad + 1,
+            total_centavos = total_centavos + excluded.total_centavos;
+    """
+    subtract = """
+        UPDATE ventas_diarias
+        SET cantidad = cantidad - 1,
+            total_centavos = total_centavos - CAST(ROUND(old.total * 100) AS INTEGER)
+        WHERE estado = old.estado AND fecha = old.fecha_emision
+          AND punto_venta = CAST(SUBSTR(old.numero_factura, 1, 4) AS INTEGER);
+        DELETE FROM ventas_diarias
+        WHERE estado = old.estado AND fecha = old.fecha_emision
+          AND punto_venta = CAST(SUBSTR(old.numero_factura, 1, 4) AS INTEGER)
+          AND cantidad = 0;
+    """
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS ventas_diarias_ai AFTER INSERT ON facturas BEGIN {add} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS ventas_diarias_ad AFTER DELETE ON facturas BEGIN {subtract} END")
+    # Los cambios de CAE, reintentos o datos del cliente no tocan estas columnas y no disparan nada
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ventas_diarias_au
+        AFTER UPDATE OF estado, fecha_emision, numero_factura, total ON facturas
+        BEGIN {subtract} {add} END
+    """)
+
+
+def _recreate_sales_rollups(conn):
+    """Rehacer los triggers de ventas_diarias (ahora ignoran facturas sin estado) y recalcularla"""
+    for trigger in SALES_ROLLUP_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    _create_sales_rollups(conn)
+
+
+STOCK_INDEXES = ("name", "brand", "price", "price2", "quantity")
+
+
+def _rebuild_stock_with_stable_rowid(conn):
+    """
+    Reconstruir stock con una columna INTEGER PRIMARY KEY (`seq`).
+
+    El índice de búsqueda y el orden precalculado de StockModel se apoyan en
+    el rowid; sin una columna que lo fije, VACUUM o una copia de la base
+    pueden renumerarlo y dejar stock_fts apuntando a otros productos. Los
+    rowid actuales se conservan, así el índice sigue siendo válido.
+    """
+    conn.execute("""
+        CREATE TABLE stock_nueva (
+            seq INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            price REAL NOT NULL,
+            price2 REAL NOT NULL,
+            quantity INTEGER NOT NULL,
+            created_at TEXT DEFAULT CURRENT_DATE
+        )
+    """)
+    conn.execute("""
+        INSERT INTO stock_nueva (seq, id, name, brand, price, price2, quantity, created_at)
+        SELECT rowid, id, name, brand, price, price2, quantity, created_at FROM stock
+    """)
+    # DROP TABLE se lleva también sus índices y triggers
+    conn.execute("DROP TABLE stock")
+    conn.execute("ALTER TABLE stock_nueva RENAME TO stock")
+    for column in STOCK_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_stock_{column} ON stock({column}, id)")
+    _create_stock_search_index(conn)
+
+
+def _create_stock_version(conn):
+    """
+    Contador de cambios del stock, sumado por triggers en cada alta, baja o
+    modificación. Las cachés del catálogo lo comparan para enterarse de los
+    cambios hechos por otras cajas sin vaciarse por escrituras en otras
+    tablas (facturas, CAE, resúmenes), como pasaba con PRAGMA data_version.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO stock_version (id, version) VALUES (1, 0)")
+    for name, event in (('ai', 'INSERT'), ('ad', 'DELETE'), ('au', 'UPDATE')):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stock_version_{name} AFTER {event} ON stock BEGIN
+                UPDATE stock_version SET version = version + 1;
+            END
+        """)
+
+
+MIGRATIONS = [
+    (1, "Índices de facturas, items y stock", [
+        # SalesModel.get_invoice_items
+        "CREATE INDEX IF NOT EXISTS idx_factura_items_factura ON factura_items(factura_id)",
+        # get_invoices_by_date_range / get_all_invoices (el rowid desempata por id)
+        "CREATE INDEX IF NOT EXISTS idx_facturas_fecha ON facturas(fecha_emision)",
+        # get_sales_summary: cubre el filtro por estado y fecha y la suma de total
+        "CREATE INDEX IF NOT EXISTS idx_facturas_estado_fecha ON facturas(estado, fecha_emision, total)",
+        # StockModel.get_all_products ordena por nombre
+        "CREATE INDEX IF NOT EXISTS idx_stock_name ON stock(name, id)",
+    ]),
+    (2, "Secuencias de numeración por punto de venta y tipo de comprobante", [
+        """
+        CREATE TABLE IF NOT EXISTS secuencias_comprobante (
+            punto_venta INTEGER NOT NULL,
+            tipo_comprobante INTEGER NOT NULL,
+            ultimo_numero INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (punto_venta, tipo_comprobante)
+        )
+        """,
+        # Las facturas emitidas hasta ahora son todas tipo 6 (Factura B)
+        """
+        INSERT OR IGNORE INTO secuencias_comprobante (punto_venta, tipo_comprobante, ultimo_numero)
+        SELECT CAST(SUBSTR(numero_factura, 1, 4) AS INTEGER), 6,
+               MAX(CAST(SUBSTR(numero_factura, -8) AS INTEGER))
+        FROM facturas
+        GROUP BY CAST(SUBSTR(numero_factura, 1, 4) AS INTEGER)
+        """,
+        # Detección de huecos en la numeración
+        "CREATE INDEX IF NOT EXISTS idx_facturas_numero ON facturas(numero_factura)",
+    ]),
+    (3, "Búsqueda de texto completo de productos", [
+        _create_stock_search_index,
+    ]),
+    (4, "Índices para ordenar el stock por columna", [
+        # El código desempata para que el orden (y la paginación) sea estable
+        "CREATE INDEX IF NOT EXISTS idx_stock_brand ON stock(brand, id)",
+        "CREATE INDEX IF NOT EXISTS idx_stock_price ON stock(price, id)",
+        "CREATE INDEX IF NOT EXISTS idx_stock_price2 ON stock(price2, id)",
+        "CREATE INDEX IF NOT EXISTS idx_stock_quantity ON stock(quantity, id)",
+    ]),
+    (5, "Cola de solicitudes de CAE pendientes", [
+        # Datos enviados a AFIP, para poder reintentar sin reconstruirlos
+        "ALTER TABLE facturas ADD COLUMN afip_datos TEXT",
+        "ALTER TABLE facturas ADD COLUMN cae_intentos INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE facturas ADD COLUMN cae_proximo_intento TEXT",
+        "ALTER TABLE facturas ADD COLUMN cae_error TEXT",
+        # SalesModel.get_pending_cae_invoices: solo indexa las pendientes
+        """
+        CREATE INDEX IF NOT EXISTS idx_facturas_cae_pendiente
+        ON facturas(cae_proximo_intento, id) WHERE estado = 'pendiente'
+        """,
+    ]),
+    (6, "Resúmenes diarios de ventas", [
+        _create_sales_rollups,
+    ]),
+    (7, "Marca en los items de factura", [
+        # Los items anteriores no guardaban la marca: se toma la actual del producto
+        """
+        UPDATE factura_items
+        SET producto_marca = (SELECT brand FROM stock WHERE stock.id = factura_items.producto_id)
+        WHERE producto_marca IS NULL
+        """,
+    ]),
+    (8, "Rowid estable para el stock", [
+        _rebuild_stock_with_stable_rowid,
+    ]),
+    (9, "Versión de los datos del stock", [
+        _create_stock_version,
+    ]),
+    (10, "Resúmenes diarios sin las facturas sin estado", [
+        _recreate_sales_rollups,
+    ]),
+]
+
+
+def get_schema_version(conn):
+    """Obtener la última versión de esquema aplicada"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, migrations=None):
+    """Aplicar en orden las migraciones pendientes. Devuelve las versiones aplicadas"""
+    if migrations is None:
+        migrations = MIGRATIONS
+
+    applied = []
+    current = get_schema_version(conn)
+    conn.commit()
+
+    for version, description, steps in sorted(migrations, key=lambda m: m[0]):
+        if version <= current:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Otra caja pudo aplicarla mientras esperábamos el lock
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        current = version
+
+    return applied
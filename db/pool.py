@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones SQLite reutilizables.
+
+    Cada hilo recibe su propia conexión y la conserva mientras viva, de modo que
+    las consultas consecutivas de un mismo hilo no vuelven a abrir el archivo.
+    Cuando el pool está lleno se recuperan las conexiones de hilos terminados;
+    si no hay ninguna libre se espera hasta `timeout` segundos.
+    """
+
+    def __init__(self, db_path, max_connections=5, timeout=10.0,
+                 health_check_interval=30.0, on_connect=None):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect
+
+        self._local = threading.local()
+        self._lock = threading.Condition()
+        self._connections = {}  # id(conexión) -> [conexión, hilo dueño, último uso]
+        self._idle = []
+        self._closed = False
+
+    def _create_connection(self):
+        """Abrir una conexión nueva con la configuración del pool"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    def _is_healthy(self, conn):
+        """Verificar que la conexión sigue siendo usable"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """Cerrar una conexión y quitarla del registro"""
+        self._connections.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _reclaim_dead_threads(self):
+        """Devolver al pool las conexiones de hilos que ya terminaron"""
+        for conn, owner, _ in list(self._connections.values()):
+            if owner is not None and not owner.is_alive():
+                if conn.in_transaction:
+                    conn.rollback()
+                self._connections[id(conn)][1] = None
+                self._idle.append(conn)
+
+    def _acquire(self):
+        """Obtener una conexión libre o crear una nueva respetando el límite"""
+        deadline = time.monotonic() + self.timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+
+                if not self._idle and len(self._connections) >= self.max_connections:
+                    self._reclaim_dead_threads()
+
+                while self._idle:
+                    conn = self._idle.pop()
+                    if self._is_healthy(conn):
+                        self._connections[id(conn)][1] = threading.current_thread()
+                        return conn
+                    self._discard(conn)
+
+                if len(self._connections) < self.max_connections:
+                    conn = self._create_connection()
+                    self._connections[id(conn)] = [conn, threading.current_thread(), time.monotonic()]
+                    return conn
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No hay conexiones disponibles (máximo {self.max_connections})"
+                    )
+                # Reintentar periódicamente: un hilo que termina no avisa al pool
+                self._lock.wait(min(remaining, 0.05))
+
+    def get_connection(self):
+        """Obtener la conexión asignada al hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            entry = self._connections.get(id(conn))
+            if entry is not None and entry[0] is conn:
+                now = time.monotonic()
+                if now - entry[2] < self.health_check_interval or self._is_healthy(conn):
+                    entry[2] = now
+                    return conn
+                with self._lock:
+                    self._discard(conn)
+                    self._lock.notify()
+
+        conn = self._acquire()
+        self._local.conn = conn
+        return conn
+
+    def release(self):
+        """Liberar la conexión del hilo actual para que la use otro hilo"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            entry = self._connections.get(id(conn))
+            if entry is None or entry[0] is not conn:
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            entry[1] = None
+            self._idle.append(conn)
+            self._lock.notify()
+
+    def close_all(self):
+        """Cerrar todas las conexiones del pool"""
+        with self._lock:
+            self._closed = True
+            for conn, _, _ in list(self._connections.values()):
+                self._discard(conn)
+            self._idle.clear()
+            self._lock.notify_all()
+
+    def stats(self):
+        """Obtener cantidad de conexiones abiertas y libres"""
+        with self._lock:
+            return {
+                'open': len(self._connections),
+                'idle': len(self._idle),
+                'max': self.max_connections,
+            }
@@ -1,7 +1,12 @@
-import sqlite3
+import os
+import sys
 
-# Ruta a tu base de datos
-DB_PATH = "stock.db"
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.catalog_import import CatalogImporter
+
+COLUMNAS = ("id", "name", "brand", "price", "price2", "quantity")
 
 productos = [
     ("1001", "LÁMPARA LED 9W E27", "PHILIPS", 400.0, 650.0, 150),
@@ -22,18 +27,9 @@ productos = [
 ]
 
 def seed():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    for prod in productos:
-        cursor.execute("""
-            INSERT INTO stock (id, name, brand, price, price2, quantity)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, prod)
-
-    conn.commit()
-    conn.close()
-    print("✔ Productos insertados correctamente.")
+    # Misma base y mismo camino que la importación de listas (se puede correr más de una vez)
+    summary = CatalogImporter().import_rows([COLUMNAS] + productos)
+    print(f"✔ {summary['inserted']} productos insertados, {summary['updated']} actualizados.")
 
 if __name__ == "__main__":
     seed()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Generación de presupuestos por lotes (por ejemplo después de un cambio de precios).
+
+Lee un archivo JSON Lines con un presupuesto por línea, con la misma
+estructura que usa BudgetService.generate_budget, y los genera en paralelo.
+
+    python generar_presupuestos.py presupuestos.jsonl --output-dir salida/
+    cat presupuestos.jsonl | python generar_presupuestos.py - --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.budget_service import BudgetService
+
+
+def read_budgets(stream, invalid):
+    """Leer presupuestos de a uno; las líneas que no son JSON se informan y se agregan a `invalid`"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            print(f"❌ línea {line_number}: JSON inválido ({e})")
+            invalid.append(line_number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar presupuestos PDF por lotes")
+    parser.add_argument('input', help="archivo JSON Lines con un presupuesto por línea ('-' para stdin)")
+    parser.add_argument('--output-dir', default='presupuestos', help="carpeta de salida (por defecto: presupuestos)")
+    parser.add_argument('--workers', type=int, default=None, help="procesos a usar (por defecto: uno por núcleo)")
+    args = parser.parse_args()
+
+    def report(result):
+        if result['error']:
+            print(f"❌ #{result['index'] + 1} {result['budget_number']}: {result['error']}")
+        else:
+            print(f"✅ #{result['index'] + 1} {result['budget_number']}: {result['path']} ({result['seconds']:.2f}s)")
+
+    invalid = []
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    try:
+        summary = BudgetService(args.output_dir).generate_budgets(
+            read_budgets(stream, invalid), workers=args.workers, on_result=report
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    failed = summary['failed'] + len(invalid)
+    print(
+        f"\n{summary['generated']} generados, {failed} con error "
+        f"en {summary['elapsed']:.2f}s ({summary['per_second']:.1f} presupuestos/s)"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
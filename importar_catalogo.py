@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Importación masiva del catálogo desde una lista de proveedor (CSV o XLSX).
+
+La primera fila debe tener los encabezados: código, descripción y los dos
+precios son obligatorios; marca y stock, opcionales. Los productos nuevos se
+agregan y los existentes se actualizan:
+
+    python importar_catalogo.py lista.csv
+    python importar_catalogo.py lista.xlsx --hoja Precios --iva 21
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.catalog_import import CatalogImporter, CatalogImportError
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar productos al stock desde CSV o XLSX")
+    parser.add_argument('archivo', help="lista de productos (.csv o .xlsx)")
+    parser.add_argument('--hoja', default=None, help="hoja de la planilla (por defecto: la activa)")
+    parser.add_argument('--iva', type=float, default=None,
+                        help="porcentaje de IVA a sumar al precio de costo (por ejemplo 21 o 10.5)")
+    parser.add_argument('--lote', type=int, default=5000, help="filas por lote (por defecto: 5000)")
+    args = parser.parse_args()
+
+    def progress(read):
+        print(f"\r{read} filas leídas...", end='', flush=True)
+
+    try:
+        summary = CatalogImporter(batch_size=args.lote, iva=args.iva).import_file(
+            args.archivo, sheet=args.hoja, progress=progress
+        )
+    except CatalogImportError as e:
+        print(f"\n❌ {e}")
+        return 2
+    print()
+
+    for line_number, reason in summary['errors']:
+        print(f"❌ fila {line_number}: {reason}")
+    if summary['rejected'] > len(summary['errors']):
+        print(f"... y {summary['rejected'] - len(summary['errors'])} filas rechazadas más")
+
+    print(
+        f"\n✅ {summary['inserted']} nuevos, {summary['updated']} actualizados, "
+        f"{summary['unchanged']} sin cambios, {summary['rejected']} rechazados "
+        f"en {summary['elapsed']:.2f}s ({summary['per_second']:.0f} filas/s)"
+    )
+    if summary['repeated']:
+        print(f"⚠️ {summary['repeated']} filas con un código repetido más abajo en el archivo (vale la última)")
+    return 1 if summary['rejected'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from views.main_window import MainWindow
 from db.database import db
+from services.cae_worker import cae_worker
 
 def main():
     """Función principal de la aplicación"""
@@ -21,6 +22,9 @@ def main():
         db.create_tables()
         print("✅ Base de datos inicializada")
         
+        # Cola de CAE: retoma las facturas que quedaron pendientes
+        cae_worker.start()
+        
         # Crear y ejecutar aplicación
         print("Iniciando aplicación...")
         app = MainWindow()
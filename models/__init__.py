@@ -1,6 +1,10 @@
 # models/__init__.py
 
-from .stock import StockModel  
+from .stock import StockModel, InsufficientStockError
 from .sales import SalesModel
+from .catalog_cache import catalog_cache
+from .cart import Cart, CartLine
+from .records import Product, Invoice, InvoiceSummary, InvoiceItem, PendingInvoice
 
-__all__ = ['StockModel', 'SalesModel']
\ No newline at end of file
+__all__ = ['StockModel', 'SalesModel', 'InsufficientStockError', 'catalog_cache', 'Cart', 'CartLine',
+           'Product', 'Invoice', 'InvoiceSummary', 'InvoiceItem', 'PendingInvoice']
\ No newline at end of file
@@ -0,0 +1,106 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTS = Decimal('0.01')
+IVA_RATE = Decimal('0.21')
+
+# Renglón del carrito: importes en Decimal redondeados al centavo
+CartLine = namedtuple('CartLine', ['product_id', 'name', 'brand', 'unit_price', 'quantity', 'subtotal'])
+
+
+def to_money(value):
+    """Convertir un importe (float, str, int o Decimal) a Decimal con dos decimales"""
+    if not isinstance(value, Decimal):
+        # Pasar por str evita arrastrar el error binario del float (0.1 -> 0.1000000000000000055...)
+        value = Decimal(str(value))
+    return value.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+class Cart:
+    """
+    Venta en curso, indexada por id de producto.
+
+    Los renglones están en un dict (mantiene el orden en que se agregaron),
+    así que agregar, cambiar o quitar un producto no recorre el resto del
+    carrito, y el subtotal se lleva acumulado en aritmética decimal exacta.
+    La vista solo dibuja lo que hay acá.
+    """
+
+    def __init__(self, iva_rate=IVA_RATE):
+        self.iva_rate = Decimal(iva_rate)
+        self._lines = {}
+        self._subtotal = Decimal('0.00')
+
+    def add(self, product, quantity=1):
+        """
+        Agregar unidades de un producto (dict con id, name, brand y price2).
+        Si ya estaba se suma la cantidad. Devuelve el renglón resultante.
+        """
+        if quantity <= 0:
+            raise ValueError("La cantidad debe ser mayor a 0")
+        key = str(product['id'])
+        line = self._lines.get(key)
+        if line is None:
+            unit_price = to_money(product['price2'])
+            line = CartLine(key, product['name'], product['brand'], unit_price, 0, Decimal('0.00'))
+        return self._store(line, line.quantity + quantity)
+
+    def set_quantity(self, product_id, quantity):
+        """Cambiar la cantidad de un renglón (0 lo quita)"""
+        key = str(product_id)
+        if quantity <= 0:
+            return self.remove(key)
+        return self._store(self._lines[key], quantity)
+
+    def remove(self, product_id):
+        """Quitar un renglón; devuelve el renglón quitado o None si no estaba"""
+        line = self._lines.pop(str(product_id), None)
+        if line is not None:
+            self._subtotal -= line.subtotal
+        return line
+
+    def clear(self):
+        self._lines.clear()
+        self._subtotal = Decimal('0.00')
+
+    def _store(self, line, quantity):
+        subtotal = line.unit_price * quantity
+        self._subtotal += subtotal - line.subtotal
+        line = line._replace(quantity=quantity, subtotal=subtotal)
+        self._lines[line.product_id] = line
+        return line
+
+    def get(self, product_id):
+        return self._lines.get(str(product_id))
+
+    def quantity_of(self, product_id):
+        """Unidades de un producto que ya están en el carrito"""
+        line = self._lines.get(str(product_id))
+        return line.quantity if line else 0
+
+    def lines(self):
+        """Renglones en el orden en que se agregaron"""
+        return list(self._lines.values())
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines.values())
+
+    def __contains__(self, product_id):
+        return str(product_id) in self._lines
+
+    @property
+    def subtotal(self):
+        """Suma de los renglones"""
+        return self._subtotal
+
+    @property
+    def iva(self):
+        """IVA sobre el subtotal, igual que InvoiceService._calculate_totals"""
+        return (self._subtotal * self.iva_rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+    @property
+    def total(self):
+        return self._subtotal + self.iva
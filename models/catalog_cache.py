@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+
+from db.database import db
+
+
+def stock_version():
+    """Versión actual del stock (la suman los triggers de stock_version en cada cambio)"""
+    return db.fetch_one("SELECT version FROM stock_version")[0]
+
+
+class CatalogCache:
+    """
+    Caché en memoria de productos por código, con límite LRU.
+
+    El catálogo casi no cambia durante un turno, así que las lecturas
+    repetidas del mismo producto no vuelven a SQLite. StockModel mantiene la
+    caché al día en cada escritura (write-through) y la marca como al día
+    con acknowledge(); si la versión del stock avanza por cambios ajenos
+    (otras cajas sobre el mismo stock.db) la caché se vacía. La versión se
+    revisa como mucho una vez cada `check_interval` segundos.
+
+    Las lecturas a la base se hacen fuera del lock; si mientras tanto la
+    caché se modificó o vació (otro hilo guardó o importó productos), lo
+    leído puede ser viejo y no se guarda.
+    """
+
+    def __init__(self, max_entries=5000, check_interval=1.0):
+        self.max_entries = max_entries
+        self.check_interval = check_interval  # segundos entre consultas a stock_version
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()   # código -> fila
+        self._listings = {}             # (orden, descendente) -> lista completa
+        self._version = None            # versión del stock que refleja la caché
+        self._last_check = 0.0
+        self._generation = 0            # suma uno con cada put(), remove() y clear()
+        self._lock = threading.RLock()
+
+    def _check_version(self):
+        """Vaciar la caché si el stock cambió por escrituras que no pasaron por acá"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        version = stock_version()
+        if self._version is not None and self._version != version:
+            self.clear()
+        self._version = version
+
+    def acknowledge(self, version, changes):
+        """
+        Registrar que los últimos `changes` cambios del stock, que lo
+        llevaron a `version`, ya están reflejados en la caché. Si antes hubo
+        cambios ajenos no se registra nada y la próxima revisión la vacía.
+        """
+        with self._lock:
+            if self._version is not None and self._version == version - changes:
+                self._version = version
+
+    def get(self, product_id, loader):
+        """Obtener un producto; si no está en caché se lee con loader(product_id)"""
+        key = str(product_id)
+        with self._lock:
+            self._check_version()
+            row = self._entries.get(key)
+            if row is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return row
+            self.misses += 1
+            generation = self._generation
+
+        row = loader(product_id)
+        if row is not None:
+            with self._lock:
+                if self._generation == generation:
+                    self._store(row)
+        return row
+
+    def get_listing(self, key, loader):
+        """Obtener el catálogo completo en un orden, si entra en la caché"""
+        with self._lock:
+            self._check_version()
+            rows = self._listings.get(key)
+            if rows is not None:
+                self.hits += 1
+                return rows
+            self.misses += 1
+            generation = self._generation
+
+        rows = loader()
+        if len(rows) <= self.max_entries:
+            with self._lock:
+                if self._generation == generation:
+                    self._listings[key] = rows
+        return rows
+
+    def peek(self, product_id):
+        """Obtener un producto solo si ya está en caché, sin afectar contadores"""
+        with self._lock:
+            return self._entries.get(str(product_id))
+
+    def _store(self, row):
+        """Guardar una fila respetando el límite LRU"""
+        key = str(row[0])
+        self._entries[key] = row
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, row):
+        """Guardar o reemplazar la fila de un producto modificado"""
+        with self._lock:
+            self._store(row)
+            self._listings.clear()
+            self._generation += 1
+
+    def remove(self, product_id):
+        """Quitar un producto de la caché"""
+        with self._lock:
+            self._entries.pop(str(product_id), None)
+            self._listings.clear()
+            self._generation += 1
+
+    def clear(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._entries.clear()
+            self._listings.clear()
+            self._version = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        """Contadores para monitoreo"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+# Instancia global compartida por todos los modelos
+catalog_cache = CatalogCache()
@@ -0,0 +1,41 @@
+from collections import namedtuple
+
+# Registros tipados que devuelven los modelos. Son tuplas con nombre: ocupan lo
+# mismo que la tupla del cursor, siguen funcionando por posición (Treeview,
+# set_form_data) y permiten leer los campos por nombre.
+
+Product = namedtuple('Product', ['id', 'name', 'brand', 'price', 'price2', 'quantity'])
+
+Invoice = namedtuple('Invoice', [
+    'id', 'numero_factura', 'fecha_emision', 'cae', 'fecha_vencimiento_cae',
+    'cliente_nombre', 'cliente_cuit', 'cliente_domicilio', 'cliente_condicion_iva',
+    'subtotal', 'iva', 'total', 'estado',
+])
+
+# Fila resumida de los listados de facturas
+InvoiceSummary = namedtuple('InvoiceSummary', [
+    'id', 'numero_factura', 'fecha_emision', 'cliente_nombre', 'total', 'estado',
+])
+
+# Factura esperando CAE, tal como la toma CAEWorker
+PendingInvoice = namedtuple('PendingInvoice', [
+    'id', 'numero_factura', 'afip_datos', 'cae_intentos',
+])
+
+InvoiceItem = namedtuple('InvoiceItem', [
+    'id', 'factura_id', 'producto_id', 'producto_nombre',
+    'cantidad', 'precio_unitario', 'subtotal',
+])
+
+
+def row_factory(record):
+    """
+    row_factory de sqlite3 que arma el registro directamente desde la fila del
+    cursor, sin diccionarios intermedios ni validación por argumento.
+    """
+    new = tuple.__new__
+
+    def factory(cursor, row):
+        return new(record, row)
+
+    return factory
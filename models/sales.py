@@ -1,5 +1,7 @@
 from db.database import db
+from db.migrations import SALES_ROLLUP_SELECT
 from datetime import datetime
+from models.records import Invoice, InvoiceSummary, InvoiceItem, PendingInvoice, row_factory
 
 class SalesModel:
     def __init__(self):
@@ -13,8 +15,8 @@ class SalesModel:
                 INSERT INTO facturas (
                     numero_factura, fecha_emision, cae, fecha_vencimiento_cae,
                     cliente_nombre, cliente_cuit, cliente_domicilio, cliente_condicion_iva,
-                    subtotal, iva, total, estado
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    subtotal, iva, total, estado, afip_datos
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
             
             invoice_params = (
@@ -29,40 +31,48 @@ class SalesModel:
                 invoice_data['subtotal'],
                 invoice_data['iva'],
                 invoice_data['total'],
-                invoice_data.get('estado', 'autorizada')
+                invoice_data.get('estado', 'autorizada'),
+                invoice_data.get('afip_datos')
             )
             
-            # Ejecutar inserción de factura
-            invoice_id = db.execute_query(invoice_query, invoice_params)
-            
-            # Insertar los items de la factura
-            for item in items_data:
-                self.add_invoice_item(invoice_id, item)
+            # Cabecera e items en una sola transacción: no quedan facturas a medias
+            with db.transaction():
+                invoice_id = db.execute_query(invoice_query, invoice_params)
+                self.add_invoice_items(invoice_id, items_data)
             
             return invoice_id
             
         except Exception as e:
             raise Exception(f"Error al crear factura: {str(e)}")
     
-    def add_invoice_item(self, invoice_id, item_data):
-        """Agregar un item a una factura"""
-        query = """
-            INSERT INTO factura_items (
-                factura_id, producto_id, producto_nombre, 
-                cantidad, precio_unitario, subtotal
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        
-        params = (
+    INVOICE_ITEM_QUERY = """
+        INSERT INTO factura_items (
+            factura_id, producto_id, producto_nombre, producto_marca,
+            cantidad, precio_unitario, subtotal
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _invoice_item_params(self, invoice_id, item_data):
+        """Parámetros de inserción de un item de factura"""
+        return (
             invoice_id,
             item_data['producto_id'],
             item_data['producto_nombre'],
+            item_data.get('producto_marca'),
             item_data['cantidad'],
             item_data['precio_unitario'],
             item_data['subtotal']
         )
-        
-        return db.execute_query(query, params)
+
+    def add_invoice_item(self, invoice_id, item_data):
+        """Agregar un item a una factura"""
+        params = self._invoice_item_params(invoice_id, item_data)
+        return db.execute_query(self.INVOICE_ITEM_QUERY, params)
+
+    def add_invoice_items(self, invoice_id, items_data):
+        """Agregar todos los items de una factura en un solo lote"""
+        params = [self._invoice_item_params(invoice_id, item) for item in items_data]
+        return db.execute_many(self.INVOICE_ITEM_QUERY, params)
     
     def get_invoice_by_id(self, invoice_id):
         """Obtener una factura por ID"""
@@ -73,7 +83,7 @@ class SalesModel:
             FROM facturas 
             WHERE id = ?
         """
-        return db.fetch_one(query, (invoice_id,))
+        return db.fetch_one(query, (invoice_id,), row_factory=row_factory(Invoice))
     
     def get_invoice_items(self, invoice_id):
         """Obtener los items de una factura"""
@@ -83,7 +93,7 @@ class SalesModel:
             FROM factura_items 
             WHERE factura_id = ?
         """
-        return db.fetch_all(query, (invoice_id,))
+        return db.fetch_all(query, (invoice_id,), row_factory=row_factory(InvoiceItem))
     
     def get_all_invoices(self, limit=100):
         """Obtener todas las facturas (limitadas)"""
@@ -93,27 +103,128 @@ class SalesModel:
             ORDER BY fecha_emision DESC, id DESC
             LIMIT ?
         """
-        return db.fetch_all(query, (limit,))
+        return db.fetch_all(query, (limit,), row_factory=row_factory(InvoiceSummary))
     
     def update_invoice_cae(self, invoice_id, cae, fecha_vencimiento_cae):
         """Actualizar el CAE de una factura"""
         query = """
             UPDATE facturas 
-            SET cae = ?, fecha_vencimiento_cae = ?, estado = 'autorizada'
+            SET cae = ?, fecha_vencimiento_cae = ?, estado = 'autorizada',
+                cae_proximo_intento = NULL, cae_error = NULL
             WHERE id = ?
         """
         return db.execute_query(query, (cae, fecha_vencimiento_cae, invoice_id))
+
+    def get_pending_cae_invoices(self, limit=20, now=None):
+        """Facturas pendientes de CAE cuyo próximo intento ya venció"""
+        now = now or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        query = """
+            SELECT id, numero_factura, afip_datos, cae_intentos
+            FROM facturas
+            WHERE estado = 'pendiente'
+              AND (cae_proximo_intento IS NULL OR cae_proximo_intento <= ?)
+            ORDER BY cae_proximo_intento, id
+            LIMIT ?
+        """
+        return db.fetch_all(query, (now, limit), row_factory=row_factory(PendingInvoice))
+
+    def get_next_cae_attempt(self):
+        """Momento del próximo reintento programado (None si no hay pendientes)"""
+        row = db.fetch_one("SELECT MIN(IFNULL(cae_proximo_intento, '')) FROM facturas WHERE estado = 'pendiente'")
+        return row[0]
+
+    def count_pending_cae(self):
+        """Cantidad de facturas que todavía esperan CAE"""
+        return db.fetch_one("SELECT COUNT(*) FROM facturas WHERE estado = 'pendiente'")[0]
+
+    def schedule_cae_retry(self, invoice_id, next_attempt, error):
+        """Registrar un intento fallido y programar el siguiente"""
+        query = """
+            UPDATE facturas
+            SET cae_intentos = cae_intentos + 1, cae_proximo_intento = ?, cae_error = ?
+            WHERE id = ? AND estado = 'pendiente'
+        """
+        return db.execute_query(query, (next_attempt, error, invoice_id))
+
+    def reject_invoice_cae(self, invoice_id, error):
+        """Marcar una factura rechazada por AFIP (no se vuelve a enviar)"""
+        query = """
+            UPDATE facturas
+            SET estado = 'rechazada', cae_intentos = cae_intentos + 1,
+                cae_proximo_intento = NULL, cae_error = ?
+            WHERE id = ?
+        """
+        return db.execute_query(query, (error, invoice_id))
     
-    def get_next_invoice_number(self):
-        """Obtener el próximo número de factura"""
-        query = "SELECT MAX(CAST(SUBSTR(numero_factura, -8) AS INTEGER)) FROM facturas"
-        result = db.fetch_one(query)
-        
-        if result[0] is None:
-            return "0001-00000001"
-        else:
-            next_number = result[0] + 1
-            return f"0001-{next_number:08d}"
+    def format_invoice_number(self, punto_venta, numero):
+        """Formatear un número de factura como PPPP-NNNNNNNN"""
+        return f"{punto_venta:04d}-{numero:08d}"
+
+    def reserve_invoice_numbers(self, punto_venta=1, tipo_comprobante=6, count=1):
+        """
+        Reservar de forma atómica `count` números consecutivos.
+
+        Sirve tanto para la próxima factura como para entregar un bloque a
+        una caja que va a trabajar sin conexión. Devuelve (primero, último).
+        """
+        if count <= 0:
+            raise ValueError("La cantidad de números a reservar debe ser mayor a 0")
+
+        with db.transaction() as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO secuencias_comprobante (punto_venta, tipo_comprobante)
+                VALUES (?, ?)
+            """, (punto_venta, tipo_comprobante))
+            conn.execute("""
+                UPDATE secuencias_comprobante
+                SET ultimo_numero = ultimo_numero + ?
+                WHERE punto_venta = ? AND tipo_comprobante = ?
+            """, (count, punto_venta, tipo_comprobante))
+            last = conn.execute("""
+                SELECT ultimo_numero FROM secuencias_comprobante
+                WHERE punto_venta = ? AND tipo_comprobante = ?
+            """, (punto_venta, tipo_comprobante)).fetchone()[0]
+
+        return last - count + 1, last
+
+    def get_next_invoice_number(self, punto_venta=1, tipo_comprobante=6):
+        """Reservar y obtener el próximo número de factura"""
+        numero, _ = self.reserve_invoice_numbers(punto_venta, tipo_comprobante)
+        return self.format_invoice_number(punto_venta, numero)
+
+    def find_invoice_number_gaps(self, punto_venta=1, tipo_comprobante=6):
+        """
+        Detectar números reservados que no llegaron a usarse.
+        Devuelve una lista de rangos (desde, hasta).
+        """
+        prefix = f"{punto_venta:04d}-"
+        query = """
+            SELECT prev + 1, numero - 1 FROM (
+                SELECT CAST(SUBSTR(numero_factura, -8) AS INTEGER) AS numero,
+                       LAG(CAST(SUBSTR(numero_factura, -8) AS INTEGER), 1, 0)
+                           OVER (ORDER BY numero_factura) AS prev
+                FROM facturas
+                WHERE numero_factura >= ? AND numero_factura < ?
+            )
+            WHERE numero - prev > 1
+        """
+        # '.' es el carácter siguiente a '-': el rango cubre el prefijo usando el índice
+        gaps = db.fetch_all(query, (prefix, f"{punto_venta:04d}."))
+
+        last_issued = db.fetch_one(
+            "SELECT MAX(numero_factura) FROM facturas WHERE numero_factura >= ? AND numero_factura < ?",
+            (prefix, f"{punto_venta:04d}.")
+        )[0]
+        last_issued = int(last_issued[-8:]) if last_issued else 0
+
+        sequence = db.fetch_one("""
+            SELECT ultimo_numero FROM secuencias_comprobante
+            WHERE punto_venta = ? AND tipo_comprobante = ?
+        """, (punto_venta, tipo_comprobante))
+        if sequence and sequence[0] > last_issued:
+            gaps.append((last_issued + 1, sequence[0]))
+
+        return gaps
     
     def search_invoices(self, search_term):
         """Buscar facturas por número o cliente"""
@@ -124,7 +235,7 @@ class SalesModel:
             ORDER BY fecha_emision DESC
         """
         search_pattern = f"%{search_term}%"
-        return db.fetch_all(query, (search_pattern, search_pattern))
+        return db.fetch_all(query, (search_pattern, search_pattern), row_factory=row_factory(InvoiceSummary))
     
     def get_invoices_by_date_range(self, start_date, end_date):
         """Obtener facturas en un rango de fechas"""
@@ -134,27 +245,57 @@ class SalesModel:
             WHERE fecha_emision BETWEEN ? AND ?
             ORDER BY fecha_emision DESC
         """
-        return db.fetch_all(query, (start_date, end_date))
+        return db.fetch_all(query, (start_date, end_date), row_factory=row_factory(InvoiceSummary))
     
     def get_sales_summary(self, start_date=None, end_date=None):
-        """Obtener resumen de ventas"""
+        """
+        Obtener resumen de ventas autorizadas: (cantidad, total, promedio).
+
+        Se responde desde ventas_diarias, que los triggers mantienen al día en
+        cada alta o cambio de estado (incluido el día en curso), así el costo
+        depende de la cantidad de días del rango y no de facturas.
+        """
+        query = """
+            SELECT COALESCE(SUM(cantidad), 0), SUM(total_centavos)
+            FROM ventas_diarias
+            WHERE estado = 'autorizada'
+        """
+        params = ()
         if start_date and end_date:
-            query = """
-                SELECT 
-                    COUNT(*) as total_facturas,
-                    SUM(total) as total_ventas,
-                    AVG(total) as promedio_venta
-                FROM facturas 
-                WHERE fecha_emision BETWEEN ? AND ? AND estado = 'autorizada'
-            """
-            return db.fetch_one(query, (start_date, end_date))
-        else:
-            query = """
-                SELECT 
-                    COUNT(*) as total_facturas,
-                    SUM(total) as total_ventas,
-                    AVG(total) as promedio_venta
-                FROM facturas 
-                WHERE estado = 'autorizada'
-            """
-            return db.fetch_one(query)
\ No newline at end of file
+            query += " AND fecha BETWEEN ? AND ?"
+            params = (start_date, end_date)
+
+        count, cents = db.fetch_one(query, params)
+        if not count:
+            return (0, None, None)
+        total = cents / 100
+        return (count, total, total / count)
+
+    def get_monthly_sales(self, start_date=None, end_date=None, punto_venta=None):
+        """Ventas autorizadas por mes: lista de (mes 'AAAA-MM', cantidad, total)"""
+        conditions = ["estado = 'autorizada'"]
+        params = []
+        if start_date and end_date:
+            conditions.append("fecha BETWEEN ? AND ?")
+            params += [start_date, end_date]
+        if punto_venta is not None:
+            conditions.append("punto_venta = ?")
+            params.append(punto_venta)
+        query = f"""
+            SELECT SUBSTR(fecha, 1, 7) AS mes, SUM(cantidad), SUM(total_centavos) / 100.0
+            FROM ventas_diarias
+            WHERE {' AND '.join(conditions)}
+            GROUP BY mes
+            ORDER BY mes
+        """
+        return db.fetch_all(query, params)
+
+    def rebuild_sales_rollups(self):
+        """Recalcular ventas_diarias desde facturas (por ejemplo tras editar la base a mano)"""
+        with db.transaction():
+            db.execute_query("DELETE FROM ventas_diarias")
+            db.execute_query(f"""
+                INSERT INTO ventas_diarias (fecha, punto_venta, estado, cantidad, total_centavos)
+                {SALES_ROLLUP_SELECT}
+            """)
+        return db.fetch_one("SELECT COUNT(*) FROM ventas_diarias")[0]
\ No newline at end of file
@@ -1,26 +1,218 @@
+import re
+from array import array
+
 from db.database import db
+from models.catalog_cache import catalog_cache, stock_version
+from models.records import Product, row_factory
+
+# Las consultas de productos arman Product directamente desde el cursor
+PRODUCT_ROW = row_factory(Product)
+
+# Los códigos de producto tienen 4 dígitos
+PRODUCT_ID_DIGITS = 4
+
+
+def normalize_product_id(value):
+    """
+    Código de producto con el formato de 4 dígitos. Un código numérico más
+    corto se completa con ceros a la izquierda: Excel guarda 0001 como el
+    número 1 (o 1.0), y así se puede buscar y editar desde el formulario.
+    ValueError si no es un código válido.
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value if value is not None else '').strip()
+    if not re.fullmatch(f"[0-9]{{1,{PRODUCT_ID_DIGITS}}}", text):
+        raise ValueError(f"código inválido ({text or 'vacío'}): debe tener {PRODUCT_ID_DIGITS} dígitos")
+    return text.zfill(PRODUCT_ID_DIGITS)
+
+
+class InsufficientStockError(ValueError):
+    """Uno o más productos no tienen stock suficiente para la venta"""
+
+    def __init__(self, shortages):
+        # {id_producto: (disponible, solicitado)}; disponible es None si el producto no existe
+        self.shortages = shortages
+        detalles = []
+        for product_id, (available, requested) in shortages.items():
+            if available is None:
+                detalles.append(f"Producto {product_id} no encontrado")
+            else:
+                detalles.append(
+                    f"Stock insuficiente de {product_id}. Disponible: {available}, Solicitado: {requested}"
+                )
+        super().__init__("; ".join(detalles))
+
 
 class StockModel:
+    _search_index = None  # se detecta una vez por proceso
+    RANKED_SEARCH_LIMIT = 2000
+
+    # Posición de cada columna en las filas que devuelve el modelo
+    COLUMNS = Product._fields
+
+    # Orden precalculado por columna: {columna: (versión del stock, rowids)}.
+    # Compartido por todas las instancias; las escrituras lo invalidan.
+    _sorted_cache = {}
+
     def __init__(self):
         pass
     
-    def get_all_products(self):
+    def get_all_products(self, order_by='name', descending=False):
         """Obtener todos los productos del stock"""
-        query = "SELECT id, name, brand, price, price2, quantity FROM stock ORDER BY name"
-        return db.fetch_all(query)
+        query = f"""
+            SELECT id, name, brand, price, price2, quantity
+            FROM stock
+            ORDER BY {self._order_clause(order_by, descending)}
+        """
+        return catalog_cache.get_listing((order_by, descending), lambda: db.fetch_all(query, row_factory=PRODUCT_ROW))
     
+    def count_products(self):
+        """Cantidad total de productos"""
+        return db.fetch_one("SELECT COUNT(*) FROM stock")[0]
+
+    def _sort_columns(self, order_by):
+        """Columnas de ordenamiento; el código desempata para que el orden sea estable"""
+        if order_by not in self.COLUMNS:
+            raise ValueError(f"No se puede ordenar por {order_by}")
+        return (order_by,) if order_by == 'id' else (order_by, 'id')
+
+    def _order_clause(self, order_by, descending=False, prefix=''):
+        """Cláusula ORDER BY sobre columnas indexadas con desempate por código"""
+        direction = "DESC" if descending else "ASC"
+        return ", ".join(f"{prefix}{column} {direction}" for column in self._sort_columns(order_by))
+
+    def product_sort_key(self, product, order_by='name'):
+        """Clave (columna, código) de una fila, para paginar a partir de ella"""
+        return tuple(getattr(product, column) for column in self._sort_columns(order_by))
+
+    def get_products_page(self, after=None, before=None, limit=100, order_by='name', descending=False):
+        """
+        Obtener una página de productos por keyset.
+
+        `after`/`before` son claves de product_sort_key: se devuelven las filas
+        que siguen (o preceden) a esa clave en el orden pedido, sin recorrer
+        las anteriores como haría un OFFSET.
+        """
+        columns = self._sort_columns(order_by)
+        key_expr = f"({', '.join(columns)})"
+
+        # Para ir hacia atrás se recorre el índice al revés y se invierte el resultado
+        backwards = before is not None
+        sql_desc = descending != backwards
+        order_clause = self._order_clause(order_by, sql_desc)
+
+        key = before if backwards else after
+        if key is None:
+            where, params = "", ()
+        else:
+            where = f"WHERE {key_expr} {'<' if sql_desc else '>'} ({', '.join('?' * len(columns))})"
+            params = tuple(key)
+
+        query = f"""
+            SELECT id, name, brand, price, price2, quantity
+            FROM stock
+            {where}
+            ORDER BY {order_clause}
+            LIMIT ?
+        """
+        rows = db.fetch_all(query, params + (limit,), row_factory=PRODUCT_ROW)
+        if backwards:
+            rows.reverse()
+        return rows
+
+    def get_products_at(self, offset, limit=100, order_by='name', descending=False):
+        """Obtener productos a partir de una posición (para saltos con la barra de desplazamiento)"""
+        rowids = self._sorted_rowids(order_by)
+        if descending:
+            end = len(rowids) - offset
+            window = rowids[max(0, end - limit):max(0, end)][::-1]
+        else:
+            window = rowids[offset:offset + limit]
+        if not window:
+            return []
+
+        placeholders = ", ".join("?" * len(window))
+        query = f"""
+            SELECT rowid, id, name, brand, price, price2, quantity
+            FROM stock
+            WHERE rowid IN ({placeholders})
+        """
+        rows = {row[0]: Product._make(row[1:]) for row in db.fetch_all(query, tuple(window))}
+        return [rows[rowid] for rowid in window if rowid in rows]
+
+    def _sorted_rowids(self, order_by):
+        """
+        Rowids de todo el catálogo en el orden de `order_by`, recorriendo solo el
+        índice. Se calcula una vez y se reutiliza hasta que cambie el stock:
+        las escrituras de este proceso lo invalidan directamente y las de otras
+        cajas se detectan con la versión de stock_version.
+        """
+        version = stock_version()
+        cached = StockModel._sorted_cache.get(order_by)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        query = f"SELECT rowid FROM stock ORDER BY {self._order_clause(order_by)}"
+        rowids = array('q', (row[0] for row in db.get_connection().execute(query)))
+        StockModel._sorted_cache[order_by] = (version, rowids)
+        return rowids
+
+    def invalidate_sorted_cache(self, *columns):
+        """Descartar el orden precalculado (de todas las columnas si no se indican)"""
+        if not columns:
+            StockModel._sorted_cache.clear()
+        for column in columns:
+            StockModel._sorted_cache.pop(column, None)
+
     def get_product_by_id(self, product_id):
         """Obtener un producto por su ID"""
+        return catalog_cache.get(product_id, self._load_product)
+
+    def _load_product(self, product_id):
+        """Leer un producto desde la base, sin pasar por la caché"""
         query = "SELECT id, name, brand, price, price2, quantity FROM stock WHERE id = ?"
-        return db.fetch_one(query, (product_id,))
-    
+        return db.fetch_one(query, (product_id,), row_factory=PRODUCT_ROW)
+
+    def _stock_written(self, conn, changes, columns=(), rows=(), removed=()):
+        """
+        Reflejar en las cachés una escritura de este proceso en stock, hecha
+        en la transacción en curso sobre `changes` filas.
+
+        Se descarta el orden precalculado de `columns` (de todas si no se
+        indican) y las entradas de los productos tocados; al confirmar se
+        guardan las filas nuevas (`rows`) y la versión que dejó la escritura
+        se toma como conocida, así las cachés no se vacían por cambios
+        propios. Si la transacción se deshace no se guarda nada.
+        """
+        if not changes:
+            return
+        version = conn.execute("SELECT version FROM stock_version").fetchone()[0]
+        self.invalidate_sorted_cache(*columns)
+        stale = list(removed) + [row.id for row in rows]
+        for product_id in stale:
+            catalog_cache.remove(product_id)
+
+        def committed():
+            # Otro hilo pudo releer la fila vieja antes del commit
+            for product_id in removed:
+                catalog_cache.remove(product_id)
+            for row in rows:
+                catalog_cache.put(row)
+            catalog_cache.acknowledge(version, changes)
+            for column, (seen, rowids) in list(StockModel._sorted_cache.items()):
+                if seen == version - changes:
+                    StockModel._sorted_cache[column] = (version, rowids)
+
+        db.after_commit(committed)
+
     def add_product(self, product_data):
         """Agregar un nuevo producto"""
         query = """
             INSERT INTO stock (id, name, brand, price, price2, quantity)
             VALUES (?, ?, ?, ?, ?, ?)
         """
-        params = (
+        params = Product(
             product_data['id'],
             product_data['name'],
             product_data['brand'],
@@ -28,7 +220,10 @@ class StockModel:
             product_data['price2'],
             product_data['quantity'],
         )
-        return db.execute_query(query, params)
+        with db.transaction() as conn:
+            cursor = conn.execute(query, params)
+            self._stock_written(conn, cursor.rowcount, rows=[params])
+        return cursor.lastrowid
     
     def update_product(self, product_id, product_data):
         """Actualizar un producto existente"""
@@ -45,43 +240,133 @@ class StockModel:
             product_data['quantity'],
             product_id
         )
-        return db.execute_query(query, params)
+        with db.transaction() as conn:
+            cursor = conn.execute(query, params)
+            self._stock_written(conn, cursor.rowcount, rows=[Product(product_id, *params[:5])])
+        return cursor.lastrowid
     
     def delete_product(self, product_id):
         """Eliminar un producto"""
         query = "DELETE FROM stock WHERE id = ?"
-        return db.execute_query(query, (product_id,))
+        with db.transaction() as conn:
+            cursor = conn.execute(query, (product_id,))
+            self._stock_written(conn, cursor.rowcount, removed=[product_id])
+        return cursor.lastrowid
     
     def update_quantity(self, product_id, new_quantity):
         """Actualizar solo la cantidad de un producto"""
         query = "UPDATE stock SET quantity = ? WHERE id = ?"
-        return db.execute_query(query, (new_quantity, product_id))
+        with db.transaction() as conn:
+            cursor = conn.execute(query, (new_quantity, product_id))
+            self._stock_written(conn, cursor.rowcount, ('quantity',), rows=self._read_products(conn, [product_id]))
+        return cursor.lastrowid
+
+    def _read_products(self, conn, product_ids):
+        """Filas actuales de varios productos, leídas con la conexión de la transacción"""
+        placeholders = ", ".join("?" * len(product_ids))
+        cursor = conn.cursor()
+        cursor.row_factory = PRODUCT_ROW
+        return cursor.execute(
+            f"SELECT id, name, brand, price, price2, quantity FROM stock WHERE id IN ({placeholders})",
+            tuple(product_ids)
+        ).fetchall()
     
     def reduce_quantity(self, product_id, quantity_to_reduce):
         """Reducir la cantidad de un producto (para ventas)"""
-        # Primero obtener la cantidad actual
-        current_product = self.get_product_by_id(product_id)
-        if not current_product:
-            raise ValueError(f"Producto {product_id} no encontrado")
-        
-        current_quantity = current_product[4]  # quantity está en el índice 4
-        
-        if current_quantity < quantity_to_reduce:
-            raise ValueError(f"Stock insuficiente. Disponible: {current_quantity}, Solicitado: {quantity_to_reduce}")
-        
-        new_quantity = current_quantity - quantity_to_reduce
-        return self.update_quantity(product_id, new_quantity)
+        return self.reduce_quantities({product_id: quantity_to_reduce})
+
+    def reduce_quantities(self, quantities):
+        """
+        Descontar stock de varios productos de forma atómica.
+
+        Cada línea es un UPDATE condicional, así dos cajas que venden el mismo
+        artículo no se pisan. Si algún producto no alcanza se deshace todo y se
+        lanza InsufficientStockError con el detalle de cada faltante.
+
+        Args:
+            quantities (dict): {id_producto: cantidad_a_descontar}
+        """
+        query = "UPDATE stock SET quantity = quantity - ? WHERE id = ? AND quantity >= ?"
+
+        for product_id, quantity in quantities.items():
+            if quantity <= 0:
+                raise ValueError(f"La cantidad a descontar de {product_id} debe ser mayor a 0")
+
+        with db.transaction() as conn:
+            short = []
+            for product_id, quantity in quantities.items():
+                if conn.execute(query, (quantity, product_id, quantity)).rowcount == 0:
+                    short.append(product_id)
+
+            if short:
+                shortages = {}
+                for product_id in short:
+                    row = conn.execute("SELECT quantity FROM stock WHERE id = ?", (product_id,)).fetchone()
+                    shortages[product_id] = (row[0] if row else None, quantities[product_id])
+                raise InsufficientStockError(shortages)
+
+            self._stock_written(conn, len(quantities), ('quantity',),
+                                rows=self._read_products(conn, list(quantities)))
+        return len(quantities)
     
-    def search_products(self, search_term):
-        """Buscar productos por nombre o ID"""
+    def has_search_index(self):
+        """Indica si la base tiene el índice FTS5 de productos"""
+        if StockModel._search_index is None:
+            row = db.fetch_one(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stock_fts'"
+            )
+            StockModel._search_index = row is not None
+        return StockModel._search_index
+
+    def search_products(self, search_term, limit=None):
+        """
+        Buscar productos por código, nombre o marca.
+
+        Con el índice FTS5 cada palabra se busca por prefijo, sin distinguir
+        acentos ni mayúsculas ("lampara term" encuentra "LÁMPARA ... TERMOMAGNÉTICA"),
+        y los resultados se ordenan por relevancia.
+        """
+        terms = re.findall(r"\w+", search_term)
+        if not terms:
+            return []
+
+        if not self.has_search_index():
+            return self._search_products_like(search_term, limit)
+
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        # bm25 se calcula para cada coincidencia: con palabras muy comunes
+        # ("led", "cable") rankear decenas de miles de filas cuesta más de lo
+        # que aporta, así que esas búsquedas se devuelven sin rankear
+        matches = db.fetch_one("SELECT COUNT(*) FROM stock_fts WHERE stock_fts MATCH ?", (match,))[0]
+        if matches <= self.RANKED_SEARCH_LIMIT:
+            order_by = "ORDER BY bm25(stock_fts, 10.0, 5.0, 2.0), s.name"
+        else:
+            order_by = ""
+
+        query = f"""
+            SELECT s.id, s.name, s.brand, s.price, s.price2, s.quantity
+            FROM stock_fts
+            JOIN stock s ON s.rowid = stock_fts.rowid
+            WHERE stock_fts MATCH ?
+            {order_by}
+            LIMIT ?
+        """
+        return db.fetch_all(query, (match, limit if limit else -1), row_factory=PRODUCT_ROW)
+
+    def _search_products_like(self, search_term, limit=None):
+        """Búsqueda por LIKE para bases sin FTS5"""
         query = """
             SELECT id, name, brand, price, price2, quantity 
             FROM stock 
-            WHERE name LIKE ? OR id LIKE ?
+            WHERE name LIKE ? OR id LIKE ? OR brand LIKE ?
             ORDER BY name
+            LIMIT ?
         """
         search_pattern = f"%{search_term}%"
-        return db.fetch_all(query, (search_pattern, search_pattern))
+        return db.fetch_all(
+            query, (search_pattern, search_pattern, search_pattern, limit if limit else -1), row_factory=PRODUCT_ROW
+        )
     
     def get_products_by_category(self, category):
         """Obtener productos por categoría"""
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Reconstrucción de los resúmenes diarios de ventas (tabla ventas_diarias).
+
+Los triggers los mantienen solos; esto hace falta solo si se modificaron
+facturas sin pasar por SQLite (por ejemplo, restaurando una copia parcial)
+o para verificar que coinciden con las facturas:
+
+    python reconstruir_resumenes.py
+    python reconstruir_resumenes.py --verificar
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db.database import db
+from db.migrations import SALES_ROLLUP_SELECT
+from models.sales import SalesModel
+
+
+def find_differences():
+    """Grupos (fecha, punto de venta, estado) en los que ventas_diarias no coincide con facturas"""
+    query = f"""
+        WITH real (fecha, punto_venta, estado, cantidad, total_centavos) AS ({SALES_ROLLUP_SELECT})
+        SELECT r.fecha, r.punto_venta, r.estado, r.cantidad, v.cantidad, r.total_centavos, v.total_centavos
+        FROM real r
+        LEFT JOIN ventas_diarias v
+          ON v.estado = r.estado AND v.fecha = r.fecha AND v.punto_venta = r.punto_venta
+        WHERE v.cantidad IS NOT r.cantidad OR v.total_centavos IS NOT r.total_centavos
+        UNION ALL
+        SELECT v.fecha, v.punto_venta, v.estado, NULL, v.cantidad, NULL, v.total_centavos
+        FROM ventas_diarias v
+        WHERE NOT EXISTS (
+            SELECT 1 FROM real r
+            WHERE r.estado = v.estado AND r.fecha = v.fecha AND r.punto_venta = v.punto_venta
+        )
+    """
+    return db.fetch_all(query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir los resúmenes diarios de ventas")
+    parser.add_argument('--verificar', action='store_true',
+                        help="solo comparar los resúmenes con las facturas, sin modificarlos")
+    args = parser.parse_args()
+
+    if args.verificar:
+        differences = find_differences()
+        for fecha, punto_venta, estado, real_count, rollup_count, real_cents, rollup_cents in differences:
+            print(f"❌ {fecha} PV {punto_venta} {estado}: facturas {real_count} / ${(real_cents or 0) / 100:.2f}, "
+                  f"resumen {rollup_count} / ${(rollup_cents or 0) / 100:.2f}")
+        print(f"{len(differences)} diferencia(s)")
+        return 1 if differences else 0
+
+    start = time.perf_counter()
+    groups = SalesModel().rebuild_sales_rollups()
+    print(f"✅ {groups} resúmenes reconstruidos en {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,99 @@
 import sys
 import os
 
+from services.wsaa_client import WSAAClient, WSAA_HOMOLOGACION_URL
+from services.wsfe_client import WSFEClient, WSFE_HOMOLOGACION_URL
+
 # Agregar el directorio arca al path para importar los módulos AFIP
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'arca'))
 
+try:
+    from config.settings import AFIP_CONFIG
+except ImportError:
+    AFIP_CONFIG = {}
+
+# Ticket de acceso por defecto, junto a los certificados (ver README)
+DEFAULT_TA_PATH = os.path.join(os.path.dirname(__file__), '..', 'certs', 'TA.xml')
+
 class AFIPService:
-    def __init__(self):
-        self.is_testing = True  # Cambiar a False en producción
-        
-    def obtener_cae(self, datos_factura):
+    def __init__(self, is_testing=None, wsfe_url=None, timeout=None, wsaa=None):
+        # Cambiar 'testing' a False en AFIP_CONFIG para producción
+        self.is_testing = AFIP_CONFIG.get('testing', True) if is_testing is None else is_testing
+        timeout = timeout or AFIP_CONFIG.get('timeout', 10.0)
+        self.wsfe = WSFEClient(wsfe_url or AFIP_CONFIG.get('wsfe_url', WSFE_HOMOLOGACION_URL), timeout)
+        self.wsaa = wsaa or self._wsaa_from_config(timeout)
+
+    def _wsaa_from_config(self, timeout):
+        """
+        Cliente WSAA si hay certificado y clave configurados; si no, se usan
+        'token' y 'sign' fijos de AFIP_CONFIG.
+        """
+        if not (AFIP_CONFIG.get('cert') and AFIP_CONFIG.get('key')):
+            return None
+        return WSAAClient(
+            AFIP_CONFIG['cert'],
+            AFIP_CONFIG['key'],
+            url=AFIP_CONFIG.get('wsaa_url', WSAA_HOMOLOGACION_URL),
+            ta_path=AFIP_CONFIG.get('ta_path', DEFAULT_TA_PATH),
+            timeout=timeout,
+            refresh_margin=AFIP_CONFIG.get('ta_refresh_margin', 600),
+        )
+
+    def solicitar_cae(self, datos_factura):
+        """
+        Pedir el CAE de una factura a WSFE.
+        A diferencia de obtener_cae, los errores de comunicación no se
+        convierten en rechazo: se propagan (WSFETransientError) para reintentar.
+        """
+        if self.is_testing:
+            # Datos de prueba para testing
+            return {
+                'cae': '75319266109747',
+                'fecha_vencimiento_cae': '20250809',
+                'resultado': 'A',  # A = Aprobado
+                'observaciones': [],
+                'errores': []
+            }
+        return self.wsfe.solicitar_cae(self._auth(), datos_factura)
+
+    def solicitar_cae_lote(self, lote):
+        """
+        Pedir el CAE de varias facturas en un solo pedido a WSFE (mismo punto
+        de venta y tipo, números consecutivos). Devuelve {número: resultado};
+        los errores de comunicación se propagan igual que en solicitar_cae.
+        """
+        if self.is_testing:
+            return {int(datos['numero_comprobante']): self.solicitar_cae(datos) for datos in lote}
+        return self.wsfe.solicitar_cae_lote(self._auth(), lote)
+
+    def ultimo_autorizado(self, punto_venta, tipo_comprobante):
         """
-        Obtener CAE de AFIP para una factura
-        Por ahora devuelve datos de testing, después integrarás con wsfe.py
+        Último número que AFIP tiene autorizado para el punto de venta y tipo.
+        En modo de prueba devuelve None: no hay nada con qué conciliar.
         """
+        if self.is_testing:
+            return None
+        return self.wsfe.ultimo_autorizado(self._auth(), punto_venta, tipo_comprobante)
+
+    def consultar_comprobante(self, punto_venta, tipo_comprobante, numero):
+        """Resultado de un comprobante ya enviado a AFIP (None si AFIP no lo tiene)"""
+        return self.wsfe.consultar_comprobante(self._auth(), punto_venta, tipo_comprobante, numero)
+
+    def _auth(self):
+        """Credenciales del ticket de acceso para WSFE"""
+        if self.wsaa is not None:
+            ticket = self.wsaa.get_ticket()
+            return {'token': ticket.token, 'sign': ticket.sign, 'cuit': AFIP_CONFIG.get('cuit', '')}
+        return {
+            'token': AFIP_CONFIG.get('token', ''),
+            'sign': AFIP_CONFIG.get('sign', ''),
+            'cuit': AFIP_CONFIG.get('cuit', ''),
+        }
+        
+    def obtener_cae(self, datos_factura):
+        """Obtener CAE de AFIP para una factura (los errores se devuelven como rechazo)"""
         try:
-            if self.is_testing:
-                # Datos de prueba para testing
-                return {
-                    'cae': '75319266109747',
-                    'fecha_vencimiento_cae': '20250809',
-                    'resultado': 'A',  # A = Aprobado
-                    'observaciones': [],
-                    'errores': []
-                }
-            else:
-                # Aquí se integra con wsfe.py real
-                # from arca.wsfe import obtener_cae_real
-                # return obtener_cae_real(datos_factura)
-                pass
+            return self.solicitar_cae(datos_factura)
                 
         except Exception as e:
             return {
@@ -74,21 +140,19 @@ class AFIPService:
     
     def obtener_siguiente_numero_comprobante(self, punto_venta=1, tipo_comprobante=6):
         """
-        Obtener el siguiente número de comprobante disponible
-        En producción esto consultaría a AFIP
+        Reservar el siguiente número de comprobante de la secuencia local y
+        devolverlo formateado. Cada llamada consume un número; los errores
+        de la base se propagan.
         """
-        try:
-            if self.is_testing:
-                # Para testing, usar un número secuencial simple
-                from models.sales import SalesModel
-                sales_model = SalesModel()
-                return sales_model.get_next_invoice_number()
-            else:
-                # Aquí se consulta a AFIP el último número usado
-                # from arca.wsfe import obtener_ultimo_comprobante
-                # return obtener_ultimo_comprobante(punto_venta, tipo_comprobante) + 1
-                pass
-                
-        except Exception as e:
-            print(f"Error obteniendo siguiente número: {e}")
-            return "0001-00000001"
\ No newline at end of file
+        from models.sales import SalesModel
+        return SalesModel().get_next_invoice_number(punto_venta, tipo_comprobante)
+
+    def reservar_bloque_comprobantes(self, cantidad, punto_venta=1, tipo_comprobante=6):
+        """
+        Reservar un bloque de números para una caja que trabaja sin conexión.
+        Devuelve la lista de números formateados.
+        """
+        from models.sales import SalesModel
+        sales_model = SalesModel()
+        desde, hasta = sales_model.reserve_invoice_numbers(punto_venta, tipo_comprobante, cantidad)
+        return [sales_model.format_invoice_number(punto_venta, n) for n in range(desde, hasta + 1)]
\ No newline at end of file
@@ -0,0 +1,110 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db.database import db
+
+
+class WorkerQueueFullError(Exception):
+    """Hay demasiados trabajos esperando su turno"""
+
+
+class BackgroundWorker:
+    """
+    Trabajos largos en segundo plano, sin bloquear Tk (presupuestos en PDF,
+    importación del catálogo).
+
+    Los trabajos se encolan en un pool con un máximo de `max_workers`
+    corriendo a la vez; los que llegan de más esperan su turno en la cola.
+    Los hilos sirven para que Tk siga atendiendo eventos mientras tanto, no
+    para acelerar: el trabajo en Python puro no suelta el GIL. El avance,
+    el resultado y los errores vuelven al hilo de Tk por una cola que se
+    revisa con after() solo mientras haya trabajos pendientes, así los
+    callbacks pueden tocar widgets sin problemas.
+    """
+
+    def __init__(self, widget, max_workers=2, max_queued=20, poll_ms=50):
+        self.widget = widget
+        self.max_queued = max_queued
+        self.poll_ms = poll_ms
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='worker')
+        self._events = queue.Queue()
+        self._callbacks = {}  # id de trabajo -> (on_done, on_error, on_progress)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._polling = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None, **kwargs):
+        """
+        Encolar fn(*args, progress=..., **kwargs) y devolver el id del trabajo.
+
+        fn recibe `progress`, una función (hecho, total) que puede
+        llamar desde el hilo de trabajo para informar el avance.
+        """
+        with self._lock:
+            if len(self._callbacks) >= self.max_queued:
+                raise WorkerQueueFullError(
+                    f"Ya hay {len(self._callbacks)} trabajos en cola, espere a que terminen"
+                )
+            job_id = next(self._ids)
+            self._callbacks[job_id] = (on_done, on_error, on_progress)
+
+        def progress(done, total):
+            self._events.put((job_id, 'progress', (done, total)))
+
+        def run():
+            try:
+                result = fn(*args, progress=progress, **kwargs)
+            except Exception as e:
+                self._events.put((job_id, 'error', e))
+            else:
+                self._events.put((job_id, 'done', result))
+            finally:
+                # El hilo queda esperando otro trabajo: no retener la conexión
+                db.release_connection()
+
+        self._executor.submit(run)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return job_id
+
+    def pending(self):
+        """Cantidad de trabajos en cola o generándose"""
+        with self._lock:
+            return len(self._callbacks)
+
+    def shutdown(self, wait=True):
+        """Dejar de aceptar trabajos; con wait=True espera a los que están en curso"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _poll(self):
+        """Entregar en el hilo de Tk los eventos de los trabajos"""
+        while True:
+            try:
+                job_id, kind, value = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                if kind in ('done', 'error'):
+                    callbacks = self._callbacks.pop(job_id, None)
+                else:
+                    callbacks = self._callbacks.get(job_id)
+            if callbacks is None:
+                continue
+
+            on_done, on_error, on_progress = callbacks
+            if kind == 'progress' and on_progress:
+                on_progress(job_id, *value)
+            elif kind == 'done' and on_done:
+                on_done(job_id, value)
+            elif kind == 'error' and on_error:
+                on_error(job_id, value)
+
+        if self.pending() or not self._events.empty():
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
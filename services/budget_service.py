@@ -1,44 +1,153 @@
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
+from reportlab.platypus import (SimpleDocTemplate, BaseDocTemplate, PageTemplate, Frame, Table,
+                                Paragraph, Spacer, ActionFlowable)
 from reportlab.lib.units import inch
 from datetime import datetime
-from config.settings import COMPANY_CONFIG
+from services.pdf_templates import pdf_templates
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import itertools
 import os
+import time
+import uuid
+
+class _ProductRow(Table):
+    """Fila de producto del modo paginado; recuerda su importe para el subtotal de la página"""
+
+    def __init__(self, row, amount, col_widths, style):
+        super().__init__([row], colWidths=col_widths, style=style)
+        self.amount = amount
+
+
+class _PaginatedBudgetDoc(BaseDocTemplate):
+    """
+    Documento del modo paginado.
+
+    Los flowables salen de un generador y se piden a medida que ReportLab
+    dibuja (afterFlowable): en memoria solo hay unos pocos por delante del
+    que se está dibujando, sin importar el largo del presupuesto. Cada
+    producto es una tabla de una fila, así que el corte de página lo decide
+    ReportLab con la altura real de cada fila (una descripción de varias
+    líneas ocupa lo que ocupa). Al empezar una página con productos
+    pendientes se repite el encabezado, y el subtotal de la página se
+    dibuja debajo de la última fila con los importes que realmente entraron
+    en ella, en una franja reservada al pie del marco.
+    """
+
+    LOOKAHEAD = 8
+
+    def __init__(self, filename, source, header, subtotal, progress=None, total_items=None, **kw):
+        super().__init__(filename, **kw)
+        self._source = source
+        self._header = header        # header() -> flowable del encabezado de productos
+        self._subtotal = subtotal    # subtotal(página, importe) -> tabla del subtotal
+        self._progress = progress
+        self._total_items = total_items
+        self._pending = []
+        self._page_items = 0
+        self._page_amount = 0.0
+        self._items_done = 0
+
+        self._subtotal_height = subtotal(0, 0.0).wrap(self.width, self.height)[1]
+        frame = Frame(self.leftMargin, self.bottomMargin + self._subtotal_height,
+                      self.width, self.height - self._subtotal_height, id='normal')
+        self.addPageTemplates([PageTemplate(id='Budget', frames=[frame], pagesize=self.pagesize)])
+
+    def stream(self):
+        """Armar el documento consumiendo el generador"""
+        self._fill()
+        self.build(self._pending)
+
+    def _fill(self):
+        while self._source is not None and len(self._pending) < self.LOOKAHEAD:
+            try:
+                self._pending.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, _ProductRow):
+            self._page_items += 1
+            self._page_amount += flowable.amount
+        self._fill()
+
+    def handle_pageBegin(self):
+        super().handle_pageBegin()
+        # Quedaron productos para esta página: repetir el encabezado de la tabla
+        if self._pending and isinstance(self._pending[0], _ProductRow):
+            self._pending.insert(0, self._header())
+
+    def afterPage(self):
+        self._draw_page_subtotal()
+
+    def handle_productsEnd(self):
+        """Después del último producto: subtotal de la última página, antes del total"""
+        height = self._draw_page_subtotal()
+        self.frame._y -= height
+
+    def _draw_page_subtotal(self):
+        """Dibujar el subtotal de la página debajo de la última fila; devuelve su altura"""
+        if not self._page_items:
+            return 0
+        table = self._subtotal(self.page, self._page_amount)
+        width, height = table.wrap(self.frame._aW, self._subtotal_height)
+        # Alineada como las filas de productos (ReportLab centra las tablas en el marco)
+        table.drawOn(self.canv, self.frame._x, self.frame._y - height, _sW=self.frame._aW - width)
+
+        self._items_done += self._page_items
+        self._page_items = 0
+        self._page_amount = 0.0
+        # El avance solo se informa si se conoce la cantidad de items
+        if self._progress and self._total_items:
+            self._progress(self._items_done, self._total_items)
+        return height
+
+
+PAGE_LAYOUT = {
+    'pagesize': A4,
+    'topMargin': 0.5*inch,
+    'bottomMargin': 0.5*inch,
+    'leftMargin': 0.5*inch,
+    'rightMargin': 0.5*inch,
+}
+PRODUCTS_HEADERS = ['Cant.', 'Descripción', 'Marca', 'P. Unit.', 'Subtotal']
+
+
+# Servicio de cada proceso del pool de generación por lotes
+_batch_service = None
+
+
+def _render_batch_item(output_dir, index, budget_data):
+    """Generar un presupuesto dentro de un proceso del pool"""
+    global _batch_service
+    if _batch_service is None or _batch_service.output_dir != output_dir:
+        _batch_service = BudgetService(output_dir)
+
+    started = time.perf_counter()
+    try:
+        path = _batch_service.generate_budget(budget_data)
+        error = None
+    except Exception as e:
+        # Se devuelve el texto: no todas las excepciones se pueden enviar entre procesos
+        path, error = None, f"{type(e).__name__}: {e}"
+
+    number = budget_data.get('budget_number') if isinstance(budget_data, dict) else None
+    return {
+        'index': index,
+        'budget_number': number,
+        'path': path,
+        'error': error,
+        'seconds': time.perf_counter() - started,
+    }
+
 
 class BudgetService:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
+    def __init__(self, output_dir="presupuestos"):
+        # Estilos y plantillas compartidos por todo el proceso (ver PdfTemplates)
+        self.templates = pdf_templates
+        self.styles = pdf_templates.styles
+        self.output_dir = output_dir
     
-    def setup_custom_styles(self):
-        """Configurar estilos personalizados"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=16,
-            spaceAfter=15,
-            alignment=1,
-            textColor=colors.darkblue
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CompanyInfo',
-            parent=self.styles['Normal'],
-            fontSize=9,  
-            alignment=1, 
-            spaceAfter=10 
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ClientInfo',
-            parent=self.styles['Normal'],
-            fontSize=9,
-            spaceAfter=5
-        ))
-    
-    def generate_budget(self, budget_data, save_path=None):
+    def generate_budget(self, budget_data, save_path=None, progress=None, paginate=None):
         """
         Generar presupuesto en PDF
         
@@ -58,27 +167,46 @@ class BudgetService:
                         'subtotal': float
                     }
                 ],
-                'total': float,
+                'total': float (opcional en modo paginado, se suma sobre la marcha),
                 'validity_days': int (opcional, default 30),
                 'notes': str (opcional)
             }
             save_path (str): Ruta donde guardar el archivo
+            progress (callable): opcional, se llama con (hechos, total) mientras
+                se arma el documento; lo usa BackgroundWorker para informar el avance
+            paginate (bool): repetir el encabezado de productos en cada página
+                y cerrar cada una con su subtotal. Por defecto se usa cuando los
+                items no entran en la primera página o vienen en un iterador
+                (que entonces se consume a medida que se dibuja, sin cargarlo entero)
         """
         if not save_path:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{budget_data['budget_number']}_{timestamp}.pdf"
-            save_path = os.path.join("presupuestos", filename)
+            # El sufijo evita pisar otro presupuesto con el mismo número generado en el
+            # mismo segundo (pasa seguido en la generación por lotes, con varios procesos)
+            filename = f"{budget_data['budget_number']}_{timestamp}_{uuid.uuid4().hex[:8]}.pdf"
+            save_path = os.path.join(self.output_dir, filename)
             
-            os.makedirs("presupuestos", exist_ok=True)
+            os.makedirs(self.output_dir, exist_ok=True)
         
-        doc = SimpleDocTemplate(
-            save_path, 
-            pagesize=A4,
-            topMargin=0.5*inch,
-            bottomMargin=0.5*inch,
-            leftMargin=0.5*inch, 
-            rightMargin=0.5*inch
-        )
+        items = budget_data['items']
+        if paginate is None:
+            paginate = (not isinstance(items, (list, tuple))
+                        or len(items) > self.templates.PAGINATE_FROM_ITEMS)
+        if paginate:
+            total_items = len(items) if hasattr(items, '__len__') else None
+            _PaginatedBudgetDoc(
+                save_path,
+                self._paginated_elements(budget_data),
+                header=self._create_products_header,
+                subtotal=self._create_page_subtotal,
+                progress=progress,
+                total_items=total_items,
+                **PAGE_LAYOUT
+            ).stream()
+            return save_path
+
+        doc = SimpleDocTemplate(save_path, **PAGE_LAYOUT)
+
         elements = []
         
         # Información de la empresa (personalizable)
@@ -108,17 +236,104 @@ class BudgetService:
         footer_info = self._create_footer_info(validity_days, budget_data.get('notes'))
         elements.append(footer_info)
         
+        if progress:
+            doc.setProgressCallBack(self._progress_callback(progress))
+
         # Generar PDF
         doc.build(elements)
         return save_path
 
+    def _paginated_elements(self, budget_data):
+        """Flowables del presupuesto paginado, generados a medida que se dibujan"""
+        yield self._get_company_info()
+        yield Spacer(1, 15)
+        yield self._create_budget_info_table(budget_data)
+        yield Spacer(1, 10)
+
+        yield self._create_products_header()
+        amount = 0.0
+        for item in budget_data['items']:
+            yield self._create_product_row(item)
+            amount += item['subtotal']
+        yield ActionFlowable(('productsEnd',))
+
+        yield Spacer(1, 10)
+        total = budget_data.get('total')
+        yield self._create_total_table(amount if total is None else total)
+        yield Spacer(1, 10)
+        yield self._create_footer_info(budget_data.get('validity_days', 1), budget_data.get('notes'))
+
+    def generate_budgets(self, budgets, output_dir=None, workers=None, on_result=None):
+        """
+        Generar muchos presupuestos en paralelo, uno por núcleo.
+
+        `budgets` puede ser cualquier iterable (por ejemplo un generador que
+        lee un archivo): se consume a medida que hay procesos libres, sin
+        cargarlo entero en memoria. Un presupuesto con error no frena al
+        resto; queda informado en su propio resultado.
+
+        Args:
+            budgets (iterable): diccionarios con la estructura de generate_budget
+            output_dir (str): carpeta de salida (por defecto la del servicio)
+            workers (int): procesos a usar (por defecto, uno por núcleo)
+            on_result (callable): se llama con el resultado de cada presupuesto
+                apenas termina, en el orden en que van terminando
+
+        Returns:
+            dict: 'results' (uno por presupuesto, en el orden de entrada, con
+            index, budget_number, path, error y seconds), 'generated',
+            'failed', 'elapsed' y 'per_second'
+        """
+        output_dir = os.path.abspath(output_dir or self.output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        workers = workers or os.cpu_count() or 1
+
+        results = []
+        started = time.perf_counter()
+        items = enumerate(budgets)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Solo unos pocos trabajos en vuelo por proceso: el resto sigue en el iterable
+            running = set()
+            for index, budget_data in itertools.islice(items, workers * 2):
+                running.add(executor.submit(_render_batch_item, output_dir, index, budget_data))
+
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+                for index, budget_data in itertools.islice(items, len(done)):
+                    running.add(executor.submit(_render_batch_item, output_dir, index, budget_data))
+
+        elapsed = time.perf_counter() - started
+        results.sort(key=lambda result: result['index'])
+        failed = sum(1 for result in results if result['error'])
+        return {
+            'results': results,
+            'generated': len(results) - failed,
+            'failed': failed,
+            'elapsed': elapsed,
+            'per_second': len(results) / elapsed if elapsed else 0.0,
+        }
+
+    def _progress_callback(self, progress):
+        """Adaptar los avisos de ReportLab a progress(hechos, total)"""
+        state = {'total': 0}
+
+        def on_progress(kind, value):
+            if kind == 'SIZE_EST':
+                state['total'] = value
+            elif kind == 'PROGRESS' and state['total']:
+                progress(value, state['total'])
+
+        return on_progress
+
     def _get_company_info(self):
         """Información de la empresa - desde configuración"""
-        company_text = f"""
-        <b>{COMPANY_CONFIG['razon_social']}</b><br/>
-        {COMPANY_CONFIG['direccion']} | Tel: {COMPANY_CONFIG['telefono']} | {COMPANY_CONFIG['email']} | CUIT: {COMPANY_CONFIG['cuit']}
-        """
-        return Paragraph(company_text, self.styles['CompanyInfo'])
+        return self.templates.company_header()
     
     def _create_budget_info_table(self, budget_data):
         """Crear tabla con información del presupuesto y cliente"""
@@ -133,31 +348,15 @@ class BudgetService:
             ['Dirección:', budget_data.get('client_address', ''), '', '', '']
         ]
         
-        table = Table(data, colWidths=[1.2*inch, 2.5*inch, 0.3*inch, 0.8*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (3, 0), (3, 0), 'Helvetica-Bold'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            ('TOPPADDING', (0, 0), (-1, -1), 1),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-            
-            # Si querés una fila específica más compacta (por ejemplo, fila 1):
-            ('FONTSIZE', (0, 1), (-1, 1), 4),
-            ('TOPPADDING', (0, 1), (-1, 1), 0),
-            ('BOTTOMPADDING', (0, 1), (-1, 1), 0),
-        ]))
+        table = Table(data, colWidths=self.templates.INFO_COL_WIDTHS)
+        table.setStyle(self.templates.info_table_style)
 
         return table
     
     def _create_products_table(self, items):
         """Crear tabla de productos"""
         # Encabezados
-        headers = ['Cant.', 'Descripción', 'Marca', 'P. Unit.', 'Subtotal']
-        data = [headers]
+        data = [list(PRODUCTS_HEADERS)]
         
         # Agregar productos
         for item in items:
@@ -170,67 +369,51 @@ class BudgetService:
             ]
             data.append(row)
         
-        # Crear tabla con anchos optimizados
-        table = Table(data, colWidths=[0.5*inch, 3.2*inch, 1.3*inch, 0.8*inch, 0.9*inch])
-        
-        # Aplicar estilos más compactos
-        table.setStyle(TableStyle([
-            # Encabezado
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            
-            # Contenido
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
-            
-            # Bordes
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            # Padding reducido
-            ('LEFTPADDING', (0, 0), (-1, -1), 3),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ]))
+        # Crear tabla con anchos optimizados y el estilo compartido
+        table = Table(data, colWidths=self.templates.PRODUCTS_COL_WIDTHS)
+        table.setStyle(self.templates.products_table_style)
         
         return table
     
+    def _create_products_header(self):
+        """Encabezado de la tabla de productos del modo paginado (se repite en cada página)"""
+        header = Table([list(PRODUCTS_HEADERS)], colWidths=self.templates.PRODUCTS_COL_WIDTHS)
+        header.setStyle(self.templates.products_header_style)
+        # Que no quede solo al pie de una página, separado de la primera fila
+        header.keepWithNext = 1
+        return header
+
+    def _create_product_row(self, item):
+        """Fila de producto del modo paginado"""
+        row = [
+            str(item['quantity']),
+            item['description'],
+            item['brand'],
+            f"${item['unit_price']:.2f}",
+            f"${item['subtotal']:.2f}"
+        ]
+        return _ProductRow(row, item['subtotal'], self.templates.PRODUCTS_COL_WIDTHS,
+                           self.templates.products_row_style)
+
+    def _create_page_subtotal(self, page, amount):
+        """Fila con el subtotal de los productos de una página"""
+        table = Table([['', f"Subtotal página {page}", '', '', f"${amount:.2f}"]],
+                      colWidths=self.templates.PRODUCTS_COL_WIDTHS)
+        table.setStyle(self.templates.products_subtotal_style)
+        return table
+
     def _create_total_table(self, total):
         """Crear tabla con el total"""
         data = [['TOTAL:', f'${total:.2f}']]
         
-        table = Table(data, colWidths=[5.5*inch, 1.2*inch])
-        table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-            ('BOX', (0, 0), (-1, -1), 1.5, colors.black),
-            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4), 
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        table = Table(data, colWidths=self.templates.TOTAL_COL_WIDTHS)
+        table.setStyle(self.templates.total_table_style)
         
         return table
     
     def _create_footer_info(self, validity_days, notes):
         """Crear información del pie de página compacta"""
-        # Crear estilo para el pie de página
-        footer_style = ParagraphStyle(
-            'FooterStyle',
-            parent=self.styles['Normal'],
-            fontSize=9,
-            leftIndent=0,
-            rightIndent=0
-        )
+        footer_style = self.styles['FooterStyle']
         
         validity_text = Paragraph(f"<b>Validez del presupuesto:</b> {validity_days} días", footer_style)
         
@@ -238,20 +421,12 @@ class BudgetService:
             # Si hay notas, crear tabla con 3 columnas: texto1, espaciador, texto2
             notes_text = Paragraph(f"<b>Observaciones:</b> {notes}", footer_style)
             data = [[validity_text, "", notes_text]]  # Columna vacía como espaciador
-            table = Table(data, colWidths=[2.2*inch, 0.8*inch, 3.7*inch])  # Espaciador de 0.8 pulgadas
+            table = Table(data, colWidths=self.templates.FOOTER_COL_WIDTHS)
         else:
             # Si no hay notas, solo mostrar validez
             data = [[validity_text]]
-            table = Table(data, colWidths=[6.7*inch])
+            table = Table(data, colWidths=self.templates.FOOTER_SINGLE_COL_WIDTHS)
         
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-            ('ALIGN', (2, 0), (2, 0), 'LEFT'),  # Alineación para la tercera columna
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ]))
+        table.setStyle(self.templates.footer_table_style)
         
         return table
\ No newline at end of file
@@ -0,0 +1,313 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from db.database import db
+from models.sales import SalesModel
+from services.afip_service import AFIPService
+from services.wsfe_client import WSFEError, MAX_REGISTROS_POR_PEDIDO, es_rechazo_del_comprobante
+
+
+class TokenBucket:
+    """Limitador de ritmo: hasta `capacity` pedidos seguidos y `rate` por segundo sostenidos"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """Esperar un turno. Devuelve False si stop_event se activó mientras tanto"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+class CAEWorker:
+    """
+    Solicitud de CAE en segundo plano.
+
+    Las facturas se guardan como 'pendiente' y la venta termina sin esperar a
+    AFIP. Este hilo toma las pendientes cuyo próximo intento ya venció y pide
+    los CAE en lotes (un FECAESolicitar por cada tramo de números
+    consecutivos del mismo punto de venta y tipo, hasta records_per_request
+    comprobantes), respetando un límite de pedidos por segundo. Solo un
+    rechazo de AFIP por los datos del propio comprobante (resultado 'R' con
+    sus observaciones) deja la factura 'rechazada' con el motivo. Todo lo
+    demás la reprograma con espera exponencial: sin conexión, timeout,
+    servidor caído, una respuesta que no se entiende, un error inesperado, y
+    también un rechazo por errores de la cabecera o por numeración no
+    correlativa, que se deben a otro comprobante. Las pendientes viven en
+    la base, así que sobreviven a un cierre del programa y se retoman al
+    volver a iniciarlo.
+
+    Un pedido que se cortó puede haber llegado a AFIP igual, y reenviarlo
+    daría un número repetido. Por eso, antes de enviar facturas que ya se
+    intentaron, o un grupo que no sigue a uno recién autorizado en la misma
+    pasada (la primera de la pasada, por si el programa se cerró a mitad de
+    un pedido), se concilia con AFIP: las que ya tienen número autorizado
+    toman su CAE con FECompConsultar y solo se envían las que siguen al
+    último autorizado. Si falta un número anterior, las siguientes esperan
+    en lugar de enviarse fuera de orden.
+    """
+
+    def __init__(self, afip_service=None, sales_model=None, rate=2.0, burst=2,
+                 base_delay=5.0, max_delay=900.0, poll_interval=60.0, batch_size=200,
+                 records_per_request=50, on_result=None):
+        if not 1 <= records_per_request <= MAX_REGISTROS_POR_PEDIDO:
+            raise ValueError(f"records_per_request debe estar entre 1 y {MAX_REGISTROS_POR_PEDIDO}")
+        self.afip_service = afip_service or AFIPService()
+        self.sales_model = sales_model or SalesModel()
+        self.base_delay = base_delay        # segundos antes del primer reintento
+        self.max_delay = max_delay          # tope de la espera entre reintentos
+        self.poll_interval = poll_interval  # revisión periódica aunque nadie avise
+        self.batch_size = batch_size                    # facturas leídas de la base por vuelta
+        self.records_per_request = records_per_request  # comprobantes por FECAESolicitar
+        self.on_result = on_result          # on_result(id_factura, estado, detalle), desde este hilo
+
+        self._limiter = TokenBucket(rate, burst)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Iniciar el hilo (no hace nada si ya está corriendo)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cae-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Detener el hilo; lo que quede pendiente se retoma en el próximo inicio"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Avisar que hay una factura nueva para no esperar a la próxima revisión"""
+        self._wakeup.set()
+
+    def retry_delay(self, attempts):
+        """Espera antes del reintento número `attempts`, con jitter para no sincronizar cajas"""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def process_pending(self):
+        """
+        Enviar las pendientes que ya vencieron. Devuelve cuántas se
+        autorizaron, rechazaron y reprogramaron.
+        """
+        counts = {'autorizada': 0, 'rechazada': 0, 'reintento': 0}
+        seen = set()    # cada factura se intenta una sola vez por pasada
+        following = {}  # (punto de venta, tipo) -> número que sigue al último autorizado en esta pasada
+        blocked = set()  # (punto de venta, tipo) con un número sin autorizar: los siguientes esperan
+        while not self._stop.is_set():
+            pending = [invoice for invoice in self.sales_model.get_pending_cae_invoices(self.batch_size)
+                       if invoice.id not in seen]
+            if not pending:
+                break
+            seen.update(invoice.id for invoice in pending)
+            groups, invalid = self._group(pending)
+            # No es un rechazo de AFIP: la venta se reintenta y el error queda registrado
+            for invoice, error in invalid:
+                print(f"Factura {invoice.id} con datos para AFIP inválidos: {error!r}")
+            self._record(counts, [self._retry(invoice, f"Datos para AFIP inválidos: {error}")
+                                  for invoice, error in invalid])
+            for group in groups:
+                key = self._sequence(group[0][1])
+                if key in blocked:
+                    self._record(counts, [self._retry(invoice, "Espera la autorización de un comprobante anterior")
+                                          for invoice, _ in group])
+                    continue
+                if not self._limiter.acquire(self._stop):
+                    return counts
+                # Se concilia si el grupo no sigue a uno recién autorizado o si ya se intentó
+                first = int(group[0][1]['numero_comprobante'])
+                reconcile = following.get(key) != first or any(invoice.cae_intentos for invoice, _ in group)
+                results = self._process_batch(group, reconcile)
+                if any(estado != 'autorizada' for estado, _, _ in results):
+                    blocked.add(key)
+                else:
+                    following[key] = first + len(group)
+                self._record(counts, results)
+        return counts
+
+    def _sequence(self, datos):
+        """Numeración a la que pertenece un comprobante: (punto de venta, tipo)"""
+        return int(datos['punto_venta']), int(datos['tipo_comprobante'])
+
+    def _group(self, pending):
+        """
+        Repartir las pendientes en pedidos: mismo punto de venta y tipo,
+        números consecutivos y ordenados, hasta records_per_request cada uno.
+        Devuelve los grupos de (factura, datos) y las facturas con datos inválidos.
+        """
+        parsed = []
+        invalid = []
+        for invoice in pending:
+            try:
+                datos = json.loads(invoice.afip_datos)
+                key = (int(datos['punto_venta']), int(datos['tipo_comprobante']),
+                       int(datos['numero_comprobante']))
+            except Exception as e:
+                invalid.append((invoice, e))
+                continue
+            parsed.append((key, invoice, datos))
+        parsed.sort(key=lambda item: item[0])
+
+        groups = []
+        current = []
+        previous = None
+        for key, invoice, datos in parsed:
+            if current and (key[:2] != previous[:2] or key[2] != previous[2] + 1
+                            or len(current) >= self.records_per_request):
+                groups.append(current)
+                current = []
+            current.append((invoice, datos))
+            previous = key
+        if current:
+            groups.append(current)
+        return groups, invalid
+
+    def _process_batch(self, group, reconcile=False):
+        """
+        Pedir los CAE de un grupo en un solo pedido y guardar cada resultado.
+        Con reconcile, primero se toma de AFIP lo que ya tiene autorizado.
+        """
+        responses = {}
+        error = None
+        try:
+            to_send = group
+            if reconcile:
+                responses, to_send = self._reconcile(group)
+            if to_send:
+                responses.update(self.afip_service.solicitar_cae_lote([datos for _, datos in to_send]))
+        except (WSFEError, OSError) as e:
+            error = str(e)
+        except Exception as e:
+            print(f"Error inesperado al pedir CAE: {e!r}")
+            error = f"Error inesperado: {e}"
+
+        # Todas las actualizaciones del lote en una sola transacción
+        results = []
+        with db.transaction():
+            for invoice, datos in group:
+                response = responses.get(int(datos['numero_comprobante']))
+                if response is None:
+                    results.append(self._retry(invoice, error or "La respuesta de WSFE no trae el comprobante"))
+                elif response['resultado'] == 'A' and response['cae']:
+                    self.sales_model.update_invoice_cae(invoice.id, response['cae'], response['fecha_vencimiento_cae'])
+                    results.append(('autorizada', invoice.id, response['cae']))
+                elif es_rechazo_del_comprobante(response):
+                    results.append(self._reject(invoice, "; ".join(response['observaciones'])))
+                else:
+                    # Error de la cabecera o de numeración: se reintenta y se concilia antes de reenviar
+                    motivo = "; ".join(response.get('errores') or response.get('observaciones') or [])
+                    results.append(self._retry(invoice, motivo or f"Respuesta de WSFE sin CAE (resultado {response['resultado']!r})"))
+        return results
+
+    def _reconcile(self, group):
+        """
+        Comparar un grupo con el último número que AFIP tiene autorizado.
+
+        Devuelve los resultados de los comprobantes que AFIP ya autorizó
+        ({número: resultado}, leídos con FECompConsultar) y el resto del
+        grupo, que sigue al último autorizado y se puede enviar. Si entre el
+        último autorizado y el grupo falta un número, no se envía nada.
+        """
+        punto_venta, tipo = self._sequence(group[0][1])
+        ultimo = self.afip_service.ultimo_autorizado(punto_venta, tipo)
+        if ultimo is None:
+            return {}, group
+
+        responses = {}
+        to_send = []
+        for invoice, datos in group:
+            numero = int(datos['numero_comprobante'])
+            if numero > ultimo:
+                to_send.append((invoice, datos))
+                continue
+            response = self.afip_service.consultar_comprobante(punto_venta, tipo, numero)
+            if response is None or response['resultado'] != 'A':
+                # AFIP dio el número por usado pero no tiene el CAE: reintentar sin reenviarlo
+                response = {'cae': None, 'resultado': '', 'errores': [
+                    f"AFIP ya usó el número {numero} pero FECompConsultar no devuelve su CAE"
+                ]}
+            responses[numero] = response
+
+        if to_send and int(to_send[0][1]['numero_comprobante']) != ultimo + 1:
+            raise WSFEError(
+                f"Falta autorizar el comprobante {ultimo + 1} antes del {int(to_send[0][1]['numero_comprobante'])}"
+            )
+        return responses, to_send
+
+    def _retry(self, invoice, error):
+        """Reprogramar una factura con espera exponencial"""
+        attempts = invoice.cae_intentos + 1
+        # Los horarios se guardan al segundo: se redondea hacia arriba para no adelantarlo
+        next_attempt = datetime.now() + timedelta(seconds=int(self.retry_delay(attempts)) + 1)
+        self.sales_model.schedule_cae_retry(invoice.id, next_attempt.strftime('%Y-%m-%d %H:%M:%S'), error)
+        return 'reintento', invoice.id, error
+
+    def _reject(self, invoice, motivo):
+        """Marcar una factura como rechazada"""
+        self.sales_model.reject_invoice_cae(invoice.id, motivo)
+        return 'rechazada', invoice.id, motivo
+
+    def _record(self, counts, results):
+        """Sumar los resultados (estado, id_factura, detalle) y avisar cada uno"""
+        for estado, invoice_id, detalle in results:
+            counts[estado] += 1
+            self._notify(invoice_id, estado, detalle)
+
+    def _notify(self, invoice_id, estado, detalle):
+        if self.on_result:
+            try:
+                self.on_result(invoice_id, estado, detalle)
+            except Exception as e:
+                print(f"Error en aviso de CAE: {e}")
+
+    def _seconds_until_next(self):
+        """Segundos hasta el próximo reintento programado (acotado por poll_interval)"""
+        next_attempt = self.sales_model.get_next_cae_attempt()
+        if next_attempt is None:
+            return self.poll_interval
+        if not next_attempt:
+            return 0
+        due = datetime.strptime(next_attempt, '%Y-%m-%d %H:%M:%S')
+        return max(0.0, min(self.poll_interval, (due - datetime.now()).total_seconds()))
+
+    def _run(self):
+        """Hilo de trabajo: procesar, dormir hasta el próximo vencimiento o aviso, repetir"""
+        while not self._stop.is_set():
+            try:
+                self.process_pending()
+                wait = self._seconds_until_next()
+            except Exception as e:
+                print(f"Error en la cola de CAE: {e}")
+                wait = self.poll_interval
+            # Mientras duerme no retiene una conexión del pool
+            db.release_connection()
+            if wait > 0:
+                self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+
+# Instancia global: la inicia main.py y la despierta InvoiceService
+cae_worker = CAEWorker()
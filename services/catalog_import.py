@@ -0,0 +1,337 @@
+import csv
+import os
+import re
+import time
+import unicodedata
+
+from db.database import db
+from models.catalog_cache import catalog_cache
+from models.stock import StockModel, normalize_product_id
+
+try:
+    import openpyxl
+except ImportError:
+    # Sin openpyxl solo se pueden importar archivos CSV
+    openpyxl = None
+
+
+class CatalogImportError(Exception):
+    """El archivo no se puede importar (formato, encabezados o lectura)"""
+
+
+# Nombres aceptados para cada columna del archivo, ya normalizados
+# (minúsculas, sin acentos ni signos)
+COLUMN_ALIASES = {
+    'id': ('id', 'codigo', 'cod', 'code', 'articulo', 'sku'),
+    'name': ('name', 'nombre', 'descripcion', 'detalle', 'producto'),
+    'brand': ('brand', 'marca'),
+    'price': ('price', 'precio', 'precio1', 'preciocosto', 'costo', 'preciolista'),
+    'price2': ('price2', 'precio2', 'precioventa', 'venta'),
+    'quantity': ('quantity', 'cantidad', 'stock', 'existencia'),
+}
+REQUIRED_COLUMNS = ('id', 'name', 'price', 'price2')
+STOCK_COLUMNS = ('id', 'name', 'brand', 'price', 'price2', 'quantity')
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def _normalize_header(text):
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+def parse_number(value):
+    """
+    Convertir un importe escrito a mano o exportado de una planilla.
+
+    Acepta números, "$ 1.234,56", "1234.56" y "1,234.56": si aparecen
+    punto y coma, el último es el separador decimal; una coma sola es
+    decimal, y un punto solo seguido de exactamente tres dígitos ("12.500")
+    se toma como separador de miles, como en las listas de precios locales.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r'[\s$]', '', str(value or ''))
+    if not text:
+        raise ValueError("vacío")
+    if ',' in text and '.' in text:
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.')
+    elif text.count('.') > 1 or re.fullmatch(r'-?\d{1,3}\.\d{3}', text):
+        text = text.replace('.', '')
+    return float(text)
+
+
+def _clean_text(value):
+    """Texto sin espacios sobrantes; los códigos numéricos de Excel (1001.0) pasan a '1001'"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return ' '.join(str(value if value is not None else '').split())
+
+
+class CatalogImporter:
+    """
+    Importación masiva del catálogo desde listas de proveedores (CSV o XLSX).
+
+    El archivo se lee de a una fila: cada fila se valida y normaliza, y las
+    aceptadas se guardan en lotes de `batch_size` en una tabla temporal de
+    la conexión, sin tomar el lock de escritura de la base (las ventas y la
+    cola de CAE siguen escribiendo mientras se lee la planilla). Al final
+    un único INSERT ... SELECT ... ON CONFLICT (upsert) vuelca todo en stock
+    dentro de una transacción corta: si algo falla no queda una importación
+    a medias. Si la carga ocupa más de un lote, los índices de stock y los
+    triggers del índice de búsqueda se quitan durante el volcado y se
+    reconstruyen una sola vez, en lugar de actualizarlos fila por fila.
+
+    Los códigos se normalizan como en el formulario (4 dígitos, con ceros a
+    la izquierda). Las columnas que el archivo no trae no se tocan en los
+    productos que ya existen (una lista de precios sin cantidad no pisa el
+    stock); en los nuevos, la marca queda vacía y la cantidad en 0. Los
+    productos cuyos datos no cambian no se reescriben.
+    """
+
+    def __init__(self, batch_size=5000, iva=None):
+        self.batch_size = batch_size
+        self.iva = iva  # porcentaje a sumar a `price` (como en el formulario de stock)
+
+    def import_file(self, path, sheet=None, progress=None):
+        """Importar un .csv o .xlsx; ver import_rows para el resultado"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.xlsx', '.xlsm'):
+            rows = self.read_xlsx(path, sheet)
+        elif extension in ('.csv', '.txt'):
+            rows = self.read_csv(path)
+        else:
+            raise CatalogImportError(f"Formato no soportado: {extension or path} (use .csv o .xlsx)")
+        return self.import_rows(rows, progress=progress)
+
+    def read_csv(self, path):
+        """
+        Filas de un CSV como listas de texto. El separador (coma, punto y coma
+        o tabulación) se detecta solo; si el archivo no es UTF-8 se lee como
+        Windows-1252, que es como lo guarda Excel.
+        """
+        try:
+            with open(path, 'rb') as f:
+                sample = f.read(65536)
+        except OSError as e:
+            raise CatalogImportError(f"No se pudo abrir {path}: {e}") from e
+
+        try:
+            sample.decode('utf-8')
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError as e:
+            # La muestra puede cortar un carácter de varios bytes al final
+            encoding = 'utf-8-sig' if e.start >= len(sample) - 3 else 'cp1252'
+
+        # Solo líneas completas, para no confundir al detector con una fila cortada
+        text_sample = sample.decode(encoding, errors='ignore').rsplit('\n', 1)[0]
+        try:
+            dialect = csv.Sniffer().sniff(text_sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+
+        with open(path, encoding=encoding, errors='replace' if encoding == 'cp1252' else 'strict', newline='') as f:
+            yield from csv.reader(f, dialect)
+
+    def read_xlsx(self, path, sheet=None):
+        """Filas de una hoja de Excel (la activa si no se indica), en modo de solo lectura"""
+        if openpyxl is None:
+            raise CatalogImportError("Para importar archivos .xlsx hay que instalar openpyxl")
+        try:
+            workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        except Exception as e:
+            raise CatalogImportError(f"No se pudo abrir {path}: {e}") from e
+        try:
+            if sheet is None:
+                worksheet = workbook.active
+            elif sheet in workbook.sheetnames:
+                worksheet = workbook[sheet]
+            else:
+                raise CatalogImportError(f"La planilla no tiene la hoja {sheet}")
+            yield from worksheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def import_rows(self, rows, progress=None):
+        """
+        Importar filas (la primera no vacía es el encabezado).
+
+        progress(filas_leídas) se llama después de cada lote. Devuelve un
+        dict con inserted, updated, unchanged, repeated (filas cuyo código
+        vuelve a aparecer más abajo: vale la última), rejected, errors
+        (lista de (fila, motivo), hasta MAX_REPORTED_ERRORS), elapsed y
+        per_second.
+        """
+        start = time.perf_counter()
+        rows = iter(rows)
+        columns, line_number = self._read_header(rows)
+
+        summary = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'repeated': 0, 'rejected': 0, 'errors': []}
+        read = 0
+
+        conn = db.get_connection()
+        conn.execute("DROP TABLE IF EXISTS temp.catalog_import")
+        conn.execute("""
+            CREATE TEMP TABLE catalog_import (
+                id TEXT PRIMARY KEY, name TEXT, brand TEXT, price REAL, price2 REAL, quantity INTEGER
+            )
+        """)
+        try:
+            # Leer y validar sin el lock de escritura: solo se escribe en la
+            # tabla temporal, que es de esta conexión. Si el código se repite
+            # en el archivo queda la última fila.
+            batch = []
+            try:
+                for line_number, row in enumerate(rows, line_number + 1):
+                    if not any(value not in (None, '') for value in row):
+                        continue
+                    read += 1
+                    try:
+                        batch.append(self._parse_row(row, columns))
+                    except ValueError as e:
+                        summary['rejected'] += 1
+                        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                            summary['errors'].append((line_number, str(e)))
+                        continue
+
+                    if len(batch) >= self.batch_size:
+                        self._stage(conn, batch)
+                        batch = []
+                        if progress:
+                            progress(read)
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise CatalogImportError(f"No se pudo leer la fila {line_number + 1}: {e}") from e
+            if batch:
+                self._stage(conn, batch)
+            staged = conn.execute("SELECT COUNT(*) FROM temp.catalog_import").fetchone()[0]
+
+            # El lock de escritura se toma recién para volcar lo leído en stock
+            with db.transaction() as conn:
+                count_before = conn.execute("SELECT COUNT(*) FROM stock").fetchone()[0]
+                deferred = None
+                if staged > self.batch_size:
+                    # Carga grande: conviene reconstruir índices al final
+                    deferred = self._drop_indexes_and_triggers(conn)
+                changed = conn.execute(self._upsert_query(columns)).rowcount
+                if deferred:
+                    self._restore_indexes_and_triggers(conn, deferred)
+                    # Sin triggers la carga no sumó versiones: avisar el cambio a las otras cajas
+                    conn.execute("UPDATE stock_version SET version = version + 1")
+                summary['inserted'] = conn.execute("SELECT COUNT(*) FROM stock").fetchone()[0] - count_before
+                summary['updated'] = changed - summary['inserted']
+                summary['unchanged'] = staged - changed
+                summary['repeated'] = read - summary['rejected'] - staged
+        finally:
+            conn.rollback()
+            conn.execute("DROP TABLE IF EXISTS temp.catalog_import")
+
+        if progress:
+            progress(read)
+
+        # El catálogo cambió entero: descartar lo que tengan las cachés
+        catalog_cache.clear()
+        StockModel().invalidate_sorted_cache()
+
+        summary['elapsed'] = time.perf_counter() - start
+        summary['per_second'] = read / summary['elapsed'] if summary['elapsed'] > 0 else 0.0
+        return summary
+
+    def _stage(self, conn, batch):
+        """Guardar un lote en la tabla temporal (no bloquea la base para las otras conexiones)"""
+        conn.executemany("INSERT OR REPLACE INTO temp.catalog_import VALUES (?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+
+    def _read_header(self, rows):
+        """Columnas del archivo: {columna de stock: posición}, y la fila del encabezado"""
+        for line_number, row in enumerate(rows, 1):
+            if not row or not any(value not in (None, '') for value in row):
+                continue
+            aliases = {alias: column for column, names in COLUMN_ALIASES.items() for alias in names}
+            columns = {}
+            for position, header in enumerate(row):
+                column = aliases.get(_normalize_header(header))
+                if column and column not in columns:
+                    columns[column] = position
+            missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+            if missing:
+                raise CatalogImportError(
+                    f"Faltan columnas en el encabezado (fila {line_number}): {', '.join(missing)}"
+                )
+            return columns, line_number
+        raise CatalogImportError("El archivo está vacío")
+
+    def _parse_row(self, row, columns):
+        """Validar y normalizar una fila; ValueError con el motivo si se rechaza"""
+        def value(column):
+            position = columns.get(column)
+            return row[position] if position is not None and position < len(row) else None
+
+        if value('id') in (None, ''):
+            raise ValueError("sin código")
+        # Mismo formato que el formulario de stock: Excel guarda 0001 como 1
+        product_id = normalize_product_id(value('id'))
+        name = _clean_text(value('name'))
+        if not name:
+            raise ValueError(f"{product_id}: sin nombre")
+
+        prices = []
+        for column in ('price', 'price2'):
+            try:
+                price = parse_number(value(column))
+            except ValueError:
+                raise ValueError(f"{product_id}: {column} inválido ({value(column)!r})") from None
+            if price < 0:
+                raise ValueError(f"{product_id}: {column} negativo")
+            prices.append(price)
+        price, price2 = prices
+        if self.iva:
+            price = price * (1 + self.iva / 100)
+
+        quantity = 0
+        if 'quantity' in columns:
+            try:
+                quantity = parse_number(value('quantity'))
+            except ValueError:
+                raise ValueError(f"{product_id}: cantidad inválida ({value('quantity')!r})") from None
+            if quantity < 0 or not quantity.is_integer():
+                raise ValueError(f"{product_id}: cantidad inválida ({value('quantity')!r})")
+
+        return (product_id, name, _clean_text(value('brand')), round(price, 2), round(price2, 2), int(quantity))
+
+    def _upsert_query(self, columns):
+        """
+        Upsert desde la tabla temporal que actualiza solo las columnas que
+        trae el archivo, y solo si cambia alguna (así rowcount cuenta
+        insertados + modificados).
+        """
+        updated = [column for column in STOCK_COLUMNS[1:] if column in columns]
+        return f"""
+            INSERT INTO stock (id, name, brand, price, price2, quantity)
+            SELECT id, name, brand, price, price2, quantity FROM temp.catalog_import
+            WHERE true ORDER BY rowid
+            ON CONFLICT (id) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in updated)}
+            WHERE {' OR '.join(f'{column} IS NOT excluded.{column}' for column in updated)}
+        """
+
+    def _drop_indexes_and_triggers(self, conn):
+        """Quitar los índices y triggers de stock; devuelve su SQL para recrearlos"""
+        objects = conn.execute("""
+            SELECT type, name, sql FROM sqlite_master
+            WHERE tbl_name = 'stock' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+        """).fetchall()
+        for kind, name, _ in objects:
+            conn.execute(f'DROP {kind.upper()} "{name}"')
+        return objects
+
+    def _restore_indexes_and_triggers(self, conn, objects):
+        """Recrear índices y triggers y reconstruir el índice de búsqueda una sola vez"""
+        for _, _, sql in objects:
+            conn.execute(sql)
+        if any(name.startswith('stock_fts') for _, name, _ in objects):
+            conn.execute("INSERT INTO stock_fts (stock_fts) VALUES ('rebuild')")
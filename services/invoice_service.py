@@ -1,23 +1,29 @@
+import json
 from datetime import datetime
+from db.database import db
 from models.sales import SalesModel
 from models.stock import StockModel
 from services.afip_service import AFIPService
-from config.settings import COMPANY_CONFIG
+from services.cae_worker import cae_worker
 
 class InvoiceService:
     def __init__(self):
         self.sales_model = SalesModel()
         self.stock_model = StockModel()
         self.afip_service = AFIPService()
+        self.cae_worker = cae_worker
     
     def create_invoice(self, customer_data, products_data):
         """
         Crear una factura completa:
         1. Validar datos
-        2. Obtener CAE de AFIP
-        3. Guardar en base de datos
-        4. Generar PDF
-        5. Actualizar stock
+        2. Reservar el número, guardar la factura como pendiente de CAE y
+           actualizar el stock, todo en una transacción
+        3. Encolar el pedido de CAE
+
+        El CAE lo pide CAEWorker en segundo plano (con reintentos si AFIP no
+        responde), así la venta no espera a la red. Cuando llega se guarda
+        con SalesModel.update_invoice_cae y la factura pasa a 'autorizada'.
         """
         try:
             # 1. Validar datos
@@ -26,61 +32,57 @@ class InvoiceService:
             # 2. Calcular totales
             totals = self._calculate_totals(products_data)
             
-            # 3. Obtener siguiente número de factura
-            numero_factura = self.afip_service.obtener_siguiente_numero_comprobante()
-            
-            # 4. Preparar datos para AFIP
-            afip_data = self._prepare_afip_data(customer_data, totals, numero_factura)
-            
-            # 5. Obtener CAE de AFIP
-            cae_response = self.afip_service.obtener_cae(afip_data)
-            
-            if cae_response['resultado'] != 'A':
-                raise Exception(f"AFIP rechazó la factura: {cae_response.get('errores', 'Error desconocido')}")
-            
-            # 6. Preparar datos de la factura para BD
-            invoice_data = {
-                'numero_factura': numero_factura,
-                'fecha_emision': datetime.now().strftime('%Y-%m-%d'),
-                'cae': cae_response['cae'],
-                'fecha_vencimiento_cae': cae_response['fecha_vencimiento_cae'],
-                'cliente_nombre': customer_data['nombre'],
-                'cliente_cuit': customer_data.get('documento', ''),
-                'cliente_domicilio': customer_data.get('direccion', ''),
-                'cliente_condicion_iva': customer_data.get('condicion_iva', 'Consumidor Final'),
-                'subtotal': totals['subtotal'],
-                'iva': totals['iva'],
-                'total': totals['total'],
-                'estado': 'autorizada'
-            }
-            
-            # 7. Preparar items para BD
+            # 3. Preparar items para BD
             items_data = []
             for product in products_data:
                 items_data.append({
                     'producto_id': product['code'],
                     'producto_nombre': product['name'],
+                    'producto_marca': product.get('brand'),
                     'cantidad': product['quantity'],
                     'precio_unitario': product['price'],
                     'subtotal': product['subtotal']
                 })
-            
-            # 8. Guardar en base de datos
-            invoice_id = self.sales_model.create_invoice(invoice_data, items_data)
-            
-            # 9. Actualizar stock
+
+            quantities = {}
             for product in products_data:
-                self.stock_model.reduce_quantity(product['code'], product['quantity'])
+                quantities[product['code']] = quantities.get(product['code'], 0) + product['quantity']
+
+            # 4. Número, factura y stock en una única transacción: si falta
+            # stock o algo falla, el número reservado vuelve atrás con el resto
+            with db.transaction():
+                numero_factura = self.sales_model.get_next_invoice_number()
+
+                # Datos para AFIP (el CAE se pide después)
+                afip_data = self._prepare_afip_data(customer_data, totals, numero_factura)
+
+                invoice_data = {
+                    'numero_factura': numero_factura,
+                    'fecha_emision': datetime.now().strftime('%Y-%m-%d'),
+                    'cae': None,
+                    'fecha_vencimiento_cae': None,
+                    'cliente_nombre': customer_data['nombre'],
+                    'cliente_cuit': customer_data.get('documento', ''),
+                    'cliente_domicilio': customer_data.get('direccion', ''),
+                    'cliente_condicion_iva': customer_data.get('condicion_iva', 'Consumidor Final'),
+                    'subtotal': totals['subtotal'],
+                    'iva': totals['iva'],
+                    'total': totals['total'],
+                    'estado': 'pendiente',
+                    'afip_datos': json.dumps(afip_data)
+                }
+                invoice_id = self.sales_model.create_invoice(invoice_data, items_data)
+                self.stock_model.reduce_quantities(quantities)
             
-            # 10. Generar PDF
-            pdf_filename = self._generate_pdf(invoice_data, customer_data, products_data, cae_response)
+            # 5. Pedir el CAE en segundo plano
+            self.cae_worker.wake()
             
             return {
                 'success': True,
                 'invoice_id': invoice_id,
                 'numero_factura': numero_factura,
-                'cae': cae_response['cae'],
-                'pdf_filename': pdf_filename,
+                'estado': 'pendiente',
+                'cae': None,
                 'total': totals['total']
             }
             
@@ -144,38 +146,10 @@ class InvoiceService:
             'importe_iva': totals['iva']
         }
     
-    def _generate_pdf(self, invoice_data, customer_data, products_data, cae_response):
-        """Generar PDF de la factura"""
-        # Datos de la empresa (deberías moverlos a config)
-        datos_empresa = {
-            'razon_social': {COMPANY_CONFIG['razon_social']},
-            'cuit': {COMPANY_CONFIG['cuit']},
-            'direccion': {COMPANY_CONFIG['direccion']},
-            'localidad': {COMPANY_CONFIG['localidad']},
-            'provincia': {COMPANY_CONFIG['provincia']},
-            'punto_venta': 1,
-            'numero': int(invoice_data['numero_factura'].split('-')[1])
-        }
-        
-        # Datos de la factura para PDF
-        datos_factura = {
-            'cae': cae_response['cae'],
-            'vencimiento_cae': cae_response['fecha_vencimiento_cae'],
-            'numero_comprobante': int(invoice_data['numero_factura'].split('-')[1]),
-            'punto_venta': int(invoice_data['numero_factura'].split('-')[0]),
-            'tipo_comprobante': 6,
-            'fecha': datetime.now().strftime('%Y%m%d'),
-            'cuit': '20445515559',
-            'importe_total': invoice_data['total']
-        }
-        
-        # Generar PDF
-        filename = self.pdf_generator.generar_factura_pdf(
-            datos_factura, datos_empresa, customer_data, products_data
-        )
-        
-        return filename
-    
+    def get_pending_cae_count(self):
+        """Cantidad de facturas que todavía esperan CAE"""
+        return self.sales_model.count_pending_cae()
+
     def get_invoice_details(self, invoice_id):
         """Obtener detalles completos de una factura"""
         invoice = self.sales_model.get_invoice_by_id(invoice_id)
@@ -0,0 +1,251 @@
+import copy
+import threading
+
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, TableStyle
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from config.settings import COMPANY_CONFIG
+
+
+class PdfTemplates:
+    """
+    Plantillas de ReportLab compartidas por todo el proceso.
+
+    Los estilos, el encabezado de la empresa y los TableStyle no cambian de
+    un documento a otro, así que se arman una sola vez (la primera vez que
+    se usan) y cada presupuesto solo paga su propio contenido. Los estilos y
+    TableStyle solo se leen al dibujar, por eso se comparten tal cual entre
+    hilos; el encabezado es un Paragraph que guarda estado al maquetarse y
+    se entrega como copia.
+    """
+
+    # Anchos de columna de cada tabla
+    INFO_COL_WIDTHS = [1.2*inch, 2.5*inch, 0.3*inch, 0.8*inch, 1.5*inch]
+    PRODUCTS_COL_WIDTHS = [0.5*inch, 3.2*inch, 1.3*inch, 0.8*inch, 0.9*inch]
+    TOTAL_COL_WIDTHS = [5.5*inch, 1.2*inch]
+    FOOTER_COL_WIDTHS = [2.2*inch, 0.8*inch, 3.7*inch]  # validez, espaciador, notas
+    FOOTER_SINGLE_COL_WIDTHS = [6.7*inch]
+
+    # A partir de cuántos items un presupuesto se arma en modo paginado (más o
+    # menos los que entran en la primera página junto a los datos del cliente)
+    PAGINATE_FROM_ITEMS = 33
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _build(self):
+        """Armar todas las plantillas (una sola vez por proceso)"""
+        with self._lock:
+            if self._ready:
+                return
+            self._build_styles()
+            self._build_table_styles()
+            self._company_header = Paragraph(self._company_text(), self._styles['CompanyInfo'])
+            self._ready = True
+
+    def _build_styles(self):
+        """Hoja de estilos con los estilos propios de los documentos"""
+        styles = getSampleStyleSheet()
+        styles.add(ParagraphStyle(
+            name='CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=15,
+            alignment=1,
+            textColor=colors.darkblue
+        ))
+
+        styles.add(ParagraphStyle(
+            name='CompanyInfo',
+            parent=styles['Normal'],
+            fontSize=9,
+            alignment=1,
+            spaceAfter=10
+        ))
+
+        styles.add(ParagraphStyle(
+            name='ClientInfo',
+            parent=styles['Normal'],
+            fontSize=9,
+            spaceAfter=5
+        ))
+
+        styles.add(ParagraphStyle(
+            name='FooterStyle',
+            parent=styles['Normal'],
+            fontSize=9,
+            leftIndent=0,
+            rightIndent=0
+        ))
+        self._styles = styles
+
+    def _build_table_styles(self):
+        """TableStyle reutilizables de las tablas del presupuesto"""
+        self._info_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (3, 0), (3, 0), 'Helvetica-Bold'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+
+            # Fila separadora más compacta
+            ('FONTSIZE', (0, 1), (-1, 1), 4),
+            ('TOPPADDING', (0, 1), (-1, 1), 0),
+            ('BOTTOMPADDING', (0, 1), (-1, 1), 0),
+        ])
+
+        self._products_table_style = TableStyle([
+            # Encabezado
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+
+            # Contenido
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
+
+            # Bordes
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+            # Padding reducido
+            ('LEFTPADDING', (0, 0), (-1, -1), 3),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ])
+
+        # Modo paginado: cada fila (encabezado, producto o subtotal de la página)
+        # es una tabla de una fila, con el mismo aspecto que la tabla de productos
+        products_row_grid = [
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 3),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ]
+        self._products_header_style = TableStyle(products_row_grid + [
+            ('BACKGROUND', (0, 0), (-1, -1), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ])
+        products_row = products_row_grid + [
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (1, 0), (1, 0), 'LEFT'),
+            ('ALIGN', (3, 0), (-1, 0), 'RIGHT'),
+        ]
+        self._products_row_style = TableStyle(products_row)
+        self._products_subtotal_style = TableStyle(products_row + [
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+        ])
+
+        self._total_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+            ('BOX', (0, 0), (-1, -1), 1.5, colors.black),
+            ('LEFTPADDING', (0, 0), (-1, -1), 4),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ])
+
+        self._footer_table_style = TableStyle([
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (2, 0), (2, 0), 'LEFT'),  # Alineación para la tercera columna
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+
+    def _company_text(self):
+        """Texto del encabezado de la empresa, desde configuración"""
+        return f"""
+        <b>{COMPANY_CONFIG['razon_social']}</b><br/>
+        {COMPANY_CONFIG['direccion']} | Tel: {COMPANY_CONFIG['telefono']} | {COMPANY_CONFIG['email']} | CUIT: {COMPANY_CONFIG['cuit']}
+        """
+
+    @property
+    def styles(self):
+        if not self._ready:
+            self._build()
+        return self._styles
+
+    @property
+    def info_table_style(self):
+        if not self._ready:
+            self._build()
+        return self._info_table_style
+
+    @property
+    def products_table_style(self):
+        if not self._ready:
+            self._build()
+        return self._products_table_style
+
+    @property
+    def products_header_style(self):
+        if not self._ready:
+            self._build()
+        return self._products_header_style
+
+    @property
+    def products_row_style(self):
+        if not self._ready:
+            self._build()
+        return self._products_row_style
+
+    @property
+    def products_subtotal_style(self):
+        if not self._ready:
+            self._build()
+        return self._products_subtotal_style
+
+    @property
+    def total_table_style(self):
+        if not self._ready:
+            self._build()
+        return self._total_table_style
+
+    @property
+    def footer_table_style(self):
+        if not self._ready:
+            self._build()
+        return self._footer_table_style
+
+    def company_header(self):
+        """Encabezado de la empresa listo para agregar a un documento"""
+        if not self._ready:
+            self._build()
+        # Copia superficial: comparte el texto ya parseado, no el estado de maquetado
+        return copy.copy(self._company_header)
+
+    def reset(self):
+        """Descartar las plantillas (por ejemplo si cambió la configuración de la empresa)"""
+        with self._lock:
+            self._ready = False
+
+
+# Instancia global compartida por todos los servicios de PDF
+pdf_templates = PdfTemplates()
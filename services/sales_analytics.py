@@ -0,0 +1,280 @@
+from array import array
+from collections import namedtuple
+
+from db.database import db
+
+try:
+    import numpy as np
+except ImportError:
+    # Sin NumPy se usan array de la biblioteca estándar y bucles de Python
+    np = None
+
+# Resultado por producto de los rankings
+ProductSales = namedtuple('ProductSales', [
+    'product_id', 'name', 'brand', 'units', 'revenue', 'lines', 'stock', 'sell_through', 'abc',
+])
+
+# Resultado por marca
+BrandSales = namedtuple('BrandSales', ['brand', 'products', 'units', 'revenue', 'share'])
+
+
+class SalesSnapshot:
+    """
+    Ventas por producto de un período, en columnas.
+
+    Cada producto (los del catálogo y los vendidos que ya no están) ocupa una
+    posición fija en todas las columnas: unidades, facturación, renglones y
+    stock actual. Con NumPy las columnas son ndarray y los rankings se
+    calculan con operaciones vectorizadas.
+    """
+
+    def __init__(self, ids, names, brands, units, revenue, lines, stock):
+        self.ids = ids
+        self.names = names
+        self.brands = brands
+        self.units = units
+        self.revenue = revenue
+        self.lines = lines
+        self.stock = stock
+        self._abc = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def total_units(self):
+        return int(sum(self.units))
+
+    @property
+    def total_revenue(self):
+        return float(sum(self.revenue))
+
+    def top_sellers(self, n=10, by='revenue'):
+        """Los n productos más vendidos por 'revenue' (facturación) o 'units'"""
+        column = self._sort_column(by)
+        return [self.product(i) for i in _order(column, descending=True)[:n] if column[i] > 0]
+
+    def slow_movers(self, n=10):
+        """Productos con stock que menos se vendieron (a igualdad, los de más stock primero)"""
+        if np is not None:
+            with_stock = np.flatnonzero(self.stock > 0)
+            order = with_stock[np.lexsort((-self.stock[with_stock], self.units[with_stock]))]
+        else:
+            order = sorted((i for i in range(len(self)) if self.stock[i] > 0),
+                           key=lambda i: (self.units[i], -self.stock[i]))
+        return [self.product(i) for i in order[:n]]
+
+    def sell_through(self):
+        """Unidades vendidas / (vendidas + stock actual), por producto"""
+        if np is not None:
+            available = self.units + np.maximum(self.stock, 0)
+            return np.divide(self.units, available, out=np.zeros(len(self)), where=available > 0)
+        result = array('d', bytes(8 * len(self)))
+        for i in range(len(self)):
+            available = self.units[i] + max(self.stock[i], 0)
+            if available > 0:
+                result[i] = self.units[i] / available
+        return result
+
+    def abc_classes(self, a=0.8, b=0.95):
+        """
+        Clase ABC de cada producto según la facturación: A hasta el `a` del
+        total acumulado, B hasta el `b` y C el resto (y los que no vendieron).
+        """
+        if np is not None:
+            order = np.argsort(-self.revenue, kind='stable')
+            ranked = self.revenue[order]
+            before = np.cumsum(ranked) - ranked  # acumulado antes de cada producto
+            total = ranked.sum()
+            classes = np.full(len(self), 'C', dtype='<U1')
+            classes[order] = np.where(
+                ranked <= 0, 'C', np.where(before < a * total, 'A', np.where(before < b * total, 'B', 'C'))
+            )
+            return classes
+
+        classes = ['C'] * len(self)
+        total = sum(self.revenue)
+        before = 0.0
+        for i in _order(self.revenue, descending=True):
+            revenue = self.revenue[i]
+            if revenue <= 0:
+                break
+            classes[i] = 'A' if before < a * total else ('B' if before < b * total else 'C')
+            before += revenue
+        return classes
+
+    def abc_summary(self, a=0.8, b=0.95):
+        """Cantidad de productos y participación en la facturación de cada clase"""
+        classes = self.abc_classes(a, b)
+        total = self.total_revenue or 1.0
+        summary = {name: {'products': 0, 'revenue': 0.0} for name in 'ABC'}
+        for i, name in enumerate(classes):
+            summary[name]['products'] += 1
+            summary[name]['revenue'] += float(self.revenue[i])
+        for values in summary.values():
+            values['share'] = values['revenue'] / total
+        return summary
+
+    def by_brand(self):
+        """Ventas agregadas por marca, de mayor a menor facturación"""
+        brand_names = sorted(set(self.brands))
+        position = {brand: k for k, brand in enumerate(brand_names)}
+        keys = [position[brand] for brand in self.brands]
+
+        if np is not None:
+            keys = np.array(keys, dtype=np.int64)
+            units = np.bincount(keys, weights=self.units, minlength=len(brand_names))
+            revenue = np.bincount(keys, weights=self.revenue, minlength=len(brand_names))
+            products = np.bincount(keys, weights=self.units > 0, minlength=len(brand_names))
+        else:
+            units = [0] * len(brand_names)
+            revenue = [0.0] * len(brand_names)
+            products = [0] * len(brand_names)
+            for i, k in enumerate(keys):
+                units[k] += self.units[i]
+                revenue[k] += self.revenue[i]
+                products[k] += self.units[i] > 0
+
+        total = self.total_revenue or 1.0
+        result = [
+            BrandSales(brand, int(products[k]), int(units[k]), float(revenue[k]), float(revenue[k]) / total)
+            for k, brand in enumerate(brand_names)
+        ]
+        result.sort(key=lambda row: row.revenue, reverse=True)
+        return result
+
+    def product(self, i):
+        """Fila de resultados del producto en la posición i"""
+        if self._abc is None:
+            self._abc = self.abc_classes()
+        units = int(self.units[i])
+        stock = int(self.stock[i])
+        available = units + max(stock, 0)
+        return ProductSales(
+            self.ids[i], self.names[i], self.brands[i], units, float(self.revenue[i]),
+            int(self.lines[i]), stock, units / available if available else 0.0, str(self._abc[i]),
+        )
+
+    def _sort_column(self, by):
+        if by == 'revenue':
+            return self.revenue
+        if by == 'units':
+            return self.units
+        raise ValueError(f"Criterio de ranking desconocido: {by}")
+
+
+def _order(column, descending=False):
+    """Posiciones ordenadas por el valor de la columna (estable)"""
+    if np is not None:
+        return np.argsort(-column if descending else column, kind='stable')
+    return sorted(range(len(column)), key=column.__getitem__, reverse=descending)
+
+
+class SalesAnalytics:
+    """
+    Análisis de ventas por producto sobre factura_items.
+
+    El historial se recorre en tramos de facturas consecutivas: SQLite
+    agrupa cada tramo por producto y acá solo se suman los parciales en
+    columnas indexadas por producto. La memoria depende del tamaño del
+    tramo y de la cantidad de productos, no de la cantidad de renglones.
+    Solo cuentan las facturas autorizadas.
+    """
+
+    CHUNK_QUERY = """
+        SELECT i.producto_id, SUM(i.cantidad), SUM(i.subtotal), COUNT(*)
+        FROM factura_items i
+        CROSS JOIN facturas f ON f.id = i.factura_id
+        WHERE i.factura_id BETWEEN ? AND ? AND f.estado = 'autorizada' {date_filter}
+        GROUP BY i.producto_id
+    """
+
+    # Nombre y marca registrados de productos que ya no están en el catálogo
+    UNLISTED_QUERY = """
+        SELECT producto_id, MAX(producto_nombre), MAX(producto_marca)
+        FROM factura_items
+        WHERE factura_id BETWEEN ? AND ? AND producto_id IN ({placeholders})
+        GROUP BY producto_id
+    """
+
+    def __init__(self, chunk_invoices=50000):
+        self.chunk_invoices = chunk_invoices  # facturas por tramo
+
+    def load(self, start_date=None, end_date=None, progress=None):
+        """
+        Ventas por producto entre dos fechas (inclusive; sin fechas, todo el
+        historial). progress(hechas, total) se llama después de cada tramo.
+        """
+        ids, names, brands = [], [], []
+        units, revenue, lines, stock = array('q'), array('d'), array('q'), array('q')
+        index = {}
+
+        # Todos los productos del catálogo, aunque no se hayan vendido (para stock y lentos)
+        cursor = db.get_connection().execute("SELECT id, name, brand, quantity FROM stock")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for product_id, name, brand, quantity in rows:
+                index[str(product_id)] = len(ids)
+                ids.append(str(product_id))
+                names.append(name)
+                brands.append(brand or '')
+                stock.append(quantity or 0)
+        units.extend([0] * len(ids))
+        revenue.extend([0.0] * len(ids))
+        lines.extend([0] * len(ids))
+
+        date_filter = ''
+        date_params = ()
+        if start_date and end_date:
+            date_filter = 'AND f.fecha_emision BETWEEN ? AND ?'
+            date_params = (start_date, end_date)
+            first, last = db.fetch_one(
+                "SELECT MIN(id), MAX(id) FROM facturas WHERE fecha_emision BETWEEN ? AND ?", date_params
+            )
+        else:
+            first, last = db.fetch_one("SELECT MIN(id), MAX(id) FROM facturas")
+
+        if first is not None:
+            query = self.CHUNK_QUERY.format(date_filter=date_filter)
+            total_chunks = (last - first) // self.chunk_invoices + 1
+            for chunk, low in enumerate(range(first, last + 1, self.chunk_invoices), 1):
+                high = min(last, low + self.chunk_invoices - 1)
+                rows = db.fetch_all(query, (low, high) + date_params)
+                unlisted = [row[0] for row in rows if str(row[0]) not in index]
+                for product_id, (name, brand) in self._describe(unlisted, low, high).items():
+                    # Vendido pero ya no está en el catálogo
+                    index[str(product_id)] = len(ids)
+                    ids.append(str(product_id))
+                    names.append(name or '')
+                    brands.append(brand or '')
+                    units.append(0)
+                    revenue.append(0.0)
+                    lines.append(0)
+                    stock.append(0)
+
+                for product_id, sold, amount, count in rows:
+                    i = index[str(product_id)]
+                    units[i] += sold or 0
+                    revenue[i] += amount or 0.0
+                    lines[i] += count
+                if progress:
+                    progress(chunk, total_chunks)
+
+        if np is not None:
+            units, revenue, lines, stock = (
+                np.frombuffer(column, dtype=np.int64 if column.typecode == 'q' else np.float64).copy()
+                for column in (units, revenue, lines, stock)
+            )
+        return SalesSnapshot(ids, names, brands, units, revenue, lines, stock)
+
+    def _describe(self, product_ids, low, high):
+        """Nombre y marca de productos sin catálogo, tomados de sus items en el tramo"""
+        described = {}
+        for start in range(0, len(product_ids), 500):
+            batch = product_ids[start:start + 500]
+            query = self.UNLISTED_QUERY.format(placeholders=', '.join('?' * len(batch)))
+            for product_id, name, brand in db.fetch_all(query, [low, high] + batch):
+                described[product_id] = (name, brand)
+        return described
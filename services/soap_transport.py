@@ -0,0 +1,78 @@
+import http.client
+import threading
+from urllib.parse import urlsplit
+
+
+class SoapTransport:
+    """
+    Conexión HTTP(S) persistente para los pedidos SOAP a AFIP.
+
+    urllib abre una conexión (y un handshake TLS) por pedido; acá la misma
+    conexión se reutiliza mientras el servidor la mantenga abierta. Si una
+    conexión reutilizada resulta estar cerrada se reabre y, si el pedido es
+    idempotente (loginCms y las consultas de WSFE), se reenvía una vez. Los
+    pedidos se serializan con un lock, así que una instancia se puede
+    compartir entre hilos.
+    """
+
+    def __init__(self, url, timeout=10.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"URL no soportada: {url}")
+        self.url = url
+        self.timeout = timeout
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path or '/'
+        if parts.query:
+            self._path += '?' + parts.query
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def post(self, body, headers, idempotent=True):
+        """
+        Enviar un POST y devolver (status, contenido).
+        Los errores de red se propagan como OSError o http.client.HTTPException.
+
+        Con idempotent=False el pedido nunca se reenvía solo: si la conexión
+        se cortó no se sabe si llegó al servidor (un FECAESolicitar repetido
+        volvería como número duplicado), así que el error se propaga y el que
+        llama decide cómo seguir.
+        """
+        with self._lock:
+            reused = self._conn is not None
+            try:
+                return self._post(body, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not (reused and idempotent):
+                    raise
+            # El servidor cerró la conexión mientras estaba inactiva: se usa una nueva
+            return self._post(body, headers)
+
+    def _post(self, body, headers):
+        conn = self._connection()
+        try:
+            conn.request('POST', self._path, body=body, headers=headers)
+            response = conn.getresponse()
+            content = response.read()
+        except Exception:
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        return response.status, content
+
+    def _connection(self):
+        if self._conn is None:
+            if self._scheme == 'https':
+                self._conn = http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout)
+            else:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        """Cerrar la conexión (la próxima se abre al enviar)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
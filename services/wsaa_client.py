@@ -0,0 +1,188 @@
+import base64
+import http.client
+import os
+import subprocess
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+
+from services.soap_transport import SoapTransport
+from services.wsfe_client import WSFEError
+
+# Endpoints del Web Service de Autenticación y Autorización (WSAA)
+WSAA_HOMOLOGACION_URL = "https://wsaahomo.afip.gov.ar/ws/services/LoginCms"
+WSAA_PRODUCCION_URL = "https://wsaa.afip.gov.ar/ws/services/LoginCms"
+
+SOAP_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+WSAA_NS = "http://wsaa.view.sua.dvadac.desein.afip.gov"
+
+# Un solo login a la vez en todo el proceso: WSAA rechaza pedir un ticket
+# nuevo mientras el anterior sigue vigente
+_login_lock = threading.Lock()
+
+
+class WSAAError(WSFEError):
+    """No se pudo obtener el ticket de acceso (se reintenta como cualquier error de WSFE)"""
+
+
+class AccessTicket:
+    """Ticket de acceso (TA) de WSAA: token, sign y vencimiento"""
+
+    def __init__(self, token, sign, expiration, xml=None):
+        self.token = token
+        self.sign = sign
+        self.expiration = expiration  # datetime con zona horaria
+        self.xml = xml
+
+    @classmethod
+    def from_xml(cls, xml):
+        """Leer un loginTicketResponse (el contenido de TA.xml)"""
+        root = ET.fromstring(xml)
+        token = root.findtext('credentials/token')
+        sign = root.findtext('credentials/sign')
+        expiration = root.findtext('header/expirationTime')
+        if not token or not sign or not expiration:
+            raise ValueError("El ticket de acceso no trae token, sign o vencimiento")
+        return cls(token.strip(), sign.strip(), datetime.fromisoformat(expiration.strip()), xml)
+
+    def seconds_left(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        return (self.expiration - now).total_seconds()
+
+
+class WSAAClient:
+    """
+    Ticket de acceso para un servicio de AFIP, con cache en memoria y en disco.
+
+    El TA dura unas 12 horas y WSAA no entrega otro mientras siga vigente,
+    así que se guarda en ta_path (TA.xml) y se reutiliza, incluso entre
+    reinicios del programa. Se renueva cuando le quedan menos de
+    refresh_margin segundos; si la renovación falla y el ticket actual
+    todavía no venció, se sigue usando. Firmar el pedido de login (CMS)
+    requiere el certificado, la clave privada y openssl.
+    """
+
+    def __init__(self, cert_path, key_path, url=WSAA_HOMOLOGACION_URL, service='wsfe',
+                 ta_path=None, timeout=10.0, refresh_margin=600, openssl='openssl'):
+        self.cert_path = cert_path
+        self.key_path = key_path
+        self.url = url
+        self.service = service
+        self.ta_path = ta_path
+        self.refresh_margin = refresh_margin
+        self.openssl = openssl
+        self.transport = SoapTransport(url, timeout)
+        self._ticket = None
+
+    def get_ticket(self):
+        """Ticket vigente, renovándolo si está por vencer"""
+        ticket = self._ticket
+        if ticket is not None and ticket.seconds_left() > self.refresh_margin:
+            return ticket
+
+        with _login_lock:
+            # Otro hilo (u otro proceso, vía TA.xml) puede haberlo renovado mientras tanto
+            ticket = self._fresher(self._ticket, self._load())
+            if ticket is None or ticket.seconds_left() <= self.refresh_margin:
+                try:
+                    ticket = self._login()
+                    self._save(ticket)
+                except WSAAError:
+                    if ticket is None or ticket.seconds_left() <= 0:
+                        raise
+                    print("No se pudo renovar el ticket de acceso; se usa el actual hasta que venza")
+            self._ticket = ticket
+            return ticket
+
+    def _fresher(self, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if a.expiration >= b.expiration else b
+
+    def _load(self):
+        """Ticket guardado en disco, si existe y se puede leer"""
+        if not self.ta_path or not os.path.exists(self.ta_path):
+            return None
+        try:
+            with open(self.ta_path, encoding='utf-8') as f:
+                return AccessTicket.from_xml(f.read())
+        except (OSError, ValueError, ET.ParseError) as e:
+            print(f"Ticket de acceso inválido en {self.ta_path}: {e}")
+            return None
+
+    def _save(self, ticket):
+        """Guardar el ticket en disco (escritura atómica, solo legible por el usuario)"""
+        if not self.ta_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ta_path)), exist_ok=True)
+            tmp_path = self.ta_path + '.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(ticket.xml)
+            os.replace(tmp_path, self.ta_path)
+        except OSError as e:
+            print(f"No se pudo guardar el ticket de acceso: {e}")
+
+    def _login(self):
+        """Pedir un ticket nuevo a WSAA (loginCms)"""
+        cms = self._sign(self._login_ticket_request())
+        envelope = (
+            f'<?xml version="1.0" encoding="utf-8"?>'
+            f'<soap:Envelope xmlns:soap="{SOAP_NS}" xmlns:wsaa="{WSAA_NS}">'
+            f'<soap:Body><wsaa:loginCms><wsaa:in0>{cms}</wsaa:in0></wsaa:loginCms></soap:Body>'
+            f'</soap:Envelope>'
+        ).encode('utf-8')
+        headers = {'Content-Type': 'text/xml; charset=utf-8', 'SOAPAction': '""'}
+
+        try:
+            status, content = self.transport.post(envelope, headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise WSAAError(f"No se pudo conectar con WSAA: {e}") from e
+
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            raise WSAAError(f"Respuesta inválida de WSAA (HTTP {status}): {e}") from e
+        fault = root.find(f'.//{{{SOAP_NS}}}Fault')
+        if fault is not None:
+            raise WSAAError(f"WSAA devolvió un error: {fault.findtext('faultstring', '').strip()}")
+        response = root.find(f'.//{{{WSAA_NS}}}loginCmsReturn')
+        if response is None:
+            response = root.find('.//loginCmsReturn')
+        if response is None or not (response.text or '').strip():
+            raise WSAAError(f"La respuesta de WSAA no trae el ticket (HTTP {status})")
+
+        try:
+            return AccessTicket.from_xml(response.text.strip())
+        except (ValueError, ET.ParseError) as e:
+            raise WSAAError(f"Ticket de acceso inválido: {e}") from e
+
+    def _login_ticket_request(self):
+        """Pedido de ticket (TRA) válido por 10 minutos"""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<loginTicketRequest version="1.0"><header>'
+            f'<uniqueId>{int(time.time())}</uniqueId>'
+            f'<generationTime>{(now - timedelta(minutes=10)).isoformat()}</generationTime>'
+            f'<expirationTime>{(now + timedelta(minutes=10)).isoformat()}</expirationTime>'
+            f'</header><service>{self.service}</service></loginTicketRequest>'
+        )
+
+    def _sign(self, tra):
+        """Firmar el TRA como CMS con el certificado y devolverlo en base64"""
+        try:
+            result = subprocess.run(
+                [self.openssl, 'smime', '-sign', '-signer', self.cert_path, '-inkey', self.key_path,
+                 '-outform', 'DER', '-nodetach'],
+                input=tra.encode('utf-8'), capture_output=True, check=True,
+            )
+        except FileNotFoundError as e:
+            raise WSAAError(f"No se encontró openssl para firmar el pedido de acceso: {e}") from e
+        except subprocess.CalledProcessError as e:
+            raise WSAAError(f"No se pudo firmar el pedido de acceso: {e.stderr.decode(errors='replace').strip()}") from e
+        return base64.b64encode(result.stdout).decode('ascii')
@@ -0,0 +1,293 @@
+import http.client
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from services.soap_transport import SoapTransport
+
+# Endpoints del Web Service de Factura Electrónica (WSFEv1)
+WSFE_HOMOLOGACION_URL = "https://wswhomo.afip.gov.ar/wsfev1/service.asmx"
+WSFE_PRODUCCION_URL = "https://servicios1.afip.gov.ar/wsfev1/service.asmx"
+
+SOAP_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+WSFE_NS = "http://ar.gov.afip.dif.FEV1/"
+
+# Alícuota de IVA 21% según la tabla de AFIP
+IVA_21_ID = 5
+
+# Máximo de comprobantes por FECAESolicitar (FEParamGetCantMaxRegistrosx)
+MAX_REGISTROS_POR_PEDIDO = 250
+
+# FECompConsultar: "no existen datos" para el comprobante pedido
+ERROR_COMPROBANTE_INEXISTENTE = '602'
+
+# Observaciones que no dependen de los datos del comprobante sino de la
+# numeración (10016: el número no es el siguiente al último autorizado)
+OBSERVACIONES_DE_SECUENCIA = ('10016',)
+
+
+class WSFEError(Exception):
+    """Error de comunicación con WSFE"""
+
+
+class WSFETransientError(WSFEError):
+    """Error pasajero (sin conexión, timeout, servidor caído): conviene reintentar"""
+
+
+def es_rechazo_del_comprobante(resultado):
+    """
+    True si AFIP rechazó el comprobante por sus propios datos (resultado 'R'
+    con observaciones del comprobante). Un rechazo que solo trae errores de
+    la cabecera del pedido, o que se debe a la numeración (un hueco anterior),
+    no es definitivo: el comprobante se vuelve a intentar.
+    """
+    if resultado['resultado'] != 'R':
+        return False
+    codigos = [observacion.split(':', 1)[0].strip() for observacion in resultado['observaciones']]
+    return bool(codigos) and not any(codigo in OBSERVACIONES_DE_SECUENCIA for codigo in codigos)
+
+
+class WSFEClient:
+    """
+    Cliente SOAP mínimo para WSFEv1, solo con la biblioteca estándar.
+
+    Arma el sobre a mano y lee la respuesta con ElementTree, así el pedido
+    tiene un timeout propio y los errores de red se distinguen de los
+    rechazos de AFIP. No hay WSDL que descargar ni parsear, y los pedidos
+    van por una conexión persistente (SoapTransport). La URL es
+    configurable para probar contra un servidor local (ver utils/fake_wsfe.py).
+    """
+
+    def __init__(self, url=WSFE_HOMOLOGACION_URL, timeout=10.0):
+        self.url = url
+        self.timeout = timeout
+        self.transport = SoapTransport(url, timeout)
+
+    def solicitar_cae(self, auth, datos_factura):
+        """
+        Pedir el CAE de un comprobante (FECAESolicitar).
+
+        Args:
+            auth (dict): 'token', 'sign' y 'cuit' del ticket de acceso
+            datos_factura (dict): datos armados por InvoiceService._prepare_afip_data
+
+        Returns:
+            dict: cae, fecha_vencimiento_cae, resultado ('A' o 'R'),
+            observaciones y errores (listas de textos)
+
+        Raises:
+            WSFETransientError: si no hubo respuesta válida y hay que reintentar
+        """
+        numero = int(datos_factura['numero_comprobante'])
+        resultados = self.solicitar_cae_lote(auth, [datos_factura])
+        if numero not in resultados:
+            raise WSFETransientError(f"La respuesta de WSFE no trae el comprobante {numero}")
+        return resultados[numero]
+
+    def solicitar_cae_lote(self, auth, lote):
+        """
+        Pedir el CAE de varios comprobantes en un solo FECAESolicitar.
+
+        Todos deben ser del mismo punto de venta y tipo, con números
+        consecutivos en orden (así lo exige AFIP), y como mucho
+        MAX_REGISTROS_POR_PEDIDO.
+
+        Returns:
+            dict: número de comprobante -> resultado (mismo formato que
+            solicitar_cae). Un comprobante que no vino en la respuesta no
+            aparece y se debe reintentar.
+        """
+        if not lote:
+            return {}
+        if len(lote) > MAX_REGISTROS_POR_PEDIDO:
+            raise ValueError(f"Un pedido admite como mucho {MAX_REGISTROS_POR_PEDIDO} comprobantes")
+
+        punto_venta = int(lote[0]['punto_venta'])
+        tipo = int(lote[0]['tipo_comprobante'])
+        anterior = None
+        for datos in lote:
+            if int(datos['punto_venta']) != punto_venta or int(datos['tipo_comprobante']) != tipo:
+                raise ValueError("Todos los comprobantes del pedido deben ser del mismo punto de venta y tipo")
+            numero = int(datos['numero_comprobante'])
+            if anterior is not None and numero != anterior + 1:
+                raise ValueError("Los comprobantes del pedido deben tener números consecutivos")
+            anterior = numero
+
+        body = self._fecae_solicitar_body(auth, punto_venta, tipo, lote)
+        root = self._call("FECAESolicitar", body)
+        return self._parse_fecae_response(root)
+
+    def ultimo_autorizado(self, auth, punto_venta, tipo):
+        """Último número que AFIP tiene autorizado para un punto de venta y tipo (FECompUltimoAutorizado)"""
+        body = (
+            f"<ar:FECompUltimoAutorizado>"
+            f"{self._auth_xml(auth)}"
+            f"<ar:PtoVta>{int(punto_venta)}</ar:PtoVta>"
+            f"<ar:CbteTipo>{int(tipo)}</ar:CbteTipo>"
+            f"</ar:FECompUltimoAutorizado>"
+        )
+        root = self._call("FECompUltimoAutorizado", body)
+        result = root.find(f'.//{{{WSFE_NS}}}FECompUltimoAutorizadoResult')
+        if result is None:
+            raise WSFETransientError("La respuesta de WSFE no trae FECompUltimoAutorizadoResult")
+        numero = result.findtext(f'{{{WSFE_NS}}}CbteNro', '').strip()
+        errores = self._messages(result, 'Errors', 'Err')
+        if errores or not numero.isdigit():
+            raise WSFETransientError(f"WSFE no informó el último comprobante: {'; '.join(errores) or 'sin número'}")
+        return int(numero)
+
+    def consultar_comprobante(self, auth, punto_venta, tipo, numero):
+        """
+        Consultar un comprobante ya enviado (FECompConsultar).
+
+        Returns:
+            dict: mismo formato que solicitar_cae, o None si AFIP no tiene
+            el comprobante
+        """
+        body = (
+            f"<ar:FECompConsultar>"
+            f"{self._auth_xml(auth)}"
+            f"<ar:FeCompConsReq>"
+            f"<ar:CbteTipo>{int(tipo)}</ar:CbteTipo>"
+            f"<ar:CbteNro>{int(numero)}</ar:CbteNro>"
+            f"<ar:PtoVta>{int(punto_venta)}</ar:PtoVta>"
+            f"</ar:FeCompConsReq>"
+            f"</ar:FECompConsultar>"
+        )
+        root = self._call("FECompConsultar", body)
+        result = root.find(f'.//{{{WSFE_NS}}}FECompConsultarResult')
+        if result is None:
+            raise WSFETransientError("La respuesta de WSFE no trae FECompConsultarResult")
+
+        comprobante = result.find(f'{{{WSFE_NS}}}ResultGet')
+        if comprobante is None:
+            errores = self._messages(result, 'Errors', 'Err')
+            if any(error.startswith(f"{ERROR_COMPROBANTE_INEXISTENTE}:") for error in errores):
+                return None
+            raise WSFETransientError(f"WSFE no informó el comprobante {numero}: {'; '.join(errores) or 'sin datos'}")
+        return {
+            'cae': comprobante.findtext(f'{{{WSFE_NS}}}CodAutorizacion', '').strip() or None,
+            'fecha_vencimiento_cae': comprobante.findtext(f'{{{WSFE_NS}}}FchVto', '').strip() or None,
+            'resultado': comprobante.findtext(f'{{{WSFE_NS}}}Resultado', '').strip(),
+            'observaciones': self._messages(comprobante, 'Observaciones', 'Obs'),
+            'errores': [],
+        }
+
+    def _call(self, method, body):
+        """Enviar un sobre SOAP y devolver la raíz de la respuesta"""
+        envelope = (
+            f'<?xml version="1.0" encoding="utf-8"?>'
+            f'<soap:Envelope xmlns:soap="{SOAP_NS}" xmlns:ar="{WSFE_NS}">'
+            f'<soap:Body>{body}</soap:Body></soap:Envelope>'
+        ).encode('utf-8')
+        headers = {
+            'Content-Type': 'text/xml; charset=utf-8',
+            'SOAPAction': f'"{WSFE_NS}{method}"',
+        }
+
+        try:
+            # FECAESolicitar no se reenvía solo: CAEWorker concilia con AFIP antes de reintentar
+            status, content = self.transport.post(envelope, headers, idempotent=(method != "FECAESolicitar"))
+        except (OSError, http.client.HTTPException) as e:
+            raise WSFETransientError(f"No se pudo conectar con WSFE: {e}") from e
+        # Un Fault de SOAP llega como 500 y trae el motivo en el cuerpo
+        if status >= 400 and (status < 500 or not content):
+            raise WSFETransientError(f"WSFE respondió HTTP {status}")
+
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            raise WSFETransientError(f"Respuesta inválida de WSFE: {e}") from e
+
+        fault = root.find(f'.//{{{SOAP_NS}}}Fault')
+        if fault is not None:
+            raise WSFETransientError(f"WSFE devolvió un error: {fault.findtext('faultstring', '').strip()}")
+        return root
+
+    def _fecae_solicitar_body(self, auth, punto_venta, tipo, lote):
+        """Cuerpo de FECAESolicitar para uno o más comprobantes"""
+        detalles = "".join(self._detalle_xml(datos, int(datos['numero_comprobante'])) for datos in lote)
+        return (
+            f"<ar:FECAESolicitar>"
+            f"{self._auth_xml(auth)}"
+            f"<ar:FeCAEReq>"
+            f"<ar:FeCabReq>"
+            f"<ar:CantReg>{len(lote)}</ar:CantReg>"
+            f"<ar:PtoVta>{punto_venta}</ar:PtoVta>"
+            f"<ar:CbteTipo>{tipo}</ar:CbteTipo>"
+            f"</ar:FeCabReq>"
+            f"<ar:FeDetReq>{detalles}</ar:FeDetReq>"
+            f"</ar:FeCAEReq>"
+            f"</ar:FECAESolicitar>"
+        )
+
+    def _auth_xml(self, auth):
+        return (
+            f"<ar:Auth>"
+            f"<ar:Token>{escape(auth['token'])}</ar:Token>"
+            f"<ar:Sign>{escape(auth['sign'])}</ar:Sign>"
+            f"<ar:Cuit>{escape(str(auth['cuit']))}</ar:Cuit>"
+            f"</ar:Auth>"
+        )
+
+    def _detalle_xml(self, datos, numero):
+        """Detalle de un comprobante (FECAEDetRequest)"""
+        documento = str(datos.get('cliente_documento_numero') or '0').replace('-', '')
+        return (
+            f"<ar:FECAEDetRequest>"
+            f"<ar:Concepto>1</ar:Concepto>"
+            f"<ar:DocTipo>{int(datos['cliente_documento_tipo'])}</ar:DocTipo>"
+            f"<ar:DocNro>{escape(documento)}</ar:DocNro>"
+            f"<ar:CbteDesde>{numero}</ar:CbteDesde>"
+            f"<ar:CbteHasta>{numero}</ar:CbteHasta>"
+            f"<ar:CbteFch>{escape(datos['fecha'])}</ar:CbteFch>"
+            f"<ar:ImpTotal>{datos['importe_total']:.2f}</ar:ImpTotal>"
+            f"<ar:ImpTotConc>0.00</ar:ImpTotConc>"
+            f"<ar:ImpNeto>{datos['importe_neto']:.2f}</ar:ImpNeto>"
+            f"<ar:ImpOpEx>0.00</ar:ImpOpEx>"
+            f"<ar:ImpTrib>0.00</ar:ImpTrib>"
+            f"<ar:ImpIVA>{datos['importe_iva']:.2f}</ar:ImpIVA>"
+            f"<ar:MonId>PES</ar:MonId>"
+            f"<ar:MonCotiz>1</ar:MonCotiz>"
+            f"<ar:Iva><ar:AlicIva>"
+            f"<ar:Id>{IVA_21_ID}</ar:Id>"
+            f"<ar:BaseImp>{datos['importe_neto']:.2f}</ar:BaseImp>"
+            f"<ar:Importe>{datos['importe_iva']:.2f}</ar:Importe>"
+            f"</ar:AlicIva></ar:Iva>"
+            f"</ar:FECAEDetRequest>"
+        )
+
+    def _parse_fecae_response(self, root):
+        """Resultados de FECAESolicitar por número, en el formato de AFIPService.obtener_cae"""
+        result = root.find(f'.//{{{WSFE_NS}}}FECAESolicitarResult')
+        if result is None:
+            raise WSFETransientError("La respuesta de WSFE no trae FECAESolicitarResult")
+
+        errores = self._messages(result, 'Errors', 'Err')
+        detalles = result.findall(f'.//{{{WSFE_NS}}}FECAEDetResponse')
+        if not detalles:
+            # Sin detalle AFIP no llegó a evaluar los comprobantes (por ejemplo, ticket de
+            # acceso vencido): el problema no es de las facturas, así que se reintenta
+            motivo = "; ".join(errores) or "la respuesta no trae el detalle de los comprobantes"
+            raise WSFETransientError(f"WSFE no procesó el pedido: {motivo}")
+
+        resultados = {}
+        for detalle in detalles:
+            numero = int(detalle.findtext(f'{{{WSFE_NS}}}CbteDesde', '0'))
+            resultados[numero] = {
+                'cae': detalle.findtext(f'{{{WSFE_NS}}}CAE', '').strip() or None,
+                'fecha_vencimiento_cae': detalle.findtext(f'{{{WSFE_NS}}}CAEFchVto', '').strip() or None,
+                # Sin Resultado no hay un rechazo explícito: el que llama lo reintenta
+                'resultado': detalle.findtext(f'{{{WSFE_NS}}}Resultado', '').strip(),
+                'observaciones': self._messages(detalle, 'Observaciones', 'Obs'),
+                'errores': errores,
+            }
+        return resultados
+
+    def _messages(self, parent, container, tag):
+        """Lista de 'código: mensaje' de Errors/Err u Observaciones/Obs"""
+        messages = []
+        for node in parent.findall(f'{{{WSFE_NS}}}{container}/{{{WSFE_NS}}}{tag}'):
+            code = node.findtext(f'{{{WSFE_NS}}}Code', '').strip()
+            msg = node.findtext(f'{{{WSFE_NS}}}Msg', '').strip()
+            messages.append(f"{code}: {msg}" if code else msg)
+        return messages
@@ -0,0 +1,50 @@
+"""
+Configuración de las pruebas.
+
+La instancia global `db` se crea al importar db.database; STOCK_DB_PATH se
+apunta a una base temporal antes de cualquier import del proyecto para que
+las pruebas nunca toquen db/stock.db.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix='stock-tests-')
+os.environ['STOCK_DB_PATH'] = os.path.join(_TMP_DIR, 'stock.db')
+
+from db.database import db  # noqa: E402
+from models.catalog_cache import catalog_cache  # noqa: E402
+from models.stock import StockModel  # noqa: E402
+
+TABLES = ('factura_items', 'facturas', 'ventas_diarias', 'secuencias_comprobante', 'stock')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    db.close()
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    """Cada prueba empieza con las tablas vacías y las cachés del catálogo limpias"""
+    yield db
+    db.release_connection()
+    with db.transaction() as conn:
+        for table in TABLES:
+            conn.execute(f"DELETE FROM {table}")
+    catalog_cache.clear()
+    StockModel().invalidate_sorted_cache()
+
+
+@pytest.fixture
+def add_products():
+    """Función para cargar productos (id, name, brand, price, price2, quantity)"""
+    def add(rows):
+        db.execute_many(
+            "INSERT INTO stock (id, name, brand, price, price2, quantity) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    return add
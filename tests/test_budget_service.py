@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip('config.settings', reason="los PDF necesitan config/settings.py con COMPANY_CONFIG")
+
+from services.budget_service import BudgetService  # noqa: E402
+
+
+def budget(number='P-00001', items=3):
+    return {
+        'budget_number': number,
+        'budget_name': f"PRESUPUESTO {number}",
+        'client_name': 'CLIENTE',
+        'client_doc': '20123456789',
+        'items': [{'quantity': 1, 'description': f"PRODUCTO {i}", 'brand': 'MARCA',
+                   'unit_price': 10.0, 'subtotal': 10.0} for i in range(items)],
+        'total': 10.0 * items,
+    }
+
+
+def test_same_number_in_the_same_second_gets_distinct_files(tmp_path):
+    service = BudgetService(str(tmp_path))
+    paths = {service.generate_budget(budget()) for _ in range(3)}
+    assert len(paths) == 3
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_batch_with_repeated_numbers_keeps_every_file(tmp_path):
+    summary = BudgetService(str(tmp_path)).generate_budgets([budget() for _ in range(4)], workers=2)
+    assert summary['failed'] == 0, summary['results']
+    assert len({result['path'] for result in summary['results']}) == 4
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def items(count, lines=1):
+    for i in range(count):
+        yield {'quantity': 1, 'description': '\n'.join([f"PRODUCTO {i}"] * lines), 'brand': 'MARCA',
+               'unit_price': 1.5, 'subtotal': 1.5}
+
+
+def page_subtotals(service):
+    """Registrar los subtotales que dibuja el modo paginado, como (página, importe)"""
+    subtotals = []
+    create = service._create_page_subtotal
+
+    def record(page, amount):
+        if page:
+            subtotals.append((page, round(amount, 2)))
+        return create(page, amount)
+
+    service._create_page_subtotal = record
+    return subtotals
+
+
+def test_paginated_subtotals_add_up_to_the_items_drawn(tmp_path):
+    service = BudgetService(str(tmp_path))
+    subtotals = page_subtotals(service)
+    progress = []
+    data = budget()
+    data['items'] = list(items(100))
+    del data['total']
+
+    service.generate_budget(data, progress=lambda done, total: progress.append((done, total)))
+
+    assert [page for page, _ in subtotals] == list(range(1, len(subtotals) + 1))
+    assert len(subtotals) > 1
+    assert sum(amount for _, amount in subtotals) == 150.0
+    assert progress[-1] == (100, 100)
+
+
+def test_wrapped_descriptions_move_rows_to_the_next_page(tmp_path):
+    service = BudgetService(str(tmp_path))
+    subtotals = page_subtotals(service)
+    data = budget()
+    data['items'] = items(100, lines=3)
+
+    service.generate_budget(data)
+    single_line = BudgetService(str(tmp_path))
+    single_line_subtotals = page_subtotals(single_line)
+    data['items'] = items(100)
+    single_line.generate_budget(data)
+
+    # Filas tres veces más altas: menos filas por página, y cada página suma lo que dibujó
+    assert len(subtotals) > len(single_line_subtotals)
+    assert subtotals[0][1] < single_line_subtotals[0][1]
+    assert sum(amount for _, amount in subtotals) == 150.0
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from db.database import db
+from services.afip_service import AFIPService
+from services.cae_worker import CAEWorker
+from services.invoice_service import InvoiceService
+from services.wsfe_client import es_rechazo_del_comprobante
+from utils.fake_wsfe import FakeWSFE
+
+CUSTOMER = {'nombre': 'CONSUMIDOR FINAL'}
+
+
+@pytest.fixture
+def wsfe():
+    """Servidor WSFE de prueba en un puerto libre"""
+    server = FakeWSFE(('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def afip(server, timeout=2.0):
+    url = f"http://127.0.0.1:{server.server_address[1]}/wsfev1/service.asmx"
+    return AFIPService(is_testing=False, wsfe_url=url, timeout=timeout)
+
+
+def worker(server, timeout=2.0):
+    return CAEWorker(afip_service=afip(server, timeout), rate=1000, burst=1000)
+
+
+def checkout(add_products, count):
+    """Registrar `count` ventas; quedan pendientes de CAE con los números 1..count"""
+    add_products([('1001', 'LÁMPARA', 'PHILIPS', 100, 150, 100)])
+    service = InvoiceService()
+    for _ in range(count):
+        line = {'code': '1001', 'name': 'LÁMPARA', 'brand': 'PHILIPS', 'quantity': 1, 'price': 100.0, 'subtotal': 100.0}
+        assert service.create_invoice(CUSTOMER, [line])['success']
+
+
+def invoices():
+    return db.fetch_all("""
+        SELECT numero_factura, estado, cae, cae_intentos, cae_proximo_intento, cae_error
+        FROM facturas ORDER BY numero_factura
+    """)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "se agotó la espera"
+        time.sleep(0.01)
+
+
+def test_pending_invoices_are_authorized_in_one_request(wsfe, add_products):
+    checkout(add_products, 3)
+
+    counts = worker(wsfe).process_pending()
+
+    assert counts == {'autorizada': 3, 'rechazada': 0, 'reintento': 0}
+    assert wsfe.requests == 1
+    caes = {f"0001-{numero:08d}": cae for numero, (cae, _) in wsfe.authorized[(1, 6)].items()}
+    assert [(row[0], row[1], row[2]) for row in invoices()] == [
+        (numero, 'autorizada', cae) for numero, cae in sorted(caes.items())
+    ]
+
+
+def test_explicit_afip_rejection_marks_the_invoice_rejected(wsfe, add_products):
+    checkout(add_products, 3)
+    wsfe.reject_numbers = {3}
+
+    counts = worker(wsfe).process_pending()
+
+    assert counts == {'autorizada': 2, 'rechazada': 1, 'reintento': 0}
+    rejected = invoices()[2]
+    assert rejected[1] == 'rechazada'
+    assert rejected[5].startswith('10048')
+
+
+def test_timeout_backs_off_and_reconciles_instead_of_resending(wsfe, add_products):
+    checkout(add_products, 3)
+    wsfe.latency = 0.5
+    cae_worker = worker(wsfe, timeout=0.2)
+
+    counts = cae_worker.process_pending()
+
+    assert counts == {'autorizada': 0, 'rechazada': 0, 'reintento': 3}
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for row in invoices():
+        assert row[1] == 'pendiente'
+        assert row[3] == 1
+        assert row[4] > now
+
+    # AFIP procesó el pedido aunque la respuesta no llegó
+    wait_for(lambda: wsfe.processed == 1)
+    wsfe.latency = 0.0
+    db.execute_query("UPDATE facturas SET cae_proximo_intento = NULL")
+
+    counts = cae_worker.process_pending()
+
+    assert counts == {'autorizada': 3, 'rechazada': 0, 'reintento': 0}
+    assert wsfe.requests == 1  # los CAE salieron de FECompConsultar, sin reenviar
+    assert [row[2] for row in invoices()] == [cae for cae, _ in wsfe.authorized[(1, 6)].values()]
+
+
+def test_a_missing_number_holds_back_the_following_ones(wsfe, add_products):
+    checkout(add_products, 3)
+    db.execute_query("UPDATE facturas SET afip_datos = 'no es json' WHERE numero_factura = '0001-00000002'")
+
+    counts = worker(wsfe).process_pending()
+
+    assert counts == {'autorizada': 1, 'rechazada': 0, 'reintento': 2}
+    assert [row[1] for row in invoices()] == ['autorizada', 'pendiente', 'pendiente']
+    assert 'Falta autorizar el comprobante 2' in invoices()[2][5]
+    assert wsfe.requests == 1
+
+
+def test_restart_picks_up_pending_invoices(wsfe, add_products):
+    checkout(add_products, 3)
+    # El programa se cerró justo después de enviar la primera: AFIP la tiene, la base no
+    first = json.loads(db.fetch_one("SELECT afip_datos FROM facturas ORDER BY id LIMIT 1")[0])
+    afip(wsfe).solicitar_cae_lote([first])
+
+    restarted = worker(wsfe)
+    restarted.start()
+    try:
+        wait_for(lambda: db.fetch_one("SELECT COUNT(*) FROM facturas WHERE estado = 'pendiente'")[0] == 0)
+    finally:
+        restarted.stop()
+
+    assert [row[1] for row in invoices()] == ['autorizada'] * 3
+    assert [row[2] for row in invoices()] == [cae for cae, _ in wsfe.authorized[(1, 6)].values()]
+    assert wsfe.requests == 2  # la primera no se volvió a enviar
+
+
+def test_out_of_sequence_records_are_retried_not_rejected(wsfe, add_products):
+    checkout(add_products, 4)
+    wsfe.reject_numbers = {2}
+    cae_worker = worker(wsfe)
+
+    counts = cae_worker.process_pending()
+
+    # 2 se rechaza por sus datos; 3 y 4 solo quedaron fuera de orden detrás de ella
+    assert counts == {'autorizada': 1, 'rechazada': 1, 'reintento': 2}
+    assert [row[1] for row in invoices()] == ['autorizada', 'rechazada', 'pendiente', 'pendiente']
+    assert invoices()[2][5].startswith('10016')
+
+
+def test_header_errors_are_not_a_rejection_of_the_invoice():
+    response = {'cae': None, 'fecha_vencimiento_cae': None, 'resultado': 'R',
+                'observaciones': [], 'errores': ['10015: Campo CantReg inválido']}
+    assert not es_rechazo_del_comprobante(response)
+    assert es_rechazo_del_comprobante(dict(response, observaciones=['10048: Rechazo']))
+    assert not es_rechazo_del_comprobante(dict(response, observaciones=['10016: No correlativo']))
@@ -0,0 +1,135 @@
+import sqlite3
+
+import pytest
+
+from db.database import db
+from models.catalog_cache import catalog_cache
+from models.stock import StockModel
+
+LAMP = ('1001', 'LÁMPARA LED 9W E27', 'PHILIPS', 400.0, 650.0, 150)
+CHANGES = {'name': 'LÁMPARA LED 10W E27', 'brand': 'PHILIPS', 'price': 420.0, 'price2': 700.0, 'quantity': 140}
+
+
+def test_updating_a_missing_product_does_not_cache_it():
+    stock = StockModel()
+    stock.update_product('9999', CHANGES)
+    stock.update_quantity('9998', 5)
+
+    assert catalog_cache.peek('9999') is None
+    assert stock.get_product_by_id('9999') is None
+    assert stock.get_product_by_id('9998') is None
+
+
+def test_updates_are_written_through(add_products):
+    add_products([LAMP])
+    stock = StockModel()
+    stock.update_product('1001', CHANGES)
+    assert catalog_cache.peek('1001') == ('1001', *CHANGES.values())
+
+    stock.update_quantity('1001', 7)
+    assert stock.get_product_by_id('1001').quantity == 7
+
+
+@pytest.fixture
+def other_connection():
+    """Conexión aparte, como la de otra caja sobre el mismo stock.db"""
+    conn = sqlite3.connect(db.db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def always_check(monkeypatch):
+    monkeypatch.setattr(catalog_cache, 'check_interval', 0)
+
+
+def test_commits_to_other_tables_keep_the_cache(add_products, other_connection, always_check):
+    add_products([LAMP])
+    stock = StockModel()
+    stock.get_product_by_id('1001')
+    invalidations = catalog_cache.stats()['invalidations']
+
+    other_connection.execute(
+        "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total) "
+        "VALUES ('0001-00000001', '2026-01-05', 'CLIENTE', 100, 21, 121)"
+    )
+    other_connection.commit()
+
+    assert stock.get_product_by_id('1001') == LAMP
+    assert catalog_cache.stats()['invalidations'] == invalidations
+
+
+def test_own_stock_writes_keep_the_cache(add_products, always_check):
+    add_products([LAMP, ('1002', 'TECLA', 'JELUZ', 50.0, 80.0, 10)])
+    stock = StockModel()
+    stock.get_product_by_id('1002')
+    invalidations = catalog_cache.stats()['invalidations']
+
+    stock.update_product('1001', CHANGES)
+    stock.reduce_quantities({'1001': 2, '1002': 1})
+
+    assert stock.get_product_by_id('1001').quantity == 138
+    assert catalog_cache.peek('1002').quantity == 9
+    assert catalog_cache.stats()['invalidations'] == invalidations
+
+
+def test_stock_changes_from_another_connection_flush_the_cache(add_products, other_connection, always_check):
+    add_products([LAMP])
+    stock = StockModel()
+    stock.get_product_by_id('1001')
+
+    other_connection.execute("UPDATE stock SET price2 = 999 WHERE id = '1001'")
+    other_connection.commit()
+
+    assert stock.get_product_by_id('1001').price2 == 999
+
+
+def test_sorted_order_follows_only_stock_changes(add_products, other_connection):
+    add_products([LAMP, ('1002', 'TECLA', 'JELUZ', 50.0, 80.0, 10)])
+    stock = StockModel()
+    assert [p.id for p in stock.get_products_at(0, order_by='name')] == ['1001', '1002']
+    rowids = StockModel._sorted_cache['name'][1]
+
+    other_connection.execute(
+        "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total) "
+        "VALUES ('0001-00000001', '2026-01-05', 'CLIENTE', 100, 21, 121)"
+    )
+    other_connection.commit()
+    stock.get_products_at(0, order_by='name')
+    assert StockModel._sorted_cache['name'][1] is rowids
+
+    other_connection.execute("UPDATE stock SET name = 'ARANDELA' WHERE id = '1002'")
+    other_connection.commit()
+    assert [p.id for p in stock.get_products_at(0, order_by='name')] == ['1002', '1001']
+
+
+def test_a_read_overtaken_by_a_clear_is_not_cached(add_products, other_connection, always_check):
+    add_products([('0001', 'OLD', 'PHILIPS', 400.0, 650.0, 150)])
+    stock = StockModel()
+    stock.get_product_by_id('0001')
+    catalog_cache.remove('0001')
+
+    def slow_load(product_id):
+        # La importación de otro hilo confirma y vacía la caché en medio de la lectura
+        row = stock._load_product(product_id)
+        other_connection.execute("UPDATE stock SET name = 'NEW' WHERE id = '0001'")
+        other_connection.commit()
+        catalog_cache.clear()
+        return row
+
+    assert catalog_cache.get('0001', slow_load).name == 'OLD'
+    assert catalog_cache.peek('0001') is None
+    assert stock.get_product_by_id('0001').name == 'NEW'
+
+
+def test_a_listing_overtaken_by_a_put_is_not_cached(add_products):
+    add_products([LAMP])
+    stock = StockModel()
+
+    def slow_listing():
+        rows = [stock._load_product('1001')]
+        stock.update_product('1001', CHANGES)
+        return rows
+
+    catalog_cache.get_listing(('name', False), slow_listing)
+    assert [p.name for p in stock.get_all_products(order_by='name')] == [CHANGES['name']]
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from db.database import db
+from models.stock import normalize_product_id
+from services.catalog_import import CatalogImporter
+
+HEADER = ['Código', 'Descripción', 'Marca', 'Precio', 'Precio venta', 'Stock']
+
+
+def stock():
+    return [tuple(row) for row in db.fetch_all(
+        "SELECT id, name, brand, price, price2, quantity FROM stock ORDER BY id"
+    )]
+
+
+def test_product_ids_are_padded_like_the_form():
+    assert normalize_product_id('1') == '0001'
+    assert normalize_product_id(1.0) == '0001'
+    assert normalize_product_id(' 1001 ') == '1001'
+    for invalid in ('10001', 'A001', '1.5', 1.5, '', None):
+        with pytest.raises(ValueError):
+            normalize_product_id(invalid)
+
+
+def test_import_counts_and_rejects(add_products):
+    add_products([('0001', 'LÁMPARA', 'PHILIPS', 100, 150, 7), ('0002', 'CABLE', 'PRYSMIAN', 10, 15, 3)])
+
+    summary = CatalogImporter(batch_size=2).import_rows([
+        HEADER,
+        [1.0, 'LÁMPARA', 'PHILIPS', 100, 150, 7],       # sin cambios (Excel guardó 0001 como 1)
+        ['2', 'CABLE', 'PRYSMIAN', '12,50', '18', '3'],  # actualizado
+        ['0003', 'TOMA', 'JELUZ', '5', '8', ''],
+        ['10004', 'FICHA', 'JELUZ', '5', '8', '1'],      # código de 5 dígitos
+        ['0005', 'ENCHUFE', 'JELUZ', '4', '6', '2'],
+        ['0005', 'FICHA', 'JELUZ', '5', '8', '1'],       # repetido: vale la última
+    ])
+
+    counts = tuple(summary[key] for key in ('inserted', 'updated', 'unchanged', 'repeated', 'rejected'))
+    assert counts == (1, 1, 1, 1, 2)
+    assert [line for line, _ in summary['errors']] == [4, 5]
+    assert stock() == [
+        ('0001', 'LÁMPARA', 'PHILIPS', 100.0, 150.0, 7),
+        ('0002', 'CABLE', 'PRYSMIAN', 12.5, 18.0, 3),
+        ('0005', 'FICHA', 'JELUZ', 5.0, 8.0, 1),
+    ]
+    # Los índices y triggers que se quitaron durante la carga volvieron
+    assert db.fetch_one("SELECT COUNT(*) FROM stock_fts WHERE stock_fts MATCH 'FICHA'")[0] == 1
+
+
+def test_other_connections_can_write_while_the_file_is_read(add_products):
+    add_products([('0001', 'LÁMPARA', 'PHILIPS', 100, 150, 7)])
+    writes = []
+
+    def progress(read):
+        # Otra caja vendiendo mientras se lee la planilla
+        other = sqlite3.connect(db.db_path, timeout=0)
+        try:
+            other.execute("UPDATE stock SET quantity = quantity - 1 WHERE id = '0001'")
+            other.commit()
+            writes.append(read)
+        finally:
+            other.close()
+
+    rows = [HEADER] + [[n, f'PRODUCTO {n}', '', '1', '2', '1'] for n in range(2, 12)]
+    summary = CatalogImporter(batch_size=3).import_rows(rows, progress=progress)
+
+    assert summary['inserted'] == 10
+    assert writes == [3, 6, 9, 10]
+    assert db.fetch_one("SELECT quantity FROM stock WHERE id = '0001'")[0] == 3
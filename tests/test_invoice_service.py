@@ -0,0 +1,67 @@
+import pytest
+
+from db.database import db
+from services.afip_service import AFIPService
+from services.invoice_service import InvoiceService
+
+CUSTOMER = {'nombre': 'CONSUMIDOR FINAL'}
+
+
+def line(code, quantity, price=100.0):
+    return {'code': code, 'name': f"PRODUCTO {code}", 'brand': 'MARCA',
+            'quantity': quantity, 'price': price, 'subtotal': price * quantity}
+
+
+def last_number():
+    row = db.fetch_one(
+        "SELECT ultimo_numero FROM secuencias_comprobante WHERE punto_venta = 1 AND tipo_comprobante = 6"
+    )
+    return row[0] if row else 0
+
+
+def test_checkout_reserves_the_number_and_reduces_stock(add_products):
+    add_products([('1001', 'LÁMPARA', 'PHILIPS', 100, 150, 10)])
+
+    result = InvoiceService().create_invoice(CUSTOMER, [line('1001', 3)])
+
+    assert result['success'], result
+    assert result['numero_factura'] == '0001-00000001'
+    assert last_number() == 1
+    assert db.fetch_one("SELECT quantity FROM stock WHERE id = '1001'")[0] == 7
+
+
+def test_failed_checkout_does_not_advance_the_sequence(add_products):
+    add_products([('1001', 'LÁMPARA', 'PHILIPS', 100, 150, 10), ('1002', 'TECLA', 'JELUZ', 50, 80, 1)])
+    service = InvoiceService()
+    assert service.create_invoice(CUSTOMER, [line('1001', 1)])['success']
+
+    result = service.create_invoice(CUSTOMER, [line('1001', 2), line('1002', 5)])
+
+    assert not result['success']
+    assert 'Stock insuficiente de 1002' in result['error']
+    assert last_number() == 1
+    assert db.fetch_one("SELECT COUNT(*) FROM facturas")[0] == 1
+    assert db.fetch_one("SELECT quantity FROM stock WHERE id = '1001'")[0] == 9
+    assert service.sales_model.find_invoice_number_gaps() == []
+
+    # La próxima venta toma el número siguiente, sin huecos
+    assert service.create_invoice(CUSTOMER, [line('1001', 1)])['numero_factura'] == '0001-00000002'
+
+
+def test_next_number_comes_from_the_sequence(add_products):
+    add_products([('1001', 'LÁMPARA', 'PHILIPS', 100, 150, 10)])
+    afip = AFIPService(is_testing=False)
+    assert InvoiceService().create_invoice(CUSTOMER, [line('1001', 1)])['success']
+
+    assert afip.obtener_siguiente_numero_comprobante() == '0001-00000002'
+    assert afip.obtener_siguiente_numero_comprobante() == '0001-00000003'
+    assert InvoiceService().create_invoice(CUSTOMER, [line('1001', 1)])['numero_factura'] == '0001-00000004'
+
+
+def test_next_number_errors_are_not_hidden(monkeypatch):
+    def fail(*args):
+        raise RuntimeError("base bloqueada")
+
+    monkeypatch.setattr('models.sales.SalesModel.reserve_invoice_numbers', fail)
+    with pytest.raises(RuntimeError):
+        AFIPService(is_testing=True).obtener_siguiente_numero_comprobante()
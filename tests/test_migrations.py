@@ -0,0 +1,137 @@
+import sqlite3
+
+import pytest
+
+from db.database import Database, db
+from db.migrations import MIGRATIONS, apply_migrations
+from models.sales import SalesModel
+from models.stock import StockModel
+
+
+def schema(conn):
+    return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+
+def query_plans(fn):
+    """Ejecutar fn() y devolver {consulta: plan} de cada SELECT que hizo en este hilo"""
+    conn = db.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        fn()
+    finally:
+        conn.set_trace_callback(None)
+    plans = {}
+    for sql in statements:
+        if sql.lstrip().upper().startswith('SELECT'):
+            plans[sql] = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+    assert plans, "no se ejecutó ninguna consulta"
+    return plans
+
+
+@pytest.fixture
+def invoices():
+    rows = [(f"0001-{n:08d}", f"2026-01-{n % 28 + 1:02d}", 'CLIENTE', 100.0, 21.0, 121.0,
+             'pendiente' if n % 10 == 0 else 'autorizada')
+            for n in range(1, 501)]
+    db.execute_many(
+        "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total, estado) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    db.execute_query("ANALYZE")
+
+
+def test_new_database_gets_every_migration(tmp_path):
+    database = Database(str(tmp_path / 'nueva.db'))
+    try:
+        conn = database.get_connection()
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+        assert versions == sorted(version for version, _, _ in MIGRATIONS)
+    finally:
+        database.close()
+
+
+def test_rerunning_migrations_is_a_no_op(tmp_path):
+    database = Database(str(tmp_path / 'repetida.db'))
+    try:
+        conn = database.get_connection()
+        before = schema(conn)
+        assert apply_migrations(conn) == []
+        database.create_tables()
+        assert schema(conn) == before
+    finally:
+        database.close()
+
+
+def test_migrations_upgrade_a_legacy_database(tmp_path):
+    """Una base creada antes de las migraciones conserva sus datos y queda al día"""
+    path = str(tmp_path / 'vieja.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE stock (id TEXT PRIMARY KEY, name TEXT NOT NULL, brand TEXT NOT NULL,
+                            price REAL NOT NULL, price2 REAL NOT NULL, quantity INTEGER NOT NULL,
+                            created_at TEXT DEFAULT CURRENT_DATE);
+        CREATE TABLE facturas (id INTEGER PRIMARY KEY AUTOINCREMENT, numero_factura TEXT NOT NULL,
+                               fecha_emision TEXT NOT NULL, cae TEXT, fecha_vencimiento_cae TEXT,
+                               cliente_nombre TEXT NOT NULL, cliente_cuit TEXT, cliente_domicilio TEXT,
+                               cliente_condicion_iva TEXT DEFAULT 'Consumidor Final',
+                               subtotal REAL NOT NULL, iva REAL NOT NULL, total REAL NOT NULL,
+                               estado TEXT DEFAULT 'autorizada');
+        CREATE TABLE factura_items (id INTEGER PRIMARY KEY AUTOINCREMENT, factura_id INTEGER,
+                                    producto_id TEXT, producto_nombre TEXT, producto_marca TEXT,
+                                    cantidad INTEGER, precio_unitario REAL, subtotal REAL);
+        INSERT INTO stock (id, name, brand, price, price2, quantity) VALUES ('1001', 'LÁMPARA', 'PHILIPS', 1, 2, 3);
+        INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total)
+        VALUES ('0002-00000041', '2026-01-05', 'CLIENTE', 100, 21, 121);
+    """)
+    conn.close()
+
+    database = Database(path)
+    try:
+        conn = database.get_connection()
+        assert conn.execute("SELECT name FROM stock WHERE id = '1001'").fetchone() == ('LÁMPARA',)
+        assert conn.execute(
+            "SELECT ultimo_numero FROM secuencias_comprobante WHERE punto_venta = 2"
+        ).fetchone() == (41,)
+        assert apply_migrations(conn) == []
+    finally:
+        database.close()
+
+
+def test_invoices_by_date_use_the_date_index(invoices):
+    sales = SalesModel()
+    for sql, plan in query_plans(lambda: sales.get_invoices_by_date_range('2026-01-05', '2026-01-10')).items():
+        assert 'idx_facturas_fecha' in plan, sql
+        assert 'TEMP B-TREE' not in plan, sql
+    for sql, plan in query_plans(lambda: sales.get_all_invoices(50)).items():
+        assert 'idx_facturas_fecha' in plan, sql
+        assert 'TEMP B-TREE' not in plan, sql
+
+
+def test_pending_invoices_use_the_partial_estado_index(invoices):
+    sales = SalesModel()
+    plans = query_plans(lambda: (sales.get_pending_cae_invoices(20), sales.count_pending_cae(),
+                                 sales.get_next_cae_attempt()))
+    for sql, plan in plans.items():
+        # El índice parcial se recorre entero, pero solo tiene las pendientes
+        assert 'idx_facturas_cae_pendiente' in plan or 'idx_facturas_estado_fecha' in plan, sql
+
+
+def test_sales_summary_reads_the_rollups_by_estado(invoices):
+    plans = query_plans(lambda: SalesModel().get_sales_summary('2026-01-01', '2026-01-31'))
+    for sql, plan in plans.items():
+        assert 'SEARCH ventas_diarias' in plan, sql
+
+
+@pytest.mark.parametrize('order_by', ['name', 'brand', 'price', 'price2', 'quantity'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_stock_sorting_walks_an_index(add_products, order_by, descending):
+    add_products([(f"{n:04d}", f"PRODUCTO {n}", f"MARCA {n % 7}", n % 13, n % 17, n % 5) for n in range(1, 300)])
+    stock = StockModel()
+    first = stock.get_products_page(limit=20, order_by=order_by, descending=descending)
+    plans = query_plans(lambda: stock.get_products_page(after=stock.product_sort_key(first[-1], order_by),
+                                                       limit=20, order_by=order_by, descending=descending))
+    for sql, plan in plans.items():
+        assert f'idx_stock_{order_by}' in plan, sql
+        assert 'TEMP B-TREE' not in plan, sql
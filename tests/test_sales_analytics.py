@@ -0,0 +1,139 @@
+import pytest
+
+from db.database import db
+from services import sales_analytics
+from services.sales_analytics import SalesAnalytics
+
+# Ventas por producto hechas directamente sobre factura_items
+RAW_SALES = """
+    SELECT i.producto_id, SUM(i.cantidad), SUM(i.subtotal), COUNT(*)
+    FROM factura_items i
+    JOIN facturas f ON f.id = i.factura_id
+    WHERE f.estado = 'autorizada' AND f.fecha_emision BETWEEN ? AND ?
+    GROUP BY i.producto_id
+"""
+
+# Todo el historial, para las pruebas sin fechas
+ALL_DATES = ('0000-00-00', '9999-99-99')
+
+# (código, marca, stock): cantidades distintas para que el orden de los lentos no empate
+CATALOG = [(f"{n:04d}", f"MARCA {n % 3}", 5 * n if n % 4 else 0) for n in range(1, 13)]
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def backend(request, monkeypatch):
+    """Correr cada prueba con y sin NumPy"""
+    if request.param == 'numpy':
+        numpy = pytest.importorskip('numpy')
+        monkeypatch.setattr(sales_analytics, 'np', numpy)
+    else:
+        monkeypatch.setattr(sales_analytics, 'np', None)
+    return request.param
+
+
+@pytest.fixture
+def sales(add_products):
+    """Catálogo de 12 productos y 30 facturas en tres meses, con estados mezclados"""
+    add_products([(code, f"PRODUCTO {code}", brand, 10.0, 15.0, quantity) for code, brand, quantity in CATALOG])
+    with db.transaction() as conn:
+        for n in range(1, 31):
+            estado = 'rechazada' if n % 7 == 0 else ('pendiente' if n % 11 == 0 else 'autorizada')
+            cursor = conn.execute(
+                "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total, estado) "
+                "VALUES (?, ?, 'CLIENTE', 0, 0, 0, ?)",
+                (f"0001-{n:08d}", f"2026-{n % 3 + 1:02d}-{n % 28 + 1:02d}", estado)
+            )
+            for k in range(n % 4 + 1):
+                code = f"{(n * (k + 3)) % 10 + 1:04d}"
+                quantity = (n + k) % 5 + 1
+                price = 10.0 + int(code) * 1.37
+                conn.execute(
+                    "INSERT INTO factura_items (factura_id, producto_id, producto_nombre, producto_marca, "
+                    "cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, code, f"PRODUCTO {code}", f"MARCA {int(code) % 3}", quantity, price,
+                     round(quantity * price, 2))
+                )
+            # Un producto que ya no está en el catálogo
+            conn.execute(
+                "INSERT INTO factura_items (factura_id, producto_id, producto_nombre, producto_marca, "
+                "cantidad, precio_unitario, subtotal) VALUES (?, '0099', 'DISCONTINUADO', 'MARCA 9', 1, 3.5, 3.5)",
+                (cursor.lastrowid,)
+            )
+
+
+def raw_sales(dates):
+    return {row[0]: (row[1], round(row[2], 2), row[3]) for row in db.fetch_all(RAW_SALES, dates)}
+
+
+def raw_products(dates):
+    """(código, marca, unidades, facturación, renglones, stock) de catálogo y discontinuados"""
+    sold = raw_sales(dates)
+    products = [(code, brand, *sold.get(code, (0, 0.0, 0)), quantity) for code, brand, quantity in CATALOG]
+    if '0099' in sold:
+        products.append(('0099', 'MARCA 9', *sold['0099'], 0))
+    return products
+
+
+@pytest.mark.parametrize('dates', [None, ('2026-02-01', '2026-02-28')])
+def test_rankings_match_the_raw_query(backend, sales, dates):
+    snapshot = SalesAnalytics(chunk_invoices=4).load(*(dates or ()))
+    products = raw_products(dates or ALL_DATES)
+
+    loaded = {p.product_id: (p.brand, p.units, round(p.revenue, 2), p.lines, p.stock)
+              for p in map(snapshot.product, range(len(snapshot)))}
+    assert loaded == {row[0]: row[1:] for row in products}
+
+    by_revenue = sorted((row for row in products if row[3] > 0), key=lambda row: -row[3])
+    assert [p.product_id for p in snapshot.top_sellers(5)] == [row[0] for row in by_revenue[:5]]
+    by_units = sorted((row for row in products if row[2] > 0), key=lambda row: (-row[2], -row[3]))
+    top_units = snapshot.top_sellers(20, by='units')
+    assert [p.units for p in top_units] == [row[2] for row in by_units]
+
+    slow = sorted((row for row in products if row[5] > 0), key=lambda row: (row[2], -row[5]))
+    assert [p.product_id for p in snapshot.slow_movers(4)] == [row[0] for row in slow[:4]]
+
+
+@pytest.mark.parametrize('dates', [None, ('2026-02-01', '2026-02-28')])
+def test_abc_brands_and_sell_through_match_the_raw_query(backend, sales, dates):
+    snapshot = SalesAnalytics(chunk_invoices=4).load(*(dates or ()))
+    products = raw_products(dates or ALL_DATES)
+    position = {code: i for i, code in enumerate(snapshot.ids)}
+
+    total = sum(row[3] for row in products)
+    expected, before = {}, 0.0
+    for row in sorted(products, key=lambda row: -row[3]):
+        if row[3] <= 0:
+            expected[row[0]] = 'C'
+            continue
+        expected[row[0]] = 'A' if before < 0.8 * total else ('B' if before < 0.95 * total else 'C')
+        before += row[3]
+    classes = snapshot.abc_classes()
+    assert {code: str(classes[position[code]]) for code in expected} == expected
+
+    brands = {}
+    for code, brand, units, revenue, _, _ in products:
+        totals = brands.setdefault(brand, [0, 0, 0.0])
+        totals[0] += units > 0
+        totals[1] += units
+        totals[2] += revenue
+    result = snapshot.by_brand()
+    assert {row.brand: (row.products, row.units, round(row.revenue, 2)) for row in result} == {
+        brand: (products_sold, units, round(revenue, 2)) for brand, (products_sold, units, revenue) in brands.items()
+    }
+    assert [row.revenue for row in result] == sorted((row.revenue for row in result), reverse=True)
+    assert sum(row.share for row in result) == pytest.approx(1.0)
+
+    sell_through = snapshot.sell_through()
+    for code, _, units, _, _, stock in products:
+        expected_ratio = units / (units + stock) if units + stock else 0.0
+        assert sell_through[position[code]] == pytest.approx(expected_ratio)
+
+
+def test_empty_history(backend, add_products):
+    add_products([('0001', 'LÁMPARA', 'PHILIPS', 100, 150, 7)])
+    snapshot = SalesAnalytics().load()
+
+    assert snapshot.total_units == 0
+    assert snapshot.top_sellers() == []
+    assert [p.product_id for p in snapshot.slow_movers()] == ['0001']
+    assert [str(c) for c in snapshot.abc_classes()] == ['C']
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('config.settings', reason="el controlador de ventas necesita config/settings.py")
+
+from controllers.sales_controller import SalesController  # noqa: E402
+from models.cart import Cart  # noqa: E402
+from models.stock import StockModel  # noqa: E402
+
+
+class FakeSalesView:
+    """Lo mínimo de SalesView que usan los escaneos, sin Tk"""
+
+    def __init__(self):
+        self.cart = Cart()
+        self.status = None
+        self.sales_tree = self.frame = self
+
+    def render_line(self, line):
+        pass
+
+    def update_total(self):
+        pass
+
+    def see(self, item):
+        pass
+
+    def bell(self):
+        pass
+
+    def set_scan_status(self, text):
+        self.status = text
+
+
+def test_scanned_codes_are_normalized_like_the_stock_form(add_products):
+    add_products([('0001', 'LÁMPARA', 'PHILIPS', 100, 150, 10)])
+    controller = SalesController.__new__(SalesController)
+    controller.view = FakeSalesView()
+    controller.stock_model = StockModel()
+
+    controller._apply_scans([('1', 2), ('0001', 1), ('12345', 1), ('ABC', 1)])
+
+    assert controller.view.cart.quantity_of('0001') == 3
+    assert controller.view.status == "12345: código inválido; ABC: código inválido"
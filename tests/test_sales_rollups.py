@@ -0,0 +1,107 @@
+import sqlite3
+
+from db.database import db
+from db.migrations import MIGRATIONS, apply_migrations
+from models.sales import SalesModel
+
+# facturas tal como la creaba la versión anterior a las migraciones
+LEGACY_FACTURAS = """
+    CREATE TABLE facturas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero_factura TEXT NOT NULL,
+        fecha_emision TEXT NOT NULL,
+        cae TEXT,
+        fecha_vencimiento_cae TEXT,
+        cliente_nombre TEXT NOT NULL,
+        cliente_cuit TEXT,
+        cliente_domicilio TEXT,
+        cliente_condicion_iva TEXT DEFAULT 'Consumidor Final',
+        subtotal REAL NOT NULL,
+        iva REAL NOT NULL,
+        total REAL NOT NULL,
+        estado TEXT DEFAULT 'autorizada'
+    )
+"""
+
+# La misma cuenta hecha directamente sobre facturas, sin ventas_diarias
+RAW_DAILY = """
+    SELECT fecha_emision, CAST(SUBSTR(numero_factura, 1, 4) AS INTEGER), estado,
+           COUNT(*), CAST(ROUND(SUM(total) * 100) AS INTEGER)
+    FROM facturas
+    WHERE estado IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+ROLLUP_DAILY = """
+    SELECT fecha, punto_venta, estado, cantidad, total_centavos
+    FROM ventas_diarias
+    ORDER BY 1, 2, 3
+"""
+RAW_MONTHLY = """
+    SELECT SUBSTR(fecha_emision, 1, 7), COUNT(*), ROUND(SUM(total), 2)
+    FROM facturas
+    WHERE estado = 'autorizada'
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+
+def insert(conn, numero, fecha, total, estado='autorizada'):
+    conn.execute(
+        "INSERT INTO facturas (numero_factura, fecha_emision, cliente_nombre, subtotal, iva, total, estado) "
+        "VALUES (?, ?, 'CLIENTE', ?, 0, ?, ?)",
+        (numero, fecha, total, total, estado)
+    )
+
+
+def rows(conn, query):
+    return [tuple(row) for row in conn.execute(query).fetchall()]
+
+
+def test_rollups_match_the_raw_query_through_inserts_updates_and_deletes():
+    sales = SalesModel()
+    with db.transaction() as conn:
+        for n in range(1, 41):
+            insert(conn, f"{n % 2 + 1:04d}-{n:08d}", f"2026-{n % 3 + 1:02d}-{n % 5 + 1:02d}", 10.1 * n,
+                   'pendiente' if n % 4 == 0 else 'autorizada')
+        insert(conn, "0001-00000041", "2026-01-01", 99.99, None)
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE facturas SET estado = 'autorizada' WHERE numero_factura = '0001-00000004'")
+        conn.execute("UPDATE facturas SET estado = 'rechazada' WHERE numero_factura = '0002-00000005'")
+        conn.execute("UPDATE facturas SET total = 0.35 WHERE numero_factura = '0001-00000007'")
+        conn.execute("UPDATE facturas SET fecha_emision = '2026-04-30' WHERE numero_factura = '0002-00000009'")
+        conn.execute("UPDATE facturas SET estado = NULL WHERE numero_factura = '0002-00000011'")
+        conn.execute("UPDATE facturas SET estado = 'autorizada' WHERE numero_factura = '0001-00000041'")
+        conn.execute("DELETE FROM facturas WHERE numero_factura IN ('0001-00000013', '0002-00000012')")
+        # Borrar el día entero de un punto de venta deja sin fila su resumen
+        conn.execute("DELETE FROM facturas WHERE fecha_emision = '2026-02-02'")
+
+    conn = db.get_connection()
+    assert rows(conn, ROLLUP_DAILY) == rows(conn, RAW_DAILY)
+    assert [tuple(row) for row in sales.get_monthly_sales()] == rows(conn, RAW_MONTHLY)
+
+    count, total = conn.execute("SELECT COUNT(*), SUM(total) FROM facturas WHERE estado = 'autorizada'").fetchone()
+    summary = sales.get_sales_summary()
+    assert summary[0] == count
+    assert round(summary[1], 2) == round(total, 2)
+
+
+def test_backfill_skips_legacy_invoices_without_estado(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'vieja.db', isolation_level=None)
+    try:
+        conn.execute(LEGACY_FACTURAS)
+        insert(conn, "0001-00000001", "2025-12-30", 100.0)
+        insert(conn, "0001-00000002", "2025-12-30", 50.5)
+        insert(conn, "0001-00000003", "2025-12-31", 20.0, None)
+
+        apply_migrations(conn, [migration for migration in MIGRATIONS if migration[0] in (6, 10)])
+
+        assert rows(conn, ROLLUP_DAILY) == [("2025-12-30", 1, 'autorizada', 2, 15050)]
+        assert rows(conn, ROLLUP_DAILY) == rows(conn, RAW_DAILY)
+        # Los triggers tampoco fallan con una factura sin estado
+        insert(conn, "0001-00000004", "2025-12-31", 5.0, None)
+        conn.execute("UPDATE facturas SET estado = 'autorizada' WHERE numero_factura = '0001-00000003'")
+        assert rows(conn, ROLLUP_DAILY) == rows(conn, RAW_DAILY)
+    finally:
+        conn.close()
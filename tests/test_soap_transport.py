@@ -0,0 +1,55 @@
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.soap_transport import SoapTransport
+
+
+class ClosingHandler(BaseHTTPRequestHandler):
+    """Responde como HTTP/1.1 persistente pero cierra la conexión después de cada pedido"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def transport():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ClosingHandler)
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = SoapTransport(f"http://127.0.0.1:{server.server_address[1]}/service.asmx", timeout=2.0)
+    transport.server = server
+    yield transport
+    transport.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_idempotent_request_is_resent_on_a_closed_connection(transport):
+    assert transport.post(b'<a/>', {}) == (200, b'ok')
+    assert transport.post(b'<a/>', {}) == (200, b'ok')
+    assert transport.server.requests == 2
+
+
+def test_non_idempotent_request_is_never_resent(transport):
+    assert transport.post(b'<a/>', {}, idempotent=False) == (200, b'ok')
+
+    with pytest.raises((OSError, http.client.HTTPException)):
+        transport.post(b'<a/>', {}, idempotent=False)
+    assert transport.server.requests == 1
+
+    # La conexión se descartó: el próximo pedido usa una nueva
+    assert transport.post(b'<a/>', {}, idempotent=False) == (200, b'ok')
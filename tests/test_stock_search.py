@@ -0,0 +1,52 @@
+from db.database import db
+from models.stock import StockModel
+
+PRODUCTS = [
+    ('1001', 'LÁMPARA LED 9W E27', 'PHILIPS', 400.0, 650.0, 150),
+    ('1002', 'LÁMPARA LED 12W E27', 'OSRAM', 480.0, 800.0, 100),
+    ('1006', 'LLAVE TERMOMAGNÉTICA 16A', 'SICA', 950.0, 1400.0, 60),
+    ('1013', 'TOMACORRIENTE DOBLE MODENA', 'JELUZ', 700.0, 1100.0, 150),
+]
+
+
+def ids(products):
+    return sorted(product.id for product in products)
+
+
+def fts_integrity_check():
+    db.execute_query("INSERT INTO stock_fts (stock_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_search_folds_accents_and_matches_prefixes(add_products):
+    add_products(PRODUCTS)
+    stock = StockModel()
+    assert ids(stock.search_products('lampara')) == ['1001', '1002']
+    assert ids(stock.search_products('term sica')) == ['1006']
+    assert ids(stock.search_products('100')) == ['1001', '1002', '1006']
+
+
+def test_index_follows_inserts_updates_and_deletes(add_products):
+    add_products(PRODUCTS)
+    stock = StockModel()
+    stock.update_product('1013', {'name': 'TOMA DOBLE', 'brand': 'CAMBRE', 'price': 700.0,
+                                  'price2': 1100.0, 'quantity': 150})
+    stock.delete_product('1002')
+
+    assert ids(stock.search_products('cambre')) == ['1013']
+    assert stock.search_products('jeluz') == []
+    assert ids(stock.search_products('lampara')) == ['1001']
+    fts_integrity_check()
+
+
+def test_rowids_survive_vacuum(add_products):
+    """stock tiene un INTEGER PRIMARY KEY: VACUUM no puede renumerar las filas del índice"""
+    add_products(PRODUCTS)
+    db.execute_query("DELETE FROM stock WHERE id IN ('1001', '1002')")
+    before = db.fetch_all("SELECT rowid, id FROM stock ORDER BY rowid")
+
+    db.get_connection().execute("VACUUM")
+
+    assert db.fetch_all("SELECT rowid, id FROM stock ORDER BY rowid") == before
+    assert [row[1] for row in db.fetch_all("PRAGMA table_info(stock)") if row[5]] == ['seq']
+    assert ids(StockModel().search_products('termomagnetica')) == ['1006']
+    fts_integrity_check()
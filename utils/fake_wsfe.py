@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Servidor WSFE de prueba para desarrollo.
+
+Responde FECAESolicitar, FECompUltimoAutorizado y FECompConsultar como lo
+haría AFIP, con demoras, caídas y rechazos configurables, para probar la
+cola de CAE sin salir de la máquina:
+
+    python utils/fake_wsfe.py --port 8081 --latency 0.5 --fail-rate 0.3
+
+Como AFIP, recuerda los comprobantes autorizados de cada punto de venta y
+tipo y solo acepta el número siguiente al último (observación 10016 si no
+es correlativo); --ultimo fija el último número autorizado de partida, para
+probar con una base que ya tiene facturas.
+
+y en config/settings.py:
+
+    AFIP_CONFIG = {'testing': False, 'wsfe_url': 'http://127.0.0.1:8081/wsfev1/service.asmx', ...}
+
+También atiende loginCms de WSAA (sin verificar la firma), para probar el
+ticket de acceso con 'wsaa_url': 'http://127.0.0.1:8081/ws/services/LoginCms'.
+"""
+
+import argparse
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+WSFE_NS = "http://ar.gov.afip.dif.FEV1/"
+
+RESPONSE = """<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+<soap:Body><FECAESolicitarResponse xmlns="{ns}"><FECAESolicitarResult>
+<FeCabResp><PtoVta>{pto_vta}</PtoVta><CbteTipo>{tipo}</CbteTipo><Resultado>{resultado}</Resultado></FeCabResp>
+<FeDetResp>{detalles}</FeDetResp>
+</FECAESolicitarResult></FECAESolicitarResponse></soap:Body></soap:Envelope>"""
+
+DETALLE = """<FECAEDetResponse><CbteDesde>{numero}</CbteDesde><CbteHasta>{numero}</CbteHasta>
+<Resultado>{resultado}</Resultado><CAE>{cae}</CAE><CAEFchVto>{vto}</CAEFchVto>{obs}</FECAEDetResponse>"""
+
+OBSERVACION = "<Observaciones><Obs><Code>{code}</Code><Msg>{msg}</Msg></Obs></Observaciones>"
+
+ULTIMO_RESPONSE = """<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+<soap:Body><FECompUltimoAutorizadoResponse xmlns="{ns}"><FECompUltimoAutorizadoResult>
+<PtoVta>{pto_vta}</PtoVta><CbteTipo>{tipo}</CbteTipo><CbteNro>{numero}</CbteNro>
+</FECompUltimoAutorizadoResult></FECompUltimoAutorizadoResponse></soap:Body></soap:Envelope>"""
+
+CONSULTA_RESPONSE = """<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+<soap:Body><FECompConsultarResponse xmlns="{ns}"><FECompConsultarResult>{resultado}
+</FECompConsultarResult></FECompConsultarResponse></soap:Body></soap:Envelope>"""
+
+RESULT_GET = """<ResultGet><PtoVta>{pto_vta}</PtoVta><CbteTipo>{tipo}</CbteTipo>
+<CbteDesde>{numero}</CbteDesde><CbteHasta>{numero}</CbteHasta><Resultado>A</Resultado>
+<CodAutorizacion>{cae}</CodAutorizacion><EmisionTipo>CAE</EmisionTipo><FchVto>{vto}</FchVto></ResultGet>"""
+
+NO_EXISTE = "<Errors><Err><Code>602</Code><Msg>No existen datos en nuestros registros para los parametros ingresados.</Msg></Err></Errors>"
+
+LOGIN_RESPONSE = """<?xml version="1.0" encoding="utf-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body><loginCmsResponse xmlns="http://wsaa.view.sua.dvadac.desein.afip.gov">
+<loginCmsReturn>{ticket}</loginCmsReturn></loginCmsResponse></soapenv:Body></soapenv:Envelope>"""
+
+TICKET = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<loginTicketResponse version="1.0"><header><source>CN=wsaahomo</source><destination>CN=prueba</destination>
+<uniqueId>{unique_id}</uniqueId><generationTime>{generation}</generationTime><expirationTime>{expiration}</expirationTime></header>
+<credentials><token>{token}</token><sign>{sign}</sign></credentials></loginTicketResponse>"""
+
+
+class FakeWSFE(ThreadingHTTPServer):
+    """Servidor con la configuración de la simulación y contadores de pedidos"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_rate=0.0, reject_rate=0.0, ticket_ttl=43200, ultimo=0):
+        super().__init__(address, FakeWSFEHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.reject_rate = reject_rate
+        self.reject_numbers = set()   # números que se rechazan siempre (observación 10048)
+        self.ticket_ttl = ticket_ttl  # segundos de validez de los tickets de acceso
+        self.ultimo = ultimo          # último número autorizado de partida
+        self.authorized = {}          # (punto de venta, tipo) -> {número: (cae, vencimiento)}
+        self.requests = 0             # pedidos FECAESolicitar
+        self.queries = 0              # pedidos FECompUltimoAutorizado y FECompConsultar
+        self.processed = 0            # FECAESolicitar procesados (aunque el cliente ya no espere la respuesta)
+        self.failures = 0
+        self.logins = 0
+        self.connections = 0
+        self.request_times = []
+        self._cae = 70000000000000
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # El cliente cortó por timeout: es parte de la simulación, no un error
+        pass
+
+    def last_authorized(self, key):
+        """Último número autorizado de un punto de venta y tipo"""
+        return max(self.authorized.get(key, {}), default=self.ultimo)
+
+
+class FakeWSFEHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Encabezados y cuerpo salen en dos escrituras: sin esto, en conexiones
+    # persistentes Nagle + ACK demorado agregan ~40 ms por respuesta
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if b'loginCms' in body:
+            self._login()
+            return
+        root = ET.fromstring(body)
+        solicitud = root.find(f'.//{{{WSFE_NS}}}FECAESolicitar') is not None
+        with server._lock:
+            if solicitud:
+                server.requests += 1
+                server.request_times.append(time.monotonic())
+            else:
+                server.queries += 1
+
+        # La demora es la de autorizar: las consultas responden enseguida
+        if solicitud:
+            time.sleep(server.latency)
+        if random.random() < server.fail_rate:
+            with server._lock:
+                server.failures += 1
+            self._send(503, b"Servicio no disponible")
+            return
+
+        if root.find(f'.//{{{WSFE_NS}}}FECompUltimoAutorizado') is not None:
+            content = self._ultimo_autorizado(root)
+        elif root.find(f'.//{{{WSFE_NS}}}FECompConsultar') is not None:
+            content = self._consultar(root)
+        else:
+            content = self._solicitar(root)
+        self._send(200, content.encode('utf-8'), 'text/xml; charset=utf-8')
+
+    def _solicitar(self, root):
+        """FECAESolicitar: autorizar los comprobantes que siguen al último, en orden"""
+        server = self.server
+        cabecera = root.find(f'.//{{{WSFE_NS}}}FeCabReq')
+        key = (int(cabecera.findtext(f'{{{WSFE_NS}}}PtoVta')), int(cabecera.findtext(f'{{{WSFE_NS}}}CbteTipo')))
+        detalles = []
+        with server._lock:
+            for detalle in root.iter(f'{{{WSFE_NS}}}FECAEDetRequest'):
+                numero = int(detalle.findtext(f'{{{WSFE_NS}}}CbteDesde'))
+                if numero != server.last_authorized(key) + 1:
+                    obs = OBSERVACION.format(code=10016, msg="El numero o fecha del comprobante no se corresponde con el proximo a autorizar")
+                    detalles.append(DETALLE.format(numero=numero, resultado='R', cae='', vto='', obs=obs))
+                elif numero in server.reject_numbers or random.random() < server.reject_rate:
+                    obs = OBSERVACION.format(code=10048, msg="Rechazo simulado")
+                    detalles.append(DETALLE.format(numero=numero, resultado='R', cae='', vto='', obs=obs))
+                else:
+                    server._cae += 1
+                    cae = str(server._cae)
+                    vto = (datetime.now() + timedelta(days=10)).strftime('%Y%m%d')
+                    server.authorized.setdefault(key, {})[numero] = (cae, vto)
+                    detalles.append(DETALLE.format(numero=numero, resultado='A', cae=cae, vto=vto, obs=''))
+            server.processed += 1
+
+        resultado = 'A' if all('<Resultado>A' in d for d in detalles) else ('R' if all('<Resultado>R' in d for d in detalles) else 'P')
+        return RESPONSE.format(ns=WSFE_NS, pto_vta=key[0], tipo=key[1], resultado=resultado, detalles="".join(detalles))
+
+    def _ultimo_autorizado(self, root):
+        """FECompUltimoAutorizado: último número autorizado del punto de venta y tipo"""
+        key = (int(root.findtext(f'.//{{{WSFE_NS}}}PtoVta')), int(root.findtext(f'.//{{{WSFE_NS}}}CbteTipo')))
+        with self.server._lock:
+            numero = self.server.last_authorized(key)
+        return ULTIMO_RESPONSE.format(ns=WSFE_NS, pto_vta=key[0], tipo=key[1], numero=numero)
+
+    def _consultar(self, root):
+        """FECompConsultar: CAE de un comprobante autorizado (error 602 si no existe)"""
+        key = (int(root.findtext(f'.//{{{WSFE_NS}}}PtoVta')), int(root.findtext(f'.//{{{WSFE_NS}}}CbteTipo')))
+        numero = int(root.findtext(f'.//{{{WSFE_NS}}}CbteNro'))
+        with self.server._lock:
+            authorized = self.server.authorized.get(key, {}).get(numero)
+        if authorized is None:
+            return CONSULTA_RESPONSE.format(ns=WSFE_NS, resultado=NO_EXISTE)
+        cae, vto = authorized
+        result_get = RESULT_GET.format(pto_vta=key[0], tipo=key[1], numero=numero, cae=cae, vto=vto)
+        return CONSULTA_RESPONSE.format(ns=WSFE_NS, resultado=result_get)
+
+    def _login(self):
+        """Entregar un ticket de acceso nuevo (loginCms)"""
+        server = self.server
+        with server._lock:
+            server.logins += 1
+            unique_id = server.logins
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        ticket = TICKET.format(
+            unique_id=unique_id,
+            generation=now.isoformat(),
+            expiration=(now + timedelta(seconds=server.ticket_ttl)).isoformat(),
+            token=f"token-{unique_id}",
+            sign=f"sign-{unique_id}",
+        )
+        content = LOGIN_RESPONSE.format(ticket=escape(ticket)).encode('utf-8')
+        self._send(200, content, 'text/xml; charset=utf-8')
+
+    def _send(self, status, content, content_type='text/plain; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor WSFE de prueba")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help="segundos de demora por FECAESolicitar")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="proporción de pedidos que responden 503")
+    parser.add_argument('--reject-rate', type=float, default=0.0, help="proporción de comprobantes rechazados")
+    parser.add_argument('--ultimo', type=int, default=0,
+                        help="último número ya autorizado en cada punto de venta y tipo (por defecto: 0)")
+    args = parser.parse_args()
+
+    server = FakeWSFE(('127.0.0.1', args.port), args.latency, args.fail_rate, args.reject_rate, ultimo=args.ultimo)
+    print(f"WSFE de prueba en http://127.0.0.1:{args.port}/wsfev1/service.asmx")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
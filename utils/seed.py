@@ -1,39 +0,0 @@
-from db import database
-
-database.create_tables()
-
-database.add_product("12382", "Lámpara LED 12W", 1200.00, 1500.00, 50, "Iluminación")
-database.add_product("47619", "Llave térmica 32A", 3500.00, 4000.00, 20, "Protección")
-database.add_product("25698", "Cable 2.5mm", 150.00, 250.00, 100, "Cables")
-database.add_product("92340", "Interruptor simple", 500.00, 1100.00, 75, "Conexiones")
-database.add_product("10089", "Pinza amperométrica", 15000.00, 18000.00, 5, "Herramientas")
-
-database.add_product("33456", "Tubo LED 18W", 1000.00, 1300.00, 60, "Iluminación")
-database.add_product("89213", "Llave térmica 20A", 3000.00, 3500.00, 25, "Protección")
-database.add_product("66321", "Cable 1.5mm", 100.00, 180.00, 150, "Cables")
-database.add_product("77890", "Tomacorriente doble", 600.00, 950.00, 80, "Conexiones")
-database.add_product("44123", "Tester digital", 8000.00, 10500.00, 10, "Herramientas")
-
-database.add_product("55678", "Lámpara dicroica LED", 700.00, 1000.00, 40, "Iluminación")
-database.add_product("98321", "Disyuntor diferencial 40A", 4500.00, 5300.00, 15, "Protección")
-database.add_product("12489", "Cable 4mm", 220.00, 350.00, 90, "Cables")
-database.add_product("36789", "Pulsador de timbre", 200.00, 400.00, 100, "Conexiones")
-database.add_product("90876", "Destornillador eléctrico", 9500.00, 12000.00, 6, "Herramientas")
-
-database.add_product("89234", "Tomacorriente doble", 900.00, 1200.00, 40, "Conexiones")
-database.add_product("19824", "Zapatilla 4 tomas c/ térmica", 2200.00, 2800.00, 30, "Conexiones")
-database.add_product("35891", "Tubo LED 18W", 1800.00, 2300.00, 60, "Iluminación")
-database.add_product("75832", "Llave combinada 10mm", 1100.00, 1400.00, 15, "Herramientas")
-database.add_product("67451", "Destornillador plano", 600.00, 900.00, 25, "Herramientas")
-database.add_product("98765", "Cinta aisladora 20m", 150.00, 250.00, 200, "Accesorios")
-database.add_product("13579", "Caja octogonal plástica", 300.00, 450.00, 100, "Cajas")
-database.add_product("24680", "Toma industrial 32A", 3200.00, 4000.00, 10, "Conexiones")
-database.add_product("54321", "Canaleta PVC 20x10", 700.00, 950.00, 75, "Accesorios")
-database.add_product("10101", "Baliza LED emergencia", 5500.00, 7000.00, 8, "Iluminación")
-database.add_product("30303", "Multímetro digital", 9500.00, 11000.00, 12, "Herramientas")
-database.add_product("40404", "Guantes dieléctricos", 2500.00, 3200.00, 20, "Seguridad")
-database.add_product("50505", "Termocontraíble 5mm x 1m", 100.00, 180.00, 150, "Accesorios")
-database.add_product("60606", "Sensor de movimiento", 2900.00, 3600.00, 18, "Iluminación")
-database.add_product("70707", "Caja de paso estanca", 850.00, 1200.00, 40, "Cajas")
-
-
@@ -0,0 +1,111 @@
+import queue
+import threading
+
+
+class LiveSearch:
+    """
+    Búsqueda mientras se escribe, sin bloquear Tk.
+
+    Las teclas se agrupan con un debounce; la consulta corre en un hilo aparte
+    y el resultado vuelve al hilo de Tk por una cola que se revisa con after().
+    Solo se entrega el resultado de la última búsqueda pedida: si el usuario
+    siguió escribiendo, las respuestas viejas se descartan.
+    """
+
+    def __init__(self, widget, query_fn, on_results, delay_ms=250, poll_ms=30, on_error=None, on_idle=None):
+        self.widget = widget
+        self.query_fn = query_fn
+        self.on_results = on_results
+        self.on_error = on_error
+        self.on_idle = on_idle  # desde el hilo de trabajo, cuando no queda nada por buscar
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+
+        self._generation = 0
+        self._after_id = None
+        self._polling = False
+        self._pending = None
+        self._busy = False
+        self._pending_lock = threading.Condition()
+        self._results = queue.Queue()
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def request(self, term):
+        """Pedir una búsqueda; se ejecuta cuando el usuario deja de escribir"""
+        self._generation += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        generation = self._generation
+        self._after_id = self.widget.after(self.delay_ms, lambda: self._submit(generation, term))
+
+    def cancel(self):
+        """Descartar la búsqueda en curso y cualquier resultado pendiente"""
+        self._generation += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _submit(self, generation, term):
+        """Pasar la búsqueda al hilo de trabajo (solo la más reciente)"""
+        self._after_id = None
+        with self._pending_lock:
+            self._pending = (generation, term)
+            self._pending_lock.notify()
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _run(self):
+        """Hilo de trabajo: ejecuta la última búsqueda pedida"""
+        while True:
+            with self._pending_lock:
+                idle = self._pending is None
+            if idle and self.on_idle:
+                try:
+                    self.on_idle()
+                except Exception as e:
+                    print(f"Error en búsqueda: {e}")
+
+            with self._pending_lock:
+                while self._pending is None:
+                    self._pending_lock.wait()
+                generation, term = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                # Si ya hay una búsqueda más nueva no vale la pena consultar
+                if generation == self._generation:
+                    self._results.put((generation, self.query_fn(term), None))
+            except Exception as e:
+                self._results.put((generation, None, e))
+            finally:
+                with self._pending_lock:
+                    self._busy = False
+
+    def _poll(self):
+        """Entregar en el hilo de Tk el resultado vigente"""
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+        if latest is not None:
+            generation, results, error = latest
+            if generation == self._generation:
+                if error is not None:
+                    if self.on_error:
+                        self.on_error(error)
+                else:
+                    self.on_results(results)
+
+        with self._pending_lock:
+            busy = self._busy or self._pending is not None
+        if busy or self._after_id is not None or not self._results.empty():
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,184 @@
+class PagedTable:
+    """
+    Tabla virtualizada sobre un ttk.Treeview.
+
+    El Treeview solo contiene las filas visibles. Alrededor se mantiene en
+    memoria un buffer de páginas traídas por keyset: desplazarse dentro del
+    buffer no consulta la base, y al acercarse a un borde se pide la página
+    siguiente o anterior. Los saltos largos de la barra se resuelven por
+    posición. La barra de desplazamiento refleja la posición sobre el total.
+
+    Args:
+        tree: Treeview donde se dibujan las filas
+        scrollbar: barra vertical asociada
+        render: función que recibe las filas visibles y actualiza el tree
+        count: función sin argumentos que devuelve el total de filas
+        fetch_page: función (after=clave, before=clave, limit=n) -> filas
+        fetch_at: función (offset, limit) -> filas
+        key: función fila -> clave de paginación
+    """
+
+    def __init__(self, tree, scrollbar, render, count, fetch_page, fetch_at, key,
+                 page_size=200, max_pages=3):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.render = render
+        self.count = count
+        self.fetch_page = fetch_page
+        self.fetch_at = fetch_at
+        self.key = key
+        self.page_size = page_size
+        self.max_buffer = page_size * max_pages
+
+        self.active = False
+        self.total = 0
+        self.offset = 0          # primera fila visible
+        self.buffer = []         # filas en memoria
+        self.buffer_start = 0    # posición absoluta de buffer[0]
+
+    @property
+    def visible_rows(self):
+        return int(self.tree['height'])
+
+    def activate(self):
+        """Tomar el control del scroll del tree"""
+        if self.active:
+            return
+        self.active = True
+        self.scrollbar.configure(command=self.on_scrollbar)
+        self.tree.configure(yscrollcommand='')
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self.on_mousewheel)
+        self.tree.bind('<Down>', lambda e: self.on_arrow(1))
+        self.tree.bind('<Up>', lambda e: self.on_arrow(-1))
+        self.tree.bind('<Next>', lambda e: self.scroll(self.visible_rows) or 'break')
+        self.tree.bind('<Prior>', lambda e: self.scroll(-self.visible_rows) or 'break')
+
+    def deactivate(self):
+        """Devolver el scroll nativo del tree (para listas acotadas como búsquedas)"""
+        if not self.active:
+            return
+        self.active = False
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>', '<Down>', '<Up>', '<Next>', '<Prior>'):
+            self.tree.unbind(sequence)
+        self.scrollbar.configure(command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.buffer = []
+
+    def reload(self, keep_position=True):
+        """Volver a leer el total y la ventana actual desde la base"""
+        self.total = self.count()
+        offset = self.offset if keep_position else 0
+        self.buffer = []
+        self.buffer_start = 0
+        self._jump(self._clamp(offset))
+        self.show()
+
+    def scroll(self, delta):
+        """Desplazar la ventana `delta` filas"""
+        offset = self._clamp(self.offset + delta)
+        if offset != self.offset:
+            self.offset = offset
+            self.show()
+
+    def show(self):
+        """Dibujar la ventana visible"""
+        self._ensure_loaded()
+        start = self.offset - self.buffer_start
+        self.render(self.buffer[start:start + self.visible_rows])
+        self._update_scrollbar()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Comando de la barra: 'moveto fracción' o 'scroll n units|pages'"""
+        if action == 'moveto':
+            self.offset = self._clamp(int(float(amount) * self.total))
+            self.show()
+        elif action == 'scroll':
+            step = self.visible_rows if unit == 'pages' else 1
+            self.scroll(int(amount) * step)
+
+    def on_mousewheel(self, event):
+        """Rueda del mouse (Windows/macOS usan delta, Linux Button-4/5)"""
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll(-3)
+        else:
+            self.scroll(3)
+        return 'break'
+
+    def on_arrow(self, direction):
+        """Flechas: al llegar al borde de la ventana se desplaza en lugar de detenerse"""
+        children = self.tree.get_children()
+        if not children:
+            return 'break'
+        selection = self.tree.selection()
+        edge = children[-1] if direction > 0 else children[0]
+        if selection and selection[0] == edge:
+            self.scroll(direction)
+            children = self.tree.get_children()
+            if children:
+                target = children[-1] if direction > 0 else children[0]
+                self.tree.selection_set(target)
+                self.tree.focus(target)
+            return 'break'
+        return None
+
+    def _clamp(self, offset):
+        return max(0, min(offset, max(0, self.total - self.visible_rows)))
+
+    def _ensure_loaded(self):
+        """Asegurar que el buffer cubre la ventana visible más un margen"""
+        if not self.total:
+            self.buffer = []
+            self.buffer_start = 0
+            return
+
+        end = min(self.offset + self.visible_rows, self.total)
+        buffer_end = self.buffer_start + len(self.buffer)
+        margin = self.page_size // 2
+
+        if not self.buffer or end < self.buffer_start - self.page_size or self.offset > buffer_end + self.page_size:
+            self._jump(self.offset)
+            return
+
+        # Cerca del final del buffer: traer la página siguiente
+        while end + margin > buffer_end and buffer_end < self.total:
+            rows = self.fetch_page(after=self.key(self.buffer[-1]), limit=self.page_size)
+            if not rows:
+                self.total = buffer_end
+                break
+            self.buffer.extend(rows)
+            buffer_end += len(rows)
+            overflow = len(self.buffer) - self.max_buffer
+            if overflow > 0 and self.buffer_start + overflow <= self.offset:
+                del self.buffer[:overflow]
+                self.buffer_start += overflow
+
+        # Cerca del principio: traer la página anterior
+        while self.offset - margin < self.buffer_start and self.buffer_start > 0:
+            rows = self.fetch_page(before=self.key(self.buffer[0]), limit=self.page_size)
+            if not rows:
+                break
+            self.buffer[:0] = rows
+            self.buffer_start = max(0, self.buffer_start - len(rows))
+            overflow = len(self.buffer) - self.max_buffer
+            if overflow > 0 and self.buffer_start + len(self.buffer) - overflow >= end:
+                del self.buffer[-overflow:]
+
+    def _jump(self, offset):
+        """Cargar el buffer alrededor de una posición arbitraria"""
+        start = max(0, offset - self.page_size // 2)
+        if start == 0:
+            # El principio de la tabla sale directo del índice, sin posicionar
+            self.buffer = self.fetch_page(limit=self.page_size * 2)
+        else:
+            self.buffer = self.fetch_at(start, self.page_size * 2)
+        self.buffer_start = start
+        self.offset = offset
+
+    def _update_scrollbar(self):
+        if not self.total:
+            self.scrollbar.set(0, 1)
+            return
+        first = self.offset / self.total
+        last = min(1.0, (self.offset + self.visible_rows) / self.total)
+        self.scrollbar.set(first, last)
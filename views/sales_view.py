@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from models.cart import Cart
+
 class SalesView:
     def __init__(self, parent, controller=None):
         self.controller = controller
+        # La venta en curso vive en el carrito; sales_tree solo la dibuja (iid = id de producto)
+        self.cart = Cart()
         self.frame = tk.Frame(parent, bg="#076397")
         self.setup_variables()
         self.create_widgets()
@@ -16,6 +20,9 @@ class SalesView:
         self.customer_address_var = tk.StringVar()
         self.total_var = tk.StringVar()
         self.total_var.set("Total: $0.00")
+        self.budget_status_var = tk.StringVar()
+        self.scan_var = tk.StringVar()
+        self.scan_status_var = tk.StringVar()
     
     def create_widgets(self):
         """Crear todos los widgets de la vista"""
@@ -49,6 +56,15 @@ class SalesView:
         self.customer_doc_entry.grid(row=1, column=1, padx=(5, 0), pady=2)
         self.customer_address_entry.grid(row=2, column=1, padx=(5, 0), pady=2)
         self.customer_iva_combo.grid(row=3, column=1, padx=(5, 0), pady=2)
+
+        # Lector de código de barras: escribe el código y Enter en este campo
+        tk.Label(customer_frame, text="ESCANEAR").grid(row=4, column=0, sticky="w", pady=(8, 0))
+        self.scan_entry = tk.Entry(customer_frame, textvariable=self.scan_var, width=40)
+        self.scan_entry.grid(row=4, column=1, padx=(5, 0), pady=(8, 2))
+        self.scan_entry.bind('<Return>', self._on_scan)
+        self.scan_entry.bind('<KP_Enter>', self._on_scan)
+        tk.Label(customer_frame, textvariable=self.scan_status_var, anchor='w', width=40).grid(
+            row=5, column=1, sticky="w", padx=(5, 0))
             
     def create_products_frame(self):
         """Crear frame para lista de productos"""
@@ -98,6 +114,10 @@ class SalesView:
         budget_btn.grid(row=0, column=2, padx=5, pady=5)
         invoice_btn.grid(row=0, column=3, padx=5, pady=5)
 
+        # Estado de los presupuestos que se generan en segundo plano
+        tk.Label(manage_frame, textvariable=self.budget_status_var, anchor='w', width=45).grid(
+            row=1, column=0, columnspan=4, sticky='w', padx=5)
+
     def create_summary_frame(self):
         """Crear frame para resumen/total"""
         summary_frame = tk.LabelFrame(self.frame, text='Total', borderwidth=5)
@@ -106,6 +126,22 @@ class SalesView:
         total_label = tk.Label(summary_frame, textvariable=self.total_var, font=('Arial', 12, 'bold'))
         total_label.pack(padx=10, pady=5)
     
+    def _on_scan(self, event=None):
+        """Código completo del lector: pasarlo al controlador y dejar el campo listo"""
+        code = self.scan_var.get().strip()
+        self.scan_var.set("")
+        if code and self.controller:
+            self.controller.scan_code(code)
+        return 'break'
+
+    def set_scan_status(self, text):
+        """Mostrar el resultado de los últimos escaneos (sin ventanas emergentes)"""
+        self.scan_status_var.set(text)
+
+    def set_budget_status(self, text):
+        """Mostrar el estado de los presupuestos en generación"""
+        self.budget_status_var.set(text)
+
     def get_customer_data(self):
         """Obtener datos del cliente del formulario"""
         return {
@@ -116,76 +152,50 @@ class SalesView:
         }
     
     def get_selected_products(self):
-        """Obtener productos seleccionados del tree"""
-        products = []
-        for child in self.sales_tree.get_children():
-            values = self.sales_tree.item(child)["values"]
-            products.append({
-                'code': values[0],
-                'name': values[1],
-                'price': float(values[2]),
-                'quantity': int(values[3]),
-                'subtotal': float(values[4])
-            })
-        return products
+        """Productos de la venta en curso, desde el carrito"""
+        return [{
+            'code': line.product_id,
+            'name': line.name,
+            'brand': line.brand,
+            'price': float(line.unit_price),
+            'quantity': line.quantity,
+            'subtotal': float(line.subtotal)
+        } for line in self.cart]
     
     def clear_products(self):
         """Limpiar lista de productos"""
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
+        self.cart.clear()
+        self.sales_tree.delete(*self.sales_tree.get_children())
         self.update_total()
     
     def delete_selected_product(self):
         """Eliminar producto seleccionado"""
         try:
             selected_item = self.sales_tree.selection()[0]
-            self.sales_tree.delete(selected_item)
-            self.update_total()
-            return True
         except IndexError:
             return False
+        self.cart.remove(selected_item)
+        self.sales_tree.delete(selected_item)
+        self.update_total()
+        return True
     
     def add_product_to_tree(self, product_data, quantity_to_add=1):
-        """Agregar producto al tree de ventas"""
-        # Verificar si el producto ya existe
-        for child in self.sales_tree.get_children():
-            values = self.sales_tree.item(child)['values']
-            if str(values[0]) == str(product_data['id']):
-                # Producto ya existe, incrementar cantidad
-                current_quantity = int(values[4])
-                new_quantity = current_quantity + quantity_to_add  # Usar quantity_to_add en lugar de 1
-                new_subtotal = product_data['price2'] * new_quantity
-                self.sales_tree.item(child, values=(
-                    product_data['id'],
-                    product_data['name'],
-                    product_data['brand'],
-                    product_data['price2'],
-                    new_quantity,
-                    new_subtotal
-                ))
-                self.update_total()
-                return
-        
-        # Producto nuevo, agregarlo
-        new_subtotal = product_data['price2'] * quantity_to_add  # Calcular subtotal con quantity_to_add
-        self.sales_tree.insert("", "end", values=(
-            product_data['id'],
-            product_data['name'],
-            product_data['brand'],
-            product_data['price2'],
-            quantity_to_add,
-            new_subtotal
-        ))
+        """Agregar producto a la venta (si ya estaba, se suma la cantidad)"""
+        line = self.cart.add(product_data, quantity_to_add)
+        self.render_line(line)
         self.update_total()
+
+    def render_line(self, line):
+        """Dibujar un renglón del carrito: actualiza su fila o la agrega al final"""
+        values = (line.product_id, line.name, line.brand, line.unit_price, line.quantity, line.subtotal)
+        if self.sales_tree.exists(line.product_id):
+            self.sales_tree.item(line.product_id, values=values)
+        else:
+            self.sales_tree.insert("", "end", iid=line.product_id, values=values)
     
     def update_total(self):
-        """Actualizar el total mostrado"""
-        total = 0.0
-        for child in self.sales_tree.get_children():
-            values = self.sales_tree.item(child)['values']
-            total += float(values[5])
-        
-        self.total_var.set(f"Total: ${total:.2f}")
+        """Actualizar el total mostrado (acumulado en el carrito)"""
+        self.total_var.set(f"Total: ${self.cart.subtotal:.2f}")
     
     def clear_customer_form(self):
         """Limpiar formulario del cliente"""
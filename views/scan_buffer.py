@@ -0,0 +1,51 @@
+class ScanBuffer:
+    """
+    Escaneos de un lector de código de barras (tipo teclado), aplicados de a
+    un cuadro.
+
+    Cada código que llega se anota y, en lugar de actualizar la pantalla por
+    cada uno, se programa una sola descarga con after() dentro de `frame_ms`.
+    Los escaneos seguidos del mismo código se juntan en uno con cantidad,
+    así una ráfaga de diez lecturas del mismo artículo termina en un único
+    cambio de renglón. on_flush recibe la lista de (código, cantidad) en el
+    orden en que se escanearon.
+    """
+
+    def __init__(self, widget, on_flush, frame_ms=16):
+        self.widget = widget
+        self.on_flush = on_flush
+        self.frame_ms = frame_ms
+        self.scans = 0    # lecturas recibidas
+        self.flushes = 0  # descargas hechas
+
+        self._pending = []  # [código, cantidad]
+        self._after_id = None
+
+    def push(self, code, quantity=1):
+        """Anotar un escaneo; la pantalla se actualiza en el próximo cuadro"""
+        self.scans += 1
+        if self._pending and self._pending[-1][0] == code:
+            self._pending[-1][1] += quantity
+        else:
+            self._pending.append([code, quantity])
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.frame_ms, self.flush)
+
+    def flush(self):
+        """Aplicar ya los escaneos pendientes"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if not self._pending:
+            return
+        batch = [(code, quantity) for code, quantity in self._pending]
+        self._pending = []
+        self.flushes += 1
+        try:
+            self.on_flush(batch)
+        except Exception as e:
+            print(f"Error al aplicar escaneos: {e}")
+
+    def pending(self):
+        """Cantidad de lecturas todavía sin aplicar"""
+        return sum(quantity for _, quantity in self._pending)
@@ -1,15 +1,28 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import random
+from db.database import db
 from models import StockModel
+from views.live_search import LiveSearch
+from views.paged_table import PagedTable
 
 class StockView:
+    SEARCH_LIMIT = 500  # resultados como máximo en la búsqueda en vivo
+
     def __init__(self, parent, controller=None):
         self.controller = controller
         self.frame = tk.Frame(parent, bg="#076397")
         self.stock_model = StockModel()
+        self._rows = {}  # iid (código) -> Product mostrado en stock_tree
         self.setup_variables()
         self.create_widgets()
+        self.live_search = LiveSearch(
+            self.frame,
+            lambda term: self.stock_model.search_products(term, limit=self.SEARCH_LIMIT),
+            self.show_search_results,
+            on_error=lambda e: print(f"Error en búsqueda: {e}"),
+            on_idle=db.release_connection
+        )
         
     def set_controller(self, controller):
         """Asignar controller después de la inicialización"""
@@ -28,10 +41,13 @@ class StockView:
         self.iva_var = tk.StringVar(value="21%")
         self.qnt_to_add = tk.StringVar(value=1)
         self.iva_included_var = tk.StringVar(value="-")
+        self.search_var = tk.StringVar()
+        self.import_status_var = tk.StringVar()
         
         # Configurar traces DESPUÉS de crear las variables
         self.price_var.trace_add("write", self.update_price_preview)
         self.iva_var.trace_add("write", self.update_price_preview)
+        self.search_var.trace_add("write", self.on_search_changed)
         
         # Lista de variables para fácil acceso
         self.form_vars = [
@@ -74,6 +90,8 @@ class StockView:
                              command=self.clear_form)
         add_btn = tk.Button(manage_frame, text="AGREGAR", width=10, borderwidth=3, bg=btnColor, fg='black', 
                            command=lambda: self.controller.add_to_sales())
+        self.import_btn = tk.Button(manage_frame, text="IMPORTAR", width=10, borderwidth=3, bg=btnColor, fg='black',
+                                    command=lambda: self.controller.import_catalog())
 
         save_btn.grid(row=0, column=0, padx=5, pady=5)
         update_btn.grid(row=0, column=1, padx=5, pady=5)
@@ -86,6 +104,11 @@ class StockView:
 
         self.qnt_to_add_entry = ttk.Entry(manage_frame, width=2, textvariable=self.qnt_to_add)
         self.qnt_to_add_entry.grid(row=0, column=7, padx=5, pady=5)
+        self.import_btn.grid(row=0, column=8, padx=5, pady=5)
+
+        # Avance de la importación de listas de productos
+        import_status_label = tk.Label(manage_frame, textvariable=self.import_status_var, anchor='w')
+        import_status_label.grid(row=1, column=0, columnspan=9, sticky='w', padx=5)
 
     def create_form_frame(self):
         """Crear frame para formulario de producto"""
@@ -152,14 +175,32 @@ class StockView:
         tree_frame = tk.Frame(self.frame)
         tree_frame.grid(row=2, column=0, padx=10, pady=10, sticky='w')
 
+        # Búsqueda en vivo
+        search_frame = tk.Frame(tree_frame)
+        search_frame.grid(row=0, column=0, sticky='w', padx=10, pady=(10, 5))
+        tk.Label(search_frame, text='BUSCAR').grid(row=0, column=0, padx=(0, 5))
+        self.search_entry = tk.Entry(search_frame, width=50, textvariable=self.search_var)
+        self.search_entry.grid(row=0, column=1)
+
         # Treeview
         self.stock_tree = ttk.Treeview(tree_frame, show="headings", height=10)
 
         # Scrollbar vertical
         scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.stock_tree.yview)
-        scrollbar.grid(row=0, column=1, sticky='ns')
+        scrollbar.grid(row=1, column=1, sticky='ns')
         self.stock_tree.configure(yscrollcommand=scrollbar.set)
 
+        # Catálogo completo: solo se materializan las filas visibles
+        self.pager = PagedTable(
+            self.stock_tree, scrollbar, self.apply_rows,
+            count=self.stock_model.count_products,
+            fetch_page=lambda **page: self.stock_model.get_products_page(
+                order_by=self.sort_field(), descending=self.sort_reverse, **page),
+            fetch_at=lambda offset, limit: self.stock_model.get_products_at(
+                offset, limit, order_by=self.sort_field(), descending=self.sort_reverse),
+            key=lambda product: self.stock_model.product_sort_key(product, self.sort_field()),
+        )
+
         self.stock_tree['columns'] = ('Item Id', "Name", "Brand", "Price", "Price2", "Quantity")
         self.stock_tree['displaycolumns'] = self.stock_tree['columns']
         self.stock_tree.column("Item Id", anchor=tk.W, width=80, stretch=False)
@@ -184,7 +225,7 @@ class StockView:
         
 
         self.stock_tree.tag_configure('orow', background="#FFFFFF")
-        self.stock_tree.grid(row=0, column=0, padx=10, pady=(0, 20), sticky="nsew")
+        self.stock_tree.grid(row=1, column=0, padx=10, pady=(0, 20), sticky="nsew")
 
     def generate_random_id(self):
         """Generar ID aleatorio para producto"""
@@ -226,40 +267,98 @@ class StockView:
                 var.set('')
         # Resetear la preview del IVA
         self.iva_included_var.set('-')
-        products = self.stock_model.get_all_products()
-        self.refresh_stock_table(products)
+        self.show_catalog()
 
     def get_selected_product(self):
         """Obtener producto seleccionado del tree"""
         try:
             selected_item = self.stock_tree.selection()[0]
-            values = self.stock_tree.item(selected_item)['values']
-            product_id = str(values[0]).zfill(4)
-            
-            return {
-                'id': product_id,
-                'name': values[1],
-                'brand': values[2],
-                'price': float(values[3]),
-                'price2': float(values[4]),
-                'quantity': int(values[5]),
-            }
-        except (IndexError, ValueError):
+            # La fila mostrada ya está tipada: no hace falta reconvertir los textos de Tk
+            return self._rows[selected_item]._asdict()
+        except (IndexError, KeyError):
             return None
 
+    def show_catalog(self):
+        """Mostrar el catálogo completo en modo paginado, conservando la posición"""
+        self.pager.activate()
+        self.pager.reload()
+
+    def refresh_products(self, product_ids):
+        """
+        Reflejar cambios en productos puntuales sin recargar la tabla.
+        En modo catálogo se relee la ventana visible; en una lista de
+        resultados se actualizan o quitan solo las filas afectadas.
+        """
+        if self.pager.active:
+            self.pager.reload()
+            return
+
+        for product_id in product_ids:
+            iid = str(product_id)
+            if iid not in self._rows:
+                continue
+            product = self.stock_model.get_product_by_id(product_id)
+            if product is None:
+                self.stock_tree.delete(iid)
+                del self._rows[iid]
+            elif product != self._rows[iid]:
+                self.stock_tree.item(iid, values=product)
+                self._rows[iid] = product
+
+    def show_search_results(self, products):
+        """Mostrar los resultados de la búsqueda en vivo"""
+        self.pager.deactivate()
+        self.apply_rows(products)
+
     def refresh_stock_table(self, products):
         """Refrescar tabla de stock con nuevos datos"""
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
-        for product in products:
-            self.stock_tree.insert(parent='', index='end', iid=product[0], text="", 
-                                  values=product, tag="orow")
+        self.pager.deactivate()
+        # Solo se tocan las filas que cambiaron respecto de lo que ya se muestra
+        self.apply_rows(products)
         
         self.stock_tree.tag_configure('orow', background="white", foreground='black')
 
         if self.sort_column:
-            self.sort_tree(self.sort_column)
+            self.sort_rows()
+
+    def on_search_changed(self, *args):
+        """Buscar mientras se escribe; con el campo vacío vuelve el catálogo completo"""
+        term = self.search_var.get().strip()
+        if term:
+            self.live_search.request(term)
+        else:
+            self.live_search.cancel()
+            if self.controller:
+                self.controller.refresh_stock_table()
+
+    def apply_rows(self, products):
+        """
+        Mostrar `products` en stock_tree tocando solo lo que cambió:
+        se borran las filas que sobran, se actualizan las modificadas y se
+        insertan las nuevas, usando el código del producto como iid.
+        """
+        tree = self.stock_tree
+        new_ids = [str(product.id) for product in products]
+        wanted = set(new_ids)
+
+        stale = [iid for iid in self._rows if iid not in wanted]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del self._rows[iid]
+
+        for index, product in enumerate(products):
+            iid = new_ids[index]
+            current = self._rows.get(iid)
+            if current is None:
+                tree.insert(parent='', index=index, iid=iid, text="", values=product, tag="orow")
+            elif current != product:
+                tree.item(iid, values=product)
+            self._rows[iid] = product
+
+        if list(tree.get_children()) != new_ids:
+            for index, iid in enumerate(new_ids):
+                tree.move(iid, '', index)
 
     def update_price_preview(self, *args):
         """Actualizar preview del costo + IVA"""
@@ -306,52 +405,65 @@ class StockView:
     def ask_confirmation(self, message):
         """Preguntar confirmación al usuario"""
         return messagebox.askquestion("Confirmación", message) == 'yes'
+
+    def ask_import_file(self):
+        """Elegir la lista de productos a importar; devuelve la ruta o '' si se cancela"""
+        return filedialog.askopenfilename(
+            title="Importar lista de productos",
+            filetypes=[("Listas de productos", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")],
+        )
+
+    def set_import_status(self, text, running=False):
+        """Mostrar el avance de la importación; mientras corre el botón queda deshabilitado"""
+        self.import_status_var.set(text)
+        self.import_btn.config(state='disabled' if running else 'normal')
     
 
+    # Columna del tree -> columna de la tabla stock
+    SORT_FIELDS = {
+        'Item Id': 'id',
+        'Name': 'name',
+        'Brand': 'brand',
+        'Price': 'price',
+        'Price2': 'price2',
+        'Quantity': 'quantity',
+    }
+
+    def sort_field(self):
+        """Columna de la base por la que se ordena actualmente"""
+        return self.SORT_FIELDS.get(self.sort_column, 'name')
+
     def sort_tree(self, column):
         """Ordenar tree por columna especificada"""
         try:
-            data = []
-            for child in self.stock_tree.get_children():
-                values = self.stock_tree.item(child)['values']
-                data.append((child, values))
-            
             if self.sort_column == column:
                 self.sort_reverse = not self.sort_reverse
             else:
                 self.sort_reverse = False
                 self.sort_column = column
-            
-            column_index = self.stock_tree['columns'].index(column)
-            
-            def sort_key(item):
-                value = item[1][column_index]
-                
-                if column in ['Price', 'Price2', 'Quantity']:
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return 0
-                
-                elif column == 'Item Id':
-                    try:
-                        return int(value)
-                    except (ValueError, TypeError):
-                        return str(value).lower()
-                
-                else:
-                    return str(value).lower()
-            
-            data.sort(key=sort_key, reverse=self.sort_reverse)
-            
-            for index, (child, values) in enumerate(data):
-                self.stock_tree.move(child, '', index)
-            
+
+            if self.pager.active:
+                # El catálogo se ordena en la base usando el índice de la columna
+                self.pager.reload(keep_position=False)
+            else:
+                self.sort_rows()
+
             self.update_sort_indicators(column)
             
         except Exception as e:
             print(f"Error al ordenar: {e}")
 
+    def sort_rows(self):
+        """
+        Ordenar una lista de resultados con los valores ya tipados que se
+        muestran. Los textos se comparan tal cual, como el ORDER BY de la
+        base, así una búsqueda y el catálogo quedan en el mismo orden.
+        """
+        field = self.sort_field()
+        rows = sorted(self._rows.values(), key=lambda product: (getattr(product, field), product.id),
+                      reverse=self.sort_reverse)
+        self.apply_rows(rows)
+
 
     def update_sort_indicators(self, sorted_column):
         """Actualizar indicadores de ordenamiento en headers"""